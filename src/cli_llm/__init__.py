@@ -1,6 +1,15 @@
 """cli_llm package."""
 
 from ._version import __version__
-from .cli import main
 
 __all__ = ["main", "__version__"]
+
+
+def __getattr__(name: str):
+    # ``main`` drags in the CLI wiring; resolve it on demand so importing the
+    # package (e.g. for ``__version__``) stays cheap.
+    if name == "main":
+        from .cli import main
+
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
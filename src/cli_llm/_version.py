@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-from importlib import metadata
 from pathlib import Path
 from typing import Optional
 
@@ -40,6 +39,8 @@ def _resolve_version() -> str:
         if version:
             return version
 
+    from importlib import metadata
+
     try:
         return metadata.version(PACKAGE_NAME)
     except metadata.PackageNotFoundError:
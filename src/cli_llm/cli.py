@@ -3,11 +3,14 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
 from pathlib import Path
 import select
 import shutil
+import subprocess
 import sys
+import time
 from typing import Any, Dict, Optional
 
 import click  # type: ignore
@@ -15,16 +18,18 @@ import click  # type: ignore
 from .utils import colored, RSTF, NOTF, TIPF, ERRF
 from ._version import __version__
 from .config import AppConfig, ConfigLoader, HELP_TEXTS, setup_logging
-from .providers import ProviderRouter
-from .renderers import ResponseRenderer
+from .providers import CacheMiss, ProviderRouter, with_response_cache
+from .renderers import OUTPUT_FORMATS, EventLog, ResponseRenderer, resolve_output_format
 from .services import (
     ChatService,
     TokenTracker,
+    connect_daemon,
     ensure_url_parser_ok,
     sanitize_input,
     read_input,
 )
-from .toolcalls import ToolCallError, ToolcallService, get_tool_definitions
+from .services import daemon
+from .toolcalls import AgentLimits, ToolCallError, ToolcallService, get_tool_definitions
 
 CONFIG_LOADER = ConfigLoader()
 
@@ -61,6 +66,25 @@ def cli() -> None:
     "-A", "--agents-context", is_flag=True, default=False,
     help="Read ./AGENTS.md from cwd and append to system prompt.",
 )
+@click.option("--cache", is_flag=True, help="Reuse cached answers for identical requests.")
+@click.option("--cache-only", is_flag=True, help="Answer only from the cache; fail instead of calling the API.")
+@click.option("--no-similar", is_flag=True, help="Skip the near-duplicate answer cache for this prompt.")
+@click.option(
+    "-f", "--format", "output_format",
+    type=click.Choice(["auto", *OUTPUT_FORMATS]),
+    default="auto",
+    show_default=True,
+    help="Output format; auto renders Markdown on a terminal and raw text when piped.",
+)
+@click.option("--events", is_flag=True, help="Print one JSON object per request/stream event instead of the answer.")
+@click.option("--map-reduce", is_flag=True,
+    help="Answer over piped stdin chunk by chunk, then combine the partial answers.")
+@click.option("--chunk-tokens", type=click.IntRange(min=64), default=None,
+    help="Map-reduce chunk size in tokens (default: half the context budget, at most 8192).")
+@click.option("-J", "--concurrency", type=click.IntRange(min=1), default=4, show_default=True,
+    help="Maximum map-reduce requests in flight.")
+@click.option("-s", "--session", default=None,
+    help="Continue (or start) the named conversation stored under ~/.cli-llm/sessions.")
 def chat_command(
     prompt: Optional[str],
     no_stream: bool,
@@ -75,6 +99,15 @@ def chat_command(
     count_tokens: bool,
     input_mode: str,
     agents_context: bool,
+    cache: bool,
+    cache_only: bool,
+    no_similar: bool,
+    output_format: str,
+    events: bool,
+    map_reduce: bool,
+    chunk_tokens: Optional[int],
+    concurrency: int,
+    session: Optional[str],
 ) -> None:
     app_config = CONFIG_LOADER.load(
         cli_overrides={"default_model": model, "provider": provider}
@@ -92,6 +125,15 @@ def chat_command(
         count_tokens=count_tokens,
         input_mode=input_mode,
         agents_context=agents_context,
+        cache=cache,
+        cache_only=cache_only,
+        similar=not no_similar,
+        output_format=output_format,
+        events=events,
+        map_reduce=map_reduce,
+        chunk_tokens=chunk_tokens,
+        concurrency=concurrency,
+        session=session,
     )
 
 
@@ -193,6 +235,14 @@ def provider_models(provider_name: Optional[str], json_mode: bool) -> None:
 )
 @click.option("-m", "--model", help=HELP_TEXTS["model"])
 @click.option("-j", "--json", "json_mode", is_flag=True, help="Print tool execution result as JSON.")
+@click.option("-a", "--agent", is_flag=True,
+    help="Loop: feed tool results back until the model answers (independent read-only calls run in parallel).")
+@click.option("--max-steps", type=click.IntRange(min=1), default=8, show_default=True,
+    help="Agent mode: maximum model requests.")
+@click.option("--max-seconds", type=click.FloatRange(min=0, min_open=True), default=120.0, show_default=True,
+    help="Agent mode: wall-clock limit.")
+@click.option("--max-tokens", type=click.IntRange(min=1), default=100_000, show_default=True,
+    help="Agent mode: limit on reported input plus output tokens.")
 def toolcall_command(
     prompt: Optional[str],
     tools_csv: Optional[str],
@@ -200,8 +250,12 @@ def toolcall_command(
     provider: Optional[str],
     model: Optional[str],
     json_mode: bool,
+    agent: bool,
+    max_steps: int,
+    max_seconds: float,
+    max_tokens: int,
 ) -> None:
-    """Run a single tool-call-oriented request."""
+    """Run a tool-call-oriented request (one call, or a multi-step agent with --agent)."""
 
     tool_names = None
     if tools_csv:
@@ -225,6 +279,10 @@ def toolcall_command(
     service = ToolcallService(
         provider=ProviderRouter(app_config).resolve(), cwd=Path.cwd()
     )
+    if agent:
+        _run_agent(service, sanitize_input(prompt), app_config.default_model, tools,
+                   AgentLimits(max_steps, max_seconds, max_tokens), json_mode)
+        return
     try:
         result = service.run(
             prompt=sanitize_input(prompt), model=app_config.default_model, tools=tools
@@ -249,7 +307,574 @@ def toolcall_command(
     print(result.stdout, end="" if result.stdout.endswith("\n") else "\n")
 
 
-_AGENTS_MAX_BYTES = 16384
+def _run_agent(
+    service: ToolcallService,
+    prompt: str,
+    model: str,
+    tools: list,
+    limits: AgentLimits,
+    json_mode: bool,
+) -> None:
+    def report(call: Any, result: Any) -> None:
+        if not json_mode:
+            status = "" if result.exit_code == 0 else f" {ERRF}(exit {result.exit_code}){RSTF}"
+            print(f"{NOTF}→ {call.name} {json.dumps(call.arguments, ensure_ascii=False)}{RSTF}{status}", file=sys.stderr)
+
+    try:
+        outcome = service.run_agent(prompt=prompt, model=model, tools=tools, limits=limits, on_result=report)
+    except ToolCallError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+    if json_mode:
+        print(json.dumps(
+            {
+                "answer": outcome.answer,
+                "steps": outcome.steps,
+                "stopped": outcome.stopped,
+                "input_tokens": outcome.input_tokens,
+                "output_tokens": outcome.output_tokens,
+                "tool_calls": [
+                    {"tool": result.tool, "arguments": result.arguments, "exit_code": result.exit_code}
+                    for result in outcome.results
+                ],
+            },
+            indent=2,
+            sort_keys=True,
+        ))
+        return
+    if outcome.answer is None:
+        raise click.ClickException(
+            f"Agent stopped ({outcome.stopped}) after {outcome.steps} step(s) without an answer."
+        )
+    print(outcome.answer, end="" if outcome.answer.endswith("\n") else "\n")
+
+
+@cli.command("batch")
+@click.argument("input_path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "-o", "--output", "output_path", type=click.Path(dir_okay=False, path_type=Path),
+    help="Result JSONL (default: <input>.results.jsonl).",
+)
+@click.option(
+    "--checkpoint", "checkpoint_path", type=click.Path(dir_okay=False, path_type=Path),
+    help="Checkpoint of finished ids (default: <output>.ckpt).",
+)
+@click.option("-J", "--concurrency", type=click.IntRange(min=1), default=8, show_default=True,
+    help="Maximum requests in flight.")
+@click.option("--restart", is_flag=True, help="Discard previous output and checkpoint.")
+@click.option(
+    "-p", "--provider", help=HELP_TEXTS.get("provider", "Select the provider profile.")
+)
+@click.option("-m", "--model", help=HELP_TEXTS["model"])
+@click.option("-r", "--role", help=HELP_TEXTS["role"])
+@click.option("-t", "--temp", type=float, help=HELP_TEXTS["temp"])
+def batch_command(
+    input_path: Path,
+    output_path: Optional[Path],
+    checkpoint_path: Optional[Path],
+    concurrency: int,
+    restart: bool,
+    provider: Optional[str],
+    model: Optional[str],
+    role: Optional[str],
+    temp: Optional[float],
+) -> None:
+    """Run every JSONL record in INPUT_PATH concurrently, resuming finished work."""
+    # asyncio is a noticeable import; only batch-style commands pay for it.
+    from .services.batch import BatchInputError, run_batch
+
+    setup_logging()
+    app_config = CONFIG_LOADER.load(
+        cli_overrides={"default_model": model, "provider": provider}
+    )
+    output_path = output_path or input_path.with_suffix(".results.jsonl")
+    checkpoint_path = checkpoint_path or output_path.with_name(output_path.name + ".ckpt")
+    if restart:
+        for path in (output_path, checkpoint_path):
+            path.unlink(missing_ok=True)
+
+    try:
+        stats = run_batch(
+            ProviderRouter(app_config).resolve_async(),
+            input_path,
+            output_path=output_path,
+            checkpoint_path=checkpoint_path,
+            default_model=app_config.default_model,
+            default_role=role or app_config.default_role,
+            temperature=temp,
+            concurrency=concurrency,
+            progress=sys.stderr,
+        )
+    except BatchInputError as exc:
+        raise click.ClickException(str(exc)) from exc
+    except KeyboardInterrupt:
+        print(
+            f"\n{TIPF}Batch interrupted; re-run the same command to resume.{RSTF}",
+            file=sys.stderr,
+        )
+        sys.exit(130)
+    if stats.failed:
+        sys.exit(1)
+
+
+@cli.command("map")
+@click.option("-T", "--template", default="{line}", show_default=True,
+    help="Prompt template; {line} is replaced by each stdin line.")
+@click.option("-J", "--concurrency", type=click.IntRange(min=1), default=4, show_default=True,
+    help="Maximum requests in flight.")
+@click.option("--window", type=click.IntRange(min=1), default=None,
+    help="Reorder buffer size in lines (default: 2x concurrency).")
+@click.option("--unordered", is_flag=True, help="Emit answers as they finish instead of in input order.")
+@click.option(
+    "-p", "--provider", help=HELP_TEXTS.get("provider", "Select the provider profile.")
+)
+@click.option("-m", "--model", help=HELP_TEXTS["model"])
+@click.option("-r", "--role", help=HELP_TEXTS["role"])
+@click.option("-t", "--temp", type=float, help=HELP_TEXTS["temp"])
+def map_command(
+    template: str,
+    concurrency: int,
+    window: Optional[int],
+    unordered: bool,
+    provider: Optional[str],
+    model: Optional[str],
+    role: Optional[str],
+    temp: Optional[float],
+) -> None:
+    """Answer each stdin line with one stdout line (Unix filter)."""
+    from .services.linemap import map_lines
+
+    setup_logging()
+    app_config = CONFIG_LOADER.load(
+        cli_overrides={"default_model": model, "provider": provider}
+    )
+    async_provider = ProviderRouter(app_config).resolve_async()
+    service = ChatService(async_provider, ResponseRenderer(app_config), TokenTracker())
+
+    def build_request(text: str):
+        return service.build_request(
+            text,
+            app_config.default_model,
+            role or app_config.default_role,
+            no_stream=True,
+            custom_temp=temp,
+            role_fallback=app_config.default_role,
+        )
+
+    stats = map_lines(
+        async_provider,
+        build_request,
+        template,
+        sys.stdin,
+        sys.stdout,
+        sys.stderr,
+        concurrency=concurrency,
+        window=window,
+        ordered=not unordered,
+    )
+    if stats.failed:
+        sys.exit(1)
+
+
+@cli.command("compare")
+@click.argument("prompt", required=False)
+@click.option("-p", "--providers", "providers_csv",
+    help="Comma-separated provider profiles; use name:model to pin a model.")
+@click.option("-m", "--models", "models_csv", help="Comma-separated models to try on each provider.")
+@click.option("-r", "--role", help=HELP_TEXTS["role"])
+@click.option("-t", "--temp", type=float, help=HELP_TEXTS["temp"])
+@click.option("-j", "--json", "json_mode", is_flag=True, help="Print a machine-readable summary.")
+def compare_command(
+    prompt: Optional[str],
+    providers_csv: Optional[str],
+    models_csv: Optional[str],
+    role: Optional[str],
+    temp: Optional[float],
+    json_mode: bool,
+) -> None:
+    """Stream one prompt to several providers/models side by side."""
+    import asyncio
+
+    from .providers import TransportPool
+    from .services.compare import CompareResult, parse_targets, run_compare
+
+    if not prompt and not sys.stdin.isatty():
+        prompt = sys.stdin.read()
+    if not prompt:
+        raise click.UsageError("Missing prompt.")
+    prompt = sanitize_input(prompt)
+
+    setup_logging()
+    base_config = CONFIG_LOADER.load()
+    known = set(base_config.providers) | {base_config.provider}
+    targets = parse_targets(providers_csv, models_csv, base_config.provider)
+    unknown = sorted({name for name, _ in targets if name not in known})
+    if unknown:
+        raise click.UsageError(
+            f"Unknown provider profile(s): {', '.join(unknown)}. Available: {', '.join(sorted(known))}"
+        )
+
+    transports = TransportPool()
+    entries = []
+    for name, model in targets:
+        app_config = CONFIG_LOADER.load(cli_overrides={"provider": name, "default_model": model})
+        service = ChatService(
+            ProviderRouter(app_config, transports=transports).resolve_async(),
+            ResponseRenderer(app_config),
+            TokenTracker(),
+        )
+        request = service.build_request(
+            prompt,
+            app_config.default_model,
+            role or app_config.default_role,
+            count_tokens=True,  # ask for usage in the stream instead of tokenizing locally
+            custom_temp=temp,
+            role_fallback=app_config.default_role,
+        )
+        entries.append((CompareResult(provider=name, model=app_config.default_model), service, request))
+
+    view = None
+    if not json_mode:
+        from .renderers.compare import ComparisonView
+
+        view = ComparisonView([result for result, _, _ in entries])
+    live = view is not None and sys.stdout.isatty()
+
+    async def _main():
+        try:
+            if live:
+                with view.live():
+                    return await run_compare(entries)
+            return await run_compare(entries)
+        finally:
+            await transports.aclose()
+
+    results = asyncio.run(_main())
+    if view is None:
+        print(json.dumps([result.to_dict() for result in results], indent=2))
+    else:
+        view.print_final()
+    if any(result.error for result in results):
+        sys.exit(1)
+
+
+@cli.group("daemon")
+def daemon_group() -> None:
+    """Manage the opt-in warm daemon used by `llm chat`."""
+
+
+@daemon_group.command("run")
+def daemon_run() -> None:
+    """Run the daemon in the foreground."""
+    setup_logging()
+    try:
+        daemon.serve(CONFIG_LOADER)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+
+@daemon_group.command("start")
+@click.option("--wait", type=float, default=5.0, show_default=True, help="Seconds to wait for readiness.")
+def daemon_start(wait: float) -> None:
+    """Start the daemon in the background."""
+    status = daemon.ping()
+    if status is not None:
+        print(f"Daemon already running (pid {status.get('pid')}).")
+        return
+
+    subprocess.Popen(
+        [sys.executable, "-m", "cli_llm", "daemon", "run"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        status = daemon.ping()
+        if status is not None:
+            print(f"Daemon started (pid {status.get('pid')}) on {daemon.DAEMON_SOCKET_PATH}.")
+            return
+        time.sleep(0.05)
+    raise click.ClickException("Daemon did not become ready; see the cli_llm log.")
+
+
+@daemon_group.command("stop")
+def daemon_stop() -> None:
+    """Stop a running daemon."""
+    if daemon.shutdown():
+        print("Daemon stopped.")
+    else:
+        print("Daemon is not running.")
+
+
+@daemon_group.command("status")
+def daemon_status() -> None:
+    """Report whether the daemon is running."""
+    status = daemon.ping()
+    if status is None:
+        print("Daemon is not running.")
+    else:
+        print(f"Daemon running (pid {status.get('pid')}) on {daemon.DAEMON_SOCKET_PATH}.")
+
+
+@cli.group("session")
+def session_group() -> None:
+    """Maintain `llm chat --session` conversations."""
+
+
+@session_group.command("compact")
+@click.argument("name")
+@click.option("--for-model", default=None,
+    help="Chat model whose tokenizer measures the summary (default: the configured model).")
+@click.option("--provider", default=None,
+    help="Provider profile of the chat (default: the configured provider).")
+def session_compact(name: str, for_model: Optional[str], provider: Optional[str]) -> None:
+    """Fold older turns of session NAME into its rolling summary."""
+    from .models import model_registry
+    from .providers import ChatRequest
+    from .services.compaction import COMPACT_SYSTEM_PROMPT, CompactionPolicy, compact
+    from .services.context_pack import token_counter
+    from .services.conversation import Conversation
+
+    setup_logging()
+    base_config = CONFIG_LOADER.load(cli_overrides={"provider": provider, "default_model": for_model})
+    policy = CompactionPolicy.from_config(base_config)
+    # Without a [sessions] compaction model the chat's own provider and model
+    # write the summary; a compaction provider alone uses its default model.
+    summary_config = CONFIG_LOADER.load(
+        cli_overrides={
+            "provider": policy.provider or base_config.provider,
+            "default_model": policy.model or (None if policy.provider else base_config.default_model),
+        }
+    )
+    provider_client = ProviderRouter(summary_config).resolve()
+    try:
+        conversation = Conversation(name)
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+
+    def summarize(prompt: str) -> str:
+        request = ChatRequest(
+            model=summary_config.default_model,
+            messages=[
+                {"role": "system", "content": COMPACT_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.2,
+        )
+        return provider_client.create_chat(request).choices[0].message.content or ""
+
+    chat_model = for_model or base_config.default_model
+    registry = model_registry(base_config.models)
+    if compact(
+        conversation,
+        summarize,
+        token_counter(chat_model, registry),
+        keep_turns=policy.keep_turns,
+        encoding=registry.get(chat_model).encoding,
+    ):
+        print(f"Session {name} compacted.")
+    else:
+        print(f"Session {name}: nothing to compact.")
+
+
+@cli.group("history")
+def history_group() -> None:
+    """Search and summarize recorded chat transcripts."""
+
+
+def _format_time(created: Optional[float]) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(created)) if created else "-"
+
+
+@history_group.command("search")
+@click.argument("query")
+@click.option("-n", "--limit", type=click.IntRange(min=1), default=20, show_default=True)
+@click.option("-m", "--model", default=None, help="Only transcripts from this model.")
+@click.option("-r", "--role", default=None, help="Only transcripts for this role.")
+@click.option("--json", "as_json", is_flag=True, help="Print JSON instead of a table.")
+def history_search(query: str, limit: int, model: Optional[str], role: Optional[str], as_json: bool) -> None:
+    """Full-text search prompts and answers (FTS5 query syntax)."""
+    from dataclasses import asdict
+
+    from .services.transcripts import TranscriptStore
+
+    hits = TranscriptStore().search(query, limit=limit, model=model, role=role)
+    if as_json:
+        print(json.dumps([asdict(hit) for hit in hits], ensure_ascii=False, indent=2))
+        return
+    if not hits:
+        print("No matching transcripts.")
+        return
+    for hit in hits:
+        snippet = " ".join(hit.snippet.split())
+        print(f"{TIPF}#{hit.id}{RSTF} {_format_time(hit.created)} {hit.model or '-'} [{hit.role or '-'}] {snippet}")
+
+
+@history_group.command("show")
+@click.argument("transcript_id", type=int)
+@click.option("--json", "as_json", is_flag=True, help="Print JSON instead of text.")
+def history_show(transcript_id: int, as_json: bool) -> None:
+    """Print one transcript by id."""
+    from .services.transcripts import TranscriptStore
+
+    record = TranscriptStore().get(transcript_id)
+    if record is None:
+        raise click.ClickException(f"No transcript #{transcript_id}.")
+    if as_json:
+        print(json.dumps(record.to_dict(), ensure_ascii=False, indent=2))
+        return
+    tokens = f"{record.input_tokens or 0} in / {record.output_tokens or 0} out"
+    print(f"{TIPF}#{record.id}{RSTF} {_format_time(record.created)} {record.provider or '-'}/{record.model or '-'} "
+          f"[{record.role or '-'}] {record.elapsed or 0:.2f}s, {tokens}")
+    print(f"\n{NOTF}Prompt:{RSTF}\n{record.prompt}")
+    if record.error:
+        print(f"\n{ERRF}Error:{RSTF} {record.error}")
+    else:
+        print(f"\n{NOTF}Answer:{RSTF}\n{record.answer}")
+
+
+@history_group.command("stats")
+@click.option("--json", "as_json", is_flag=True, help="Print JSON instead of a table.")
+def history_stats(as_json: bool) -> None:
+    """Request counts, token usage and latency per provider/model."""
+    from .services.transcripts import TranscriptStore
+
+    stats = TranscriptStore().stats()
+    if as_json:
+        print(json.dumps(stats, indent=2))
+        return
+    total = stats["total"]
+    print(f"{total['requests']} requests ({total['errors']} failed), "
+          f"{total['input_tokens']} input / {total['output_tokens']} output tokens, "
+          f"{_format_time(total['first'])} – {_format_time(total['last'])}")
+    for row in stats["models"]:
+        print(f"  {row['provider'] or '-'}/{row['model'] or '-'}: {row['requests']} requests, "
+              f"{row['input_tokens']} in / {row['output_tokens']} out, avg {row['avg_elapsed'] or 0:.2f}s"
+              + (f", {row['errors']} failed" if row["errors"] else ""))
+
+
+def _pack_chat_context(
+    app_config: AppConfig, model: str, role: str, prompt: str, stdin_input: str, agents_text: str
+) -> tuple[str, str, int]:
+    """Fit AGENTS.md and piped stdin around the role and prompt; warn about anything dropped.
+
+    Returns the user prompt, the AGENTS.md text and the tokens left for session history.
+    """
+    from .models import model_registry
+    from .prompts import SYS_ROLES
+    from .services.context_pack import ContextPart, default_budget, pack_context, size_bound, token_counter
+
+    registry = model_registry(app_config.models)
+    system = SYS_ROLES.get(role) or SYS_ROLES.get(app_config.default_role)
+    parts = [
+        ContextPart("system role", system.content if system else ""),
+        ContextPart("prompt", prompt),
+        ContextPart("stdin", stdin_input, strategy="log", priority=1),
+        ContextPart("AGENTS.md", agents_text, strategy="markdown", priority=0, cap=app_config.agents_budget),
+    ]
+    budget = app_config.context_budget or default_budget(registry.get(model))
+    bound = size_bound(parts, budget)
+    if bound is not None:  # fits for sure; spare the tokenizer load on cold start
+        return "\n".join(filter(None, [prompt, stdin_input])), agents_text, budget - bound
+    packed = pack_context(parts, budget, token_counter(model, registry))
+    for note in packed.dropped:
+        print(f"{ERRF}Warning: context trimmed to fit {packed.budget:,} tokens — {note}{RSTF}", file=sys.stderr)
+    full_prompt = "\n".join(filter(None, [packed.parts["prompt"], packed.parts["stdin"]]))
+    return full_prompt, packed.parts["AGENTS.md"], max(0, packed.budget - packed.tokens)
+
+
+def _session_history(
+    app_config: AppConfig, chat_service: ChatService, name: str, model: str, budget: int
+) -> tuple[Any, list]:
+    """Open session ``name`` and return it with the newest turns that fit ``budget``."""
+    from .models import model_registry
+    from .services.conversation import Conversation
+
+    try:
+        conversation = Conversation(name)
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+    encoding = model_registry(app_config.models).get(model).encoding
+    window = conversation.window(budget)
+    # Stored counts spare the pre-flight check from re-tokenizing old turns.
+    chat_service.seed_token_counts(
+        model, [(message.content, message.tokens) for message in window if message.encoding == encoding]
+    )
+    return conversation, [message.to_message() for message in window]
+
+
+def _record_session(
+    app_config: AppConfig, chat_service: ChatService, conversation: Any, model: str, prompt: str, answer: str
+) -> None:
+    from .models import model_registry
+    from .services.conversation import SessionMessage
+
+    encoding: Optional[str] = model_registry(app_config.models).get(model).encoding
+    try:
+        counts = [chat_service.count_tokens_in_text(text, model) for text in (prompt, answer)]
+    except Exception:  # tokenizer unavailable; store a rough size instead
+        counts = [(len(text.encode("utf-8")) + 3) // 4 for text in (prompt, answer)]
+        encoding = None
+    conversation.append(
+        SessionMessage("user", prompt, counts[0], encoding),
+        SessionMessage("assistant", answer, counts[1], encoding),
+    )
+
+
+def _map_reduce_prompt(
+    app_config: AppConfig,
+    chat_service: ChatService,
+    provider_client: Any,
+    model: str,
+    role: str,
+    question: str,
+    text: str,
+    *,
+    temp: Optional[float],
+    chunk_tokens: Optional[int],
+    concurrency: int,
+) -> str:
+    """Map ``question`` over chunks of ``text`` and return the final reduce prompt."""
+    from .models import model_registry
+    from .providers import ProviderError, ResponseCache
+    from .services.context_pack import default_budget, token_counter
+    from .services.mapreduce import DEFAULT_CHUNK_TOKENS, MAP_REDUCE_CACHE_DIR, MapReduce
+
+    registry = model_registry(app_config.models)
+    budget = app_config.context_budget or default_budget(registry.get(model))
+
+    def build_request(prompt_text: str):
+        return chat_service.build_request(
+            prompt_text, model, role, no_stream=True, custom_temp=temp, role_fallback=app_config.default_role
+        )
+
+    runner = MapReduce(
+        provider_client,
+        build_request,
+        token_counter(model, registry),
+        chunk_tokens=chunk_tokens or min(DEFAULT_CHUNK_TOKENS, budget // 2),
+        reduce_tokens=budget // 2,
+        concurrency=concurrency,
+        cache=ResponseCache(root=MAP_REDUCE_CACHE_DIR),
+    )
+    try:
+        final_prompt = runner.run(question, text)
+    except ProviderError as exc:
+        raise click.ClickException(str(exc)) from exc
+    print(f"{TIPF}🧮 Map-reduce: {runner.stats.summary()}{RSTF}", file=sys.stderr)
+    return final_prompt
+
+
+def _maybe_compact(app_config: AppConfig, conversation: Any, model: str) -> None:
+    """Start background compaction once the live session outgrows its share of the window."""
+    from .models import model_registry
+    from .services.compaction import CompactionPolicy, spawn_compaction
+
+    policy = CompactionPolicy.from_config(app_config)
+    if policy.due(conversation.live_tokens(), model_registry(app_config.models).get(model).context_window):
+        spawn_compaction(conversation.name, model, app_config.provider)
 
 
 def _run_chat(
@@ -266,6 +891,15 @@ def _run_chat(
     count_tokens: bool,
     input_mode: str = "prompt",
     agents_context: bool = False,
+    cache: bool = False,
+    cache_only: bool = False,
+    similar: bool = True,
+    output_format: str = "auto",
+    events: bool = False,
+    map_reduce: bool = False,
+    chunk_tokens: Optional[int] = None,
+    concurrency: int = 4,
+    session: Optional[str] = None,
 ) -> None:
     logger = setup_logging()
 
@@ -286,13 +920,79 @@ def _run_chat(
 
     active_model = app_config.default_model
     active_role = role or app_config.default_role
-    full_prompt = "\n".join(filter(None, [prompt, stdin_input]))
 
-    provider_client = ProviderRouter(app_config).resolve()
-    renderer = ResponseRenderer(app_config)
+    provider_client = connect_daemon(app_config) or ProviderRouter(app_config).resolve()
+    provider_client = with_response_cache(
+        provider_client, app_config, enabled=cache, offline=cache_only
+    )
+    renderer = ResponseRenderer(
+        app_config,
+        output_format=resolve_output_format(output_format),
+        events=EventLog() if events else None,
+    )
     token_tracker = TokenTracker()
-    chat_service = ChatService(provider_client, renderer, token_tracker)
+    similar_cache = None
+    if similar and not session and active_role in app_config.similar_roles:
+        from .services.similar import SimilarityCache
+
+        similar_cache = SimilarityCache(app_config.similar_roles, app_config.similar_threshold)
+    transcripts = None
+    if app_config.history_enabled and not localtest:
+        from .services.transcripts import TranscriptWriter
+
+        transcripts = TranscriptWriter()
+    chat_service = ChatService(
+        provider_client, renderer, token_tracker, similar=similar_cache, transcripts=transcripts
+    )
+    try:
+        _chat_once(
+            app_config=app_config,
+            chat_service=chat_service,
+            provider_client=provider_client,
+            logger=logger,
+            prompt=prompt,
+            stdin_input=stdin_input,
+            no_stream=no_stream,
+            active_model=active_model,
+            active_role=active_role,
+            temp=temp,
+            json_output=json_output,
+            debug=debug,
+            localtest=localtest,
+            count_tokens=count_tokens,
+            agents_context=agents_context,
+            map_reduce=map_reduce,
+            chunk_tokens=chunk_tokens,
+            concurrency=concurrency,
+            session=session,
+        )
+    finally:
+        if transcripts is not None:
+            transcripts.close()
 
+
+def _chat_once(
+    *,
+    app_config: AppConfig,
+    chat_service: ChatService,
+    provider_client: Any,
+    logger: logging.Logger,
+    prompt: str,
+    stdin_input: str,
+    no_stream: bool,
+    active_model: str,
+    active_role: str,
+    temp: Optional[float],
+    json_output: bool,
+    debug: bool,
+    localtest: bool,
+    count_tokens: bool,
+    agents_context: bool,
+    map_reduce: bool,
+    chunk_tokens: Optional[int],
+    concurrency: int,
+    session: Optional[str],
+) -> None:
     if debug:
         logger.setLevel("DEBUG")
         for handler in logger.handlers:
@@ -307,30 +1007,58 @@ def _run_chat(
         agents_path = os.path.join(os.getcwd(), "AGENTS.md")
         try:
             raw = Path(agents_path).read_bytes()
-            if len(raw) > _AGENTS_MAX_BYTES:
-                print(
-                    f"{ERRF}Warning: AGENTS.md exceeds 16 KB, truncating.{RSTF}",
-                    file=sys.stderr,
-                )
-                raw = raw[:_AGENTS_MAX_BYTES]
-            agents_context_text = sanitize_input(raw.decode("utf-8", errors="replace"))
+            # Sanitize line by line: the packer needs the Markdown structure intact.
+            agents_context_text = "\n".join(
+                sanitize_input(line) for line in raw.decode("utf-8", errors="replace").splitlines()
+            )
         except FileNotFoundError:
             print(
                 f"{ERRF}Warning: ./AGENTS.md not found, skipping agents context.{RSTF}",
                 file=sys.stderr,
             )
 
-    chat_service.chat(
-        full_prompt,
-        no_stream=no_stream,
-        model=active_model,
-        role_name=active_role,
-        role_fallback=app_config.default_role,
-        count_tokens=count_tokens,
-        custom_temp=temp,
-        json_output=json_output,
-        agents_context_text=agents_context_text,
+    if map_reduce and stdin_input:
+        prompt = _map_reduce_prompt(
+            app_config,
+            chat_service,
+            provider_client,
+            active_model,
+            active_role,
+            prompt,
+            stdin_input,
+            temp=temp,
+            chunk_tokens=chunk_tokens,
+            concurrency=concurrency,
+        )
+        stdin_input = ""
+
+    full_prompt, agents_context_text, history_budget = _pack_chat_context(
+        app_config, active_model, active_role, prompt, stdin_input, agents_context_text
     )
+    conversation, history = None, []
+    if session:
+        conversation, history = _session_history(
+            app_config, chat_service, session, active_model, history_budget
+        )
+
+    try:
+        answer = chat_service.chat(
+            full_prompt,
+            no_stream=no_stream,
+            model=active_model,
+            role_name=active_role,
+            role_fallback=app_config.default_role,
+            count_tokens=count_tokens,
+            custom_temp=temp,
+            json_output=json_output,
+            agents_context_text=agents_context_text,
+            history=history,
+        )
+    except CacheMiss as exc:
+        raise click.ClickException(str(exc)) from exc
+    if conversation is not None and answer:
+        _record_session(app_config, chat_service, conversation, active_model, full_prompt, answer)
+        _maybe_compact(app_config, conversation, active_model)
 
     chat_service.display_tokens_if_any()
 
@@ -358,7 +1086,7 @@ def _provider_records(app_config: AppConfig) -> Dict[str, Dict[str, Any]]:
     return records
 
 
-SUBCOMMAND_NAMES = {"chat", "inspect", "provider", "toolcall"}
+SUBCOMMAND_NAMES = {"batch", "chat", "compare", "daemon", "history", "inspect", "map", "provider", "session", "toolcall"}
 PASSTHROUGH_FLAGS = {"-h", "--help", "-V", "--version"}
 
 
@@ -6,7 +6,7 @@ import logging
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Mapping, Optional
+from typing import Any, Dict, List, Mapping, Optional
 
 from logging.handlers import RotatingFileHandler
 
@@ -26,6 +26,34 @@ DEFAULT_CONFIG_VALUES = {
 }
 
 DEFAULT_CONFIG_PATH = Path.home() / ".cli-llm" / "config.toml"
+DATA_DIR = DEFAULT_CONFIG_PATH.parent
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "cli-llm"
+
+# Response cache settings accepted inside ``[providers.<name>]`` tables.
+CACHE_PROFILE_KEYS = {
+    "cache": bool,
+    "cache_ttl": float,
+    "cache_max_bytes": int,
+}
+
+# Connection tuning accepted inside ``[providers.<name>]`` tables.
+TRANSPORT_PROFILE_KEYS = {
+    "max_connections": int,
+    "max_keepalive_connections": int,
+    "keepalive_expiry": float,
+    "connect_timeout": float,
+    "read_timeout": float,
+    "http2": bool,
+}
+
+MODEL_METADATA_KEYS = {
+    "context_window": int,
+    "max_output": int,
+    "encoding": str,
+    "input_price": float,
+    "output_price": float,
+    "cached_input_price": float,
+}
 
 
 @dataclass(slots=True)
@@ -38,6 +66,17 @@ class AppConfig:
     default_role: str = DEFAULT_CONFIG_VALUES["default_role"]
     provider: str = DEFAULT_CONFIG_VALUES["provider"]
     providers: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    similar_roles: List[str] = field(default_factory=list)
+    similar_threshold: float = 0.8
+    frame_interval: float = 0.03
+    models: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    context_budget: Optional[int] = None
+    agents_budget: int = 4096
+    session_compact_at: float = 0.5
+    session_keep_turns: int = 4
+    session_compact_model: Optional[str] = None
+    session_compact_provider: Optional[str] = None
+    history_enabled: bool = True
     app_title: str = "egg-cli-llm"
     app_url: str = "https://github.com/Egg12138/cli-llm"
     extra_headers: Dict[str, str] = field(
@@ -114,10 +153,22 @@ class ConfigLoader:
             default_role=merged.get("default_role", self.repo_defaults["default_role"]),
             provider=provider_name,
             providers=provider_profiles,
+            similar_roles=merged.get("similar_roles", []),
+            similar_threshold=merged.get("similar_threshold", 0.8),
+            frame_interval=merged.get("frame_interval", 0.03),
+            models=merged.get("models", {}),
+            context_budget=merged.get("context_budget"),
+            agents_budget=merged.get("agents_budget", 4096),
+            session_compact_at=merged.get("session_compact_at", 0.5),
+            session_keep_turns=merged.get("session_keep_turns", 4),
+            session_compact_model=merged.get("session_compact_model"),
+            session_compact_provider=merged.get("session_compact_provider"),
+            history_enabled=merged.get("history_enabled", True),
         )
 
     def _env_values(self, environment: Optional[Mapping[str, str]]) -> Dict[str, Any]:
-        source = environment or os.environ
+        # An empty mapping is a real environment (e.g. a daemon client's).
+        source = os.environ if environment is None else environment
         resolved: Dict[str, Any] = {}
         for env_key, config_key in self.env_key_map.items():
             value = source.get(env_key)
@@ -187,8 +238,75 @@ class ConfigLoader:
             if key not in extracted and key in data and data[key] is not None:
                 extracted[key] = data[key]
 
+        frame_interval = defaults.get("frame_interval") if isinstance(defaults, Mapping) else None
+        if isinstance(frame_interval, (int, float)) and not isinstance(frame_interval, bool):
+            extracted["frame_interval"] = max(0.0, float(frame_interval))
+
+        similar = data.get("similar", {})
+        if isinstance(similar, Mapping):
+            roles = similar.get("roles")
+            if isinstance(roles, list):
+                extracted["similar_roles"] = [str(role) for role in roles]
+            threshold = similar.get("threshold")
+            if isinstance(threshold, (int, float)) and not isinstance(threshold, bool):
+                extracted["similar_threshold"] = min(1.0, max(0.0, float(threshold)))
+
+        context = data.get("context", {})
+        if isinstance(context, Mapping):
+            for source_key, target_key in (("budget", "context_budget"), ("agents_budget", "agents_budget")):
+                value = context.get(source_key)
+                if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+                    extracted[target_key] = value
+
+        sessions = data.get("sessions", {})
+        if isinstance(sessions, Mapping):
+            compact_at = sessions.get("compact_at")
+            if isinstance(compact_at, (int, float)) and not isinstance(compact_at, bool):
+                extracted["session_compact_at"] = min(1.0, max(0.05, float(compact_at)))
+            keep_turns = sessions.get("keep_turns")
+            if isinstance(keep_turns, int) and not isinstance(keep_turns, bool) and keep_turns >= 0:
+                extracted["session_keep_turns"] = keep_turns
+            for source_key, target_key in (
+                ("compact_model", "session_compact_model"),
+                ("compact_provider", "session_compact_provider"),
+            ):
+                value = sessions.get(source_key)
+                if isinstance(value, str) and value:
+                    extracted[target_key] = value
+
+        history = data.get("history", {})
+        if isinstance(history, Mapping) and isinstance(history.get("enabled"), bool):
+            extracted["history_enabled"] = history["enabled"]
+
+        models = self._extract_model_overrides(data)
+        if models:
+            extracted["models"] = models
+
         return extracted
 
+    def _extract_model_overrides(self, data: Mapping[str, Any]) -> Dict[str, Dict[str, Any]]:
+        models_section = data.get("models")
+        if not isinstance(models_section, Mapping):
+            return {}
+
+        overrides: Dict[str, Dict[str, Any]] = {}
+        for name, raw_entry in models_section.items():
+            if not isinstance(raw_entry, Mapping):
+                continue
+            entry: Dict[str, Any] = {}
+            for key, expected_type in MODEL_METADATA_KEYS.items():
+                value = raw_entry.get(key)
+                if expected_type is float and isinstance(value, int) and not isinstance(value, bool):
+                    value = float(value)
+                if isinstance(value, expected_type) and not isinstance(value, bool):
+                    entry[key] = value
+            capabilities = raw_entry.get("capabilities")
+            if isinstance(capabilities, list):
+                entry["capabilities"] = [str(flag) for flag in capabilities]
+            if entry:
+                overrides[str(name)] = entry
+        return overrides
+
     def _extract_provider_profiles(self, data: Mapping[str, Any]) -> Dict[str, Dict[str, Any]]:
         providers_section = data.get("providers")
         if not isinstance(providers_section, Mapping):
@@ -206,10 +324,44 @@ class ConfigLoader:
             models = raw_config.get("models")
             if isinstance(models, list):
                 profile["models"] = [str(model) for model in models]
+            fallbacks = raw_config.get("fallbacks")
+            if isinstance(fallbacks, list):
+                profile["fallbacks"] = [str(fallback) for fallback in fallbacks]
+            stream_usage = raw_config.get("stream_usage")
+            if isinstance(stream_usage, bool):
+                profile["stream_usage"] = stream_usage
+            hedge_after = raw_config.get("hedge_after")
+            if isinstance(hedge_after, (int, float)) and not isinstance(hedge_after, bool):
+                profile["hedge_after"] = float(hedge_after)
+            for key, kind in {**CACHE_PROFILE_KEYS, **TRANSPORT_PROFILE_KEYS}.items():
+                value = _coerce_profile_value(str(name), key, raw_config.get(key), kind)
+                if value is not None:
+                    profile[key] = value
             profiles[str(name)] = profile
         return profiles
 
 
+def _coerce_profile_value(profile: str, key: str, value: Any, kind: type) -> Any:
+    """Return ``value`` as ``kind`` or ``None`` when it is missing or malformed.
+
+    Booleans never stand in for numbers, and integer settings reject
+    fractional values instead of truncating them.
+    """
+
+    if value is None:
+        return None
+    if kind is bool:
+        return value if isinstance(value, bool) else None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if kind is int and not float(value).is_integer():
+        logging.getLogger(__name__).warning(
+            "Ignoring providers.%s.%s = %r; expected a whole number", profile, key, value
+        )
+        return None
+    return kind(value)
+
+
 HELP_TEXTS = {
     "prompt": colored("Input prompt for deepseek.", TIPF),
     "no_stream": " ".join(
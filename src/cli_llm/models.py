@@ -0,0 +1,123 @@
+"""Model metadata: context windows, tokenizers, pricing and capabilities.
+
+A bundled table (``models.json``) covers the models the sample config uses;
+``[models."<name>"]`` tables in the user config add models or override single
+fields.  Prices are USD per million tokens.  Dated or vendor-prefixed names
+(``gpt-4o-2024-08-06``, ``openai/gpt-4o``) resolve to their base entry.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Mapping, Optional
+
+LOGGER = logging.getLogger("cli_llm")
+
+MODELS_FILE = Path(__file__).parent / "models.json"
+DEFAULT_ENCODING = "cl100k_base"
+# Snapshot suffixes that do not change a model's metadata: -2024-08-06, -0613.
+_SNAPSHOT_SUFFIX = re.compile(r"-(?:\d{4}-\d{2}-\d{2}|\d{4})$")
+
+
+class ContextWindowExceeded(ValueError):
+    """Raised before sending a request whose input cannot fit the model's context."""
+
+
+@dataclass(frozen=True, slots=True)
+class ModelInfo:
+    name: str
+    context_window: Optional[int] = None
+    max_output: Optional[int] = None
+    encoding: str = DEFAULT_ENCODING
+    input_price: Optional[float] = None
+    output_price: Optional[float] = None
+    cached_input_price: Optional[float] = None
+    capabilities: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def from_mapping(cls, name: str, raw: Mapping[str, Any]) -> "ModelInfo":
+        known = {field.name for field in fields(cls)} - {"name"}
+        values = {key: raw[key] for key in known if raw.get(key) is not None}
+        if "capabilities" in values:
+            values["capabilities"] = frozenset(str(flag) for flag in values["capabilities"])
+        return cls(name=name, **values)
+
+    def supports(self, capability: str) -> bool:
+        """Unknown models are assumed capable; only a declared list can rule a feature out."""
+        return self.capabilities is None or capability in self.capabilities
+
+    @property
+    def priced(self) -> bool:
+        return self.input_price is not None and self.output_price is not None
+
+    def cost(self, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+        if not self.priced:
+            return None
+        cached_tokens = min(cached_tokens, input_tokens)
+        cached_price = self.cached_input_price if self.cached_input_price is not None else self.input_price
+        return (
+            (input_tokens - cached_tokens) * self.input_price
+            + cached_tokens * cached_price
+            + output_tokens * self.output_price
+        ) / 1_000_000
+
+
+@lru_cache(maxsize=1)
+def _bundled() -> Dict[str, Dict[str, Any]]:
+    try:
+        with MODELS_FILE.open(encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError) as exc:  # pragma: no cover - packaging error
+        LOGGER.warning("⚠️ Could not read bundled model table: %s", exc)
+        return {}
+
+
+class ModelRegistry:
+    """Resolve model names to :class:`ModelInfo`, memoising lookups."""
+
+    def __init__(self, overrides: Optional[Mapping[str, Mapping[str, Any]]] = None) -> None:
+        table = {name: dict(entry) for name, entry in _bundled().items()}
+        for name, entry in (overrides or {}).items():
+            table.setdefault(name, {}).update(entry)
+        self._table = table
+        self._resolved: Dict[str, ModelInfo] = {}
+
+    def _base_name(self, model: str) -> Optional[str]:
+        if model in self._table:
+            return model
+        bare = model.rsplit("/", 1)[-1]
+        if bare in self._table:
+            return bare
+        # Only snapshot suffixes fall back: variants such as gpt-4-turbo or
+        # gpt-4-32k differ from gpt-4 and need their own entries.
+        base = _SNAPSHOT_SUFFIX.sub("", bare)
+        return base if base != bare and base in self._table else None
+
+    def get(self, model: str) -> ModelInfo:
+        info = self._resolved.get(model)
+        if info is None:
+            base = self._base_name(model)
+            info = ModelInfo.from_mapping(model, self._table[base]) if base else ModelInfo(name=model)
+            self._resolved[model] = info
+        return info
+
+    def __contains__(self, model: str) -> bool:
+        return self._base_name(model) is not None
+
+
+_DEFAULT_REGISTRY: Optional[ModelRegistry] = None
+
+
+def model_registry(overrides: Optional[Mapping[str, Mapping[str, Any]]] = None) -> ModelRegistry:
+    """Process-wide registry; a fresh one is built only when config overrides exist."""
+    global _DEFAULT_REGISTRY
+    if overrides:
+        return ModelRegistry(overrides)
+    if _DEFAULT_REGISTRY is None:
+        _DEFAULT_REGISTRY = ModelRegistry()
+    return _DEFAULT_REGISTRY
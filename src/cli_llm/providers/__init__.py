@@ -1,7 +1,25 @@
 """Provider factory utilities."""
 
-from .openai_provider import OpenAIProvider, ProviderError
+from .cache import CacheMiss, CachingProvider, ResponseCache, request_key, with_response_cache
+from .hedging import HedgedProvider, is_failover_error
+from .openai_provider import AsyncOpenAIProvider, OpenAIProvider, ProviderError
 from .router import ProviderRouter
+from .transport import TransportPool, TransportSettings
 from .types import ChatRequest
 
-__all__ = ["ChatRequest", "OpenAIProvider", "ProviderError", "ProviderRouter"]
+__all__ = [
+    "AsyncOpenAIProvider",
+    "CacheMiss",
+    "CachingProvider",
+    "ChatRequest",
+    "HedgedProvider",
+    "OpenAIProvider",
+    "ProviderError",
+    "ProviderRouter",
+    "ResponseCache",
+    "TransportPool",
+    "TransportSettings",
+    "is_failover_error",
+    "request_key",
+    "with_response_cache",
+]
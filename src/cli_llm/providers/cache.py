@@ -0,0 +1,282 @@
+"""Content-addressed on-disk cache for chat completions.
+
+Entries are keyed by a SHA-256 of the canonical request (endpoint, model,
+messages, temperature, response_format, tools, tool_choice) and stored as one
+JSON file each under ``CACHE_DIR/responses``.  Reads bump the file mtime so
+eviction can drop the least recently used entries once the directory grows
+past ``max_bytes``; writes and eviction hold an ``flock`` so concurrent
+``llm`` processes never observe half-written files.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from ..config import CACHE_DIR, AppConfig
+from .openai_provider import ProviderError
+from .types import ChatRequest
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+LOGGER = logging.getLogger("cli_llm")
+
+RESPONSE_CACHE_DIR = CACHE_DIR / "responses"
+DEFAULT_CACHE_TTL = 7 * 24 * 3600.0
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def request_key(request: ChatRequest, endpoint: str) -> str:
+    """Stable hash of everything that influences the model's answer."""
+    payload = {
+        "endpoint": endpoint.rstrip("/"),
+        "model": request.model,
+        "messages": request.messages,
+        "temperature": request.temperature,
+        "response_format": request.response_format,
+        "tools": request.tools or None,
+        "tool_choice": request.tool_choice,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class ResponseCache:
+    """TTL + size-bounded LRU store of completed responses."""
+
+    root: Path = RESPONSE_CACHE_DIR
+    ttl: Optional[float] = DEFAULT_CACHE_TTL
+    max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+
+    @classmethod
+    def from_profile(cls, profile: Mapping[str, Any], root: Optional[Path] = None) -> "ResponseCache":
+        return cls(
+            root=root or RESPONSE_CACHE_DIR,
+            ttl=profile.get("cache_ttl", DEFAULT_CACHE_TTL),
+            max_bytes=profile.get("cache_max_bytes", DEFAULT_CACHE_MAX_BYTES),
+        )
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:  # pragma: no cover - non-POSIX platforms
+            yield
+            return
+        with open(self.root / ".lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            LOGGER.debug("unreadable cache entry %s", path, exc_info=True)
+            return None
+        if self.ttl is not None and time.time() - entry.get("created", 0) > self.ttl:
+            with contextlib.suppress(OSError):
+                path.unlink()
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self._path(key)
+        record = dict(entry, created=time.time())
+        try:
+            with self._locked():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(record, handle, ensure_ascii=False)
+                os.replace(tmp, path)
+                self._evict()
+        except OSError as exc:
+            LOGGER.warning("⚠️ Could not write response cache: %s", exc)
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            with contextlib.suppress(OSError):
+                path.unlink()
+                total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def _replay_chunks(entry: Dict[str, Any]) -> List[Any]:
+    return [
+        SimpleNamespace(
+            model=entry.get("model"),
+            choices=[
+                SimpleNamespace(
+                    delta=SimpleNamespace(content=entry["content"]),
+                    finish_reason=entry.get("finish_reason"),
+                    index=0,
+                )
+            ],
+            usage=None,
+        )
+    ]
+
+
+def _replay_response(entry: Dict[str, Any]) -> Any:
+    usage = entry.get("usage")
+    return SimpleNamespace(
+        model=entry.get("model"),
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(content=entry["content"], tool_calls=None, role="assistant"),
+                finish_reason=entry.get("finish_reason"),
+                index=0,
+            )
+        ],
+        usage=SimpleNamespace(**usage) if usage else None,
+    )
+
+
+@dataclass(slots=True)
+class _ReplayStream:
+    model: Optional[str]
+    chunks: List[Any]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.chunks)
+
+    def close(self) -> None:
+        return None
+
+
+@dataclass(slots=True)
+class _TeeStream:
+    """Pass a live stream through and store it once it finishes cleanly."""
+
+    response: Any
+    cache: ResponseCache
+    key: str
+    model: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.model = getattr(self.response, "model", None) or self.model
+
+    def __iter__(self) -> Iterator[Any]:
+        parts: List[str] = []
+        finish_reason = None
+        for chunk in self.response:
+            self.model = getattr(chunk, "model", None) or self.model
+            if chunk.choices:
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    parts.append(choice.delta.content)
+                finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+            yield chunk
+        self.cache.put(
+            self.key,
+            {"model": self.model, "content": "".join(parts), "finish_reason": finish_reason},
+        )
+
+    def close(self) -> None:
+        close = getattr(self.response, "close", None)
+        if close is not None:
+            close()
+
+
+class CacheMiss(ProviderError):
+    """Raised under ``--cache-only`` when a request has no cached response."""
+
+
+@dataclass(slots=True)
+class CachingProvider:
+    """Serve repeated requests from :class:`ResponseCache`.
+
+    Hits are replayed as synthetic chunks (streamed) or a response object
+    (non-streamed) shaped like the OpenAI SDK's, so renderers cannot tell the
+    difference.  With ``offline`` a miss raises instead of calling the network.
+    """
+
+    inner: Any
+    cache: ResponseCache = field(default_factory=ResponseCache)
+    offline: bool = False
+
+    @property
+    def config(self) -> AppConfig:
+        return self.inner.config
+
+    def create_chat(self, request: ChatRequest) -> Any:
+        key = request_key(request, self.config.api_endpoint)
+        entry = self.cache.get(key)
+        if entry is not None:
+            LOGGER.info("💾 Cache hit %s", key[:12])
+            if request.stream:
+                return _ReplayStream(entry.get("model"), _replay_chunks(entry))
+            return _replay_response(entry)
+        if self.offline:
+            raise CacheMiss(f"no cached response for this request (key {key[:12]}) and --cache-only is set")
+
+        LOGGER.info("💾 Cache miss %s", key[:12])
+        response = self.inner.create_chat(request)
+        if request.stream:
+            return _TeeStream(response, self.cache, key, model=request.model)
+        self._store(key, response)
+        return response
+
+    def _store(self, key: str, response: Any) -> None:
+        choice = response.choices[0]
+        content = choice.message.content
+        if not isinstance(content, str) or getattr(choice.message, "tool_calls", None):
+            return
+        usage = getattr(response, "usage", None)
+        self.cache.put(
+            key,
+            {
+                "model": getattr(response, "model", None),
+                "content": content,
+                "finish_reason": choice.finish_reason,
+                "usage": {
+                    "prompt_tokens": getattr(usage, "prompt_tokens", None),
+                    "completion_tokens": getattr(usage, "completion_tokens", None),
+                }
+                if getattr(usage, "completion_tokens", None) is not None
+                else None,
+            },
+        )
+
+
+def with_response_cache(provider: Any, config: AppConfig, *, enabled: bool = False, offline: bool = False) -> Any:
+    """Wrap ``provider`` when ``--cache``/``--cache-only`` or the active profile ask for it."""
+    profile = config.providers.get(config.provider, {})
+    if not (enabled or offline or profile.get("cache")):
+        return provider
+    return CachingProvider(provider, ResponseCache.from_profile(profile), offline=offline)
@@ -0,0 +1,196 @@
+"""Hedged requests and failover across an ordered list of provider profiles."""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence
+
+from ..utils import lazy_import
+from .openai_provider import OpenAIProvider
+from .types import ChatRequest
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import openai
+else:
+    openai = lazy_import("openai")
+
+LOGGER = logging.getLogger("cli_llm")
+
+
+def is_failover_error(exc: BaseException) -> bool:
+    """Connection failures and 5xx responses justify trying the next provider."""
+    if isinstance(exc, openai.APIConnectionError):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+@dataclass(slots=True)
+class _HedgedStream:
+    """Winner's stream with the chunks consumed while racing replayed first."""
+
+    response: Any
+    buffered: List[Any]
+    rest: Iterator[Any]
+    provider: str
+
+    @property
+    def model(self) -> Optional[str]:
+        return getattr(self.response, "model", None)
+
+    def __iter__(self) -> Iterator[Any]:
+        yield from self.buffered
+        yield from self.rest
+
+    def close(self) -> None:
+        _close(self.response)
+
+
+def _close(response: Any) -> None:
+    close = getattr(response, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:  # pragma: no cover - best effort
+            LOGGER.debug("closing hedged loser failed", exc_info=True)
+
+
+class _Race:
+    """Shared state between the attempt threads and the caller."""
+
+    def __init__(self) -> None:
+        self.events: "queue.Queue[tuple]" = queue.Queue()
+        self.lock = threading.Lock()
+        self.winner: Optional[int] = None
+        self.in_flight: Dict[int, Any] = {}
+
+    def lost(self, index: int) -> bool:
+        return self.winner is not None and self.winner != index
+
+    def register(self, index: int, response: Any) -> bool:
+        """Track an open response so a winner can close it; False if already lost."""
+        with self.lock:
+            if self.lost(index):
+                return False
+            self.in_flight[index] = response
+            return True
+
+    def claim(self, index: int) -> bool:
+        with self.lock:
+            if self.winner is None:
+                self.winner = index
+            return self.winner == index
+
+    def close_losers(self) -> None:
+        """Close every other in-flight response so its connection is released now."""
+        with self.lock:
+            losers = [response for index, response in self.in_flight.items() if index != self.winner]
+            self.in_flight.clear()
+        for response in losers:
+            _close(response)
+
+
+@dataclass(slots=True)
+class HedgedProvider:
+    """Race an ordered chain of providers for the first token.
+
+    The first provider starts immediately.  If it produces no token within
+    ``hedge_after`` seconds the next one is started as a hedge; connection
+    errors and 5xx responses fail over to the next provider at once.  The
+    first attempt to yield content wins and every other in-flight attempt is
+    closed right away, releasing its connection.
+    """
+
+    providers: Sequence[OpenAIProvider]
+    hedge_after: Optional[float] = None
+    config: Any = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.config = self.providers[0].config
+
+    def _request_for(self, index: int, request: ChatRequest) -> ChatRequest:
+        if index == 0:
+            return request
+        # Fallback profiles answer with their own default model.
+        return dataclasses.replace(request, model=self.providers[index].config.default_model)
+
+    def _attempt(self, race: _Race, index: int, request: ChatRequest) -> None:
+        try:
+            response = self.providers[index].create_chat(request)
+            if not race.register(index, response):
+                _close(response)
+                return
+            buffered: List[Any] = []
+            rest: Iterator[Any] = iter(())
+            if request.stream:
+                rest = iter(response)
+                for chunk in rest:
+                    buffered.append(chunk)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        break
+        except Exception as exc:
+            if not race.lost(index):  # a closed loser's error is expected
+                race.events.put(("error", index, exc))
+            return
+        if race.claim(index):
+            race.events.put(("first", index, (response, buffered, rest)))
+            race.close_losers()
+        else:
+            _close(response)
+
+    def create_chat(self, request: ChatRequest) -> Any:
+        race = _Race()
+        pending = 0
+        launched = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal pending, launched
+            index = launched
+            launched += 1
+            pending += 1
+            if index:
+                LOGGER.info("🔀 Starting %s", self.providers[index].config.provider)
+            threading.Thread(
+                target=self._attempt,
+                args=(race, index, self._request_for(index, request)),
+                daemon=True,
+            ).start()
+
+        launch()
+        deadline = None if self.hedge_after is None else time.monotonic() + self.hedge_after
+        while True:
+            can_hedge = launched < len(self.providers)
+            timeout = None
+            if deadline is not None and can_hedge:
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                kind, index, payload = race.events.get(timeout=timeout)
+            except queue.Empty:
+                LOGGER.info("⏱️ No first token after %.2fs; hedging", self.hedge_after)
+                launch()
+                deadline = time.monotonic() + (self.hedge_after or 0.0)
+                continue
+
+            pending -= 1
+            if kind == "first":
+                response, buffered, rest = payload
+                name = self.providers[index].config.provider
+                LOGGER.info("🏁 %s answered first", name)
+                if not request.stream:
+                    return response
+                return _HedgedStream(response, buffered, rest, provider=name)
+
+            last_error = payload
+            LOGGER.warning("⚠️ %s failed: %s", self.providers[index].config.provider, payload)
+            if is_failover_error(payload) and launched < len(self.providers):
+                launch()
+                if deadline is not None:
+                    deadline = time.monotonic() + self.hedge_after
+            elif pending == 0:
+                raise last_error
@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
-import openai
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 from ..config import AppConfig
+from ..utils import lazy_import
+from .transport import TransportPool
 from .types import ChatRequest
 
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import openai
+else:
+    openai = lazy_import("openai")
+
 
 class ProviderError(RuntimeError):
     """Raised when provider initialisation fails."""
@@ -16,16 +22,16 @@ class ProviderError(RuntimeError):
 
 @dataclass(slots=True)
 class OpenAIProvider:
-    """Lazy OpenAI client wrapper."""
+    """Lazy OpenAI client wrapper backed by a shared transport pool."""
 
     config: AppConfig
+    transports: TransportPool = field(default_factory=TransportPool, repr=False)
     _client: Optional[openai.OpenAI] = field(default=None, init=False, repr=False)
 
     def client(self) -> openai.OpenAI:
         if self._client is None:
-            api_key = self.config.resolved_api_key()
             try:
-                self._client = openai.OpenAI(api_key=api_key, base_url=self.config.api_endpoint)
+                self._client = self.transports.client(self.config)
             except Exception as exc:  # pragma: no cover - defensive
                 raise ProviderError(str(exc)) from exc
         return self._client
@@ -35,3 +41,26 @@ class OpenAIProvider:
         return self.client().chat.completions.create(
             **request.to_openai_params(self.config.extra_headers)
         )
+
+
+@dataclass(slots=True)
+class AsyncOpenAIProvider:
+    """Async counterpart of :class:`OpenAIProvider` for event-loop callers."""
+
+    config: AppConfig
+    transports: TransportPool = field(default_factory=TransportPool, repr=False)
+    _client: Optional[openai.AsyncOpenAI] = field(default=None, init=False, repr=False)
+
+    def client(self) -> openai.AsyncOpenAI:
+        if self._client is None:
+            try:
+                self._client = self.transports.async_client(self.config)
+            except Exception as exc:  # pragma: no cover - defensive
+                raise ProviderError(str(exc)) from exc
+        return self._client
+
+    async def create_chat_async(self, request: ChatRequest) -> Any:
+        """Create a chat completion; streamed responses are async iterables."""
+        return await self.client().chat.completions.create(
+            **request.to_openai_params(self.config.extra_headers)
+        )
@@ -2,17 +2,54 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Union
 
-from ..config import AppConfig
-from .openai_provider import OpenAIProvider
+from ..config import DEFAULT_CONFIG_VALUES, AppConfig
+from .hedging import HedgedProvider
+from .openai_provider import AsyncOpenAIProvider, OpenAIProvider
+from .transport import TransportPool
 
 
 @dataclass(slots=True)
 class ProviderRouter:
-    """Resolve the active provider adapter from runtime config."""
+    """Resolve the active provider adapter from runtime config.
+
+    The router owns the transport pool, so every provider it hands out for the
+    same endpoint and key shares one keep-alive HTTP client.
+    """
 
     config: AppConfig
+    transports: TransportPool = field(default_factory=TransportPool)
+
+    def resolve(self) -> Union[OpenAIProvider, HedgedProvider]:
+        """Return the active provider, wrapped for hedging when it has fallbacks."""
+        primary = OpenAIProvider(self.config, transports=self.transports)
+        profile = self.config.providers.get(self.config.provider, {})
+        fallbacks = [
+            name
+            for name in profile.get("fallbacks", [])
+            if name in self.config.providers and name != self.config.provider
+        ]
+        if not fallbacks:
+            return primary
+        chain = [primary] + [
+            OpenAIProvider(self.profile_config(name), transports=self.transports)
+            for name in fallbacks
+        ]
+        return HedgedProvider(chain, hedge_after=profile.get("hedge_after"))
+
+    def profile_config(self, name: str) -> AppConfig:
+        """Config for another declared profile (env/CLI overrides apply to the active one only)."""
+        profile = self.config.providers[name]
+        return dataclasses.replace(
+            self.config,
+            provider=name,
+            api_key=profile.get("api_key"),
+            api_endpoint=profile.get("api_endpoint", DEFAULT_CONFIG_VALUES["api_endpoint"]),
+            default_model=profile.get("default_model", self.config.default_model),
+        )
 
-    def resolve(self) -> OpenAIProvider:
-        return OpenAIProvider(self.config)
+    def resolve_async(self) -> AsyncOpenAIProvider:
+        return AsyncOpenAIProvider(self.config, transports=self.transports)
@@ -0,0 +1,134 @@
+"""Pooled HTTP transports shared across provider adapters."""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Mapping, Optional, Tuple
+
+from ..config import AppConfig, TRANSPORT_PROFILE_KEYS
+from ..utils import lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import httpx
+    import openai
+else:
+    httpx = lazy_import("httpx")
+    openai = lazy_import("openai")
+
+LOGGER = logging.getLogger("cli_llm")
+
+
+@dataclass(frozen=True, slots=True)
+class TransportSettings:
+    """Per-profile connection tuning; ``None`` keeps the OpenAI SDK default."""
+
+    max_connections: Optional[int] = None
+    max_keepalive_connections: Optional[int] = None
+    keepalive_expiry: Optional[float] = None
+    connect_timeout: Optional[float] = None
+    read_timeout: Optional[float] = None
+    http2: bool = False
+
+    @classmethod
+    def from_profile(cls, profile: Mapping[str, Any]) -> "TransportSettings":
+        values = {key: profile[key] for key in TRANSPORT_PROFILE_KEYS if key in profile}
+        return cls(**values)
+
+    def httpx_kwargs(self) -> Dict[str, Any]:
+        limits = openai.DEFAULT_CONNECTION_LIMITS
+        timeout = openai.DEFAULT_TIMEOUT
+        return {
+            "limits": httpx.Limits(
+                max_connections=_pick(self.max_connections, limits.max_connections),
+                max_keepalive_connections=_pick(
+                    self.max_keepalive_connections, limits.max_keepalive_connections
+                ),
+                keepalive_expiry=_pick(self.keepalive_expiry, limits.keepalive_expiry),
+            ),
+            "timeout": httpx.Timeout(
+                connect=_pick(self.connect_timeout, timeout.connect),
+                read=_pick(self.read_timeout, timeout.read),
+                write=timeout.write,
+                pool=timeout.pool,
+            ),
+            "http2": self.http2 and _http2_available(),
+        }
+
+
+def _pick(value: Any, default: Any) -> Any:
+    return default if value is None else value
+
+
+def _http2_available() -> bool:
+    if importlib.util.find_spec("h2") is not None:
+        return True
+    LOGGER.warning("http2 requested but the 'h2' package is missing; using HTTP/1.1")
+    return False
+
+
+class TransportPool:
+    """One keep-alive SDK client per (endpoint, api key), reused across providers."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, str], openai.OpenAI] = {}
+        self._async_clients: Dict[Tuple[str, str], openai.AsyncOpenAI] = {}
+
+    def client(self, config: AppConfig) -> openai.OpenAI:
+        return self._pooled(self._clients, config, self._build_client)
+
+    def async_client(self, config: AppConfig) -> openai.AsyncOpenAI:
+        """Pooled async client; use it from a single event loop."""
+        return self._pooled(self._async_clients, config, self._build_async_client)
+
+    def _pooled(
+        self,
+        clients: Dict[Tuple[str, str], Any],
+        config: AppConfig,
+        build: Callable[[AppConfig, str, TransportSettings], Any],
+    ) -> Any:
+        api_key = config.resolved_api_key()
+        key = (config.api_endpoint, api_key)
+        with self._lock:
+            client = clients.get(key)
+            if client is None:
+                settings = TransportSettings.from_profile(
+                    config.providers.get(config.provider, {})
+                )
+                client = build(config, api_key, settings)
+                clients[key] = client
+            return client
+
+    def _build_client(
+        self, config: AppConfig, api_key: str, settings: TransportSettings
+    ) -> openai.OpenAI:
+        return openai.OpenAI(
+            api_key=api_key,
+            base_url=config.api_endpoint,
+            http_client=openai.DefaultHttpxClient(**settings.httpx_kwargs()),
+        )
+
+    def _build_async_client(
+        self, config: AppConfig, api_key: str, settings: TransportSettings
+    ) -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=config.api_endpoint,
+            http_client=openai.DefaultAsyncHttpxClient(**settings.httpx_kwargs()),
+        )
+
+    def close(self) -> None:
+        """Close the sync clients; async clients are closed with :meth:`aclose`."""
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients, self._async_clients = list(self._async_clients.values()), {}
+        for client in clients:
+            await client.close()
@@ -17,6 +17,7 @@ class ChatRequest:
     tools: Optional[List[Dict[str, Any]]] = None
     tool_choice: Optional[Any] = None
     stream: bool = False
+    include_usage: bool = False
 
     def to_openai_params(self, extra_headers: Dict[str, str]) -> Dict[str, Any]:
         params: Dict[str, Any] = {
@@ -33,4 +34,7 @@ class ChatRequest:
             params["tool_choice"] = self.tool_choice
         if self.stream:
             params["stream"] = True
+            if self.include_usage:
+                # The final chunk then carries authoritative usage (and no choices).
+                params["stream_options"] = {"include_usage": True}
         return params
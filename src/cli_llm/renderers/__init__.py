@@ -1,11 +1,17 @@
 """Response rendering helpers."""
 
+from .events import EventLog
 from .output import (
+    OUTPUT_FORMATS,
     highlight_code_blocks,
+    resolve_output_format,
     ResponseRenderer,
 )
 
 __all__ = [
+    "EventLog",
+    "OUTPUT_FORMATS",
     "ResponseRenderer",
     "highlight_code_blocks",
+    "resolve_output_format",
 ]
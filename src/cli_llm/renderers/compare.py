@@ -0,0 +1,72 @@
+"""Split-pane live view for ``llm compare``."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Sequence
+
+from .output import _get_console
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from ..services.compare import CompareResult
+
+
+def _metrics(result: "CompareResult") -> str:
+    if result.error:
+        return f"error: {result.error}"
+    parts = []
+    if result.ttft is not None:
+        parts.append(f"TTFT {result.ttft:.2f}s")
+    if result.latency is not None:
+        parts.append(f"total {result.latency:.2f}s")
+    if result.tokens_per_second is not None:
+        approx = "~" if result.tokens_estimated else ""
+        parts.append(f"{approx}{result.tokens_per_second:.1f} tok/s")
+    return " · ".join(parts) or "waiting…"
+
+
+class ComparisonView:
+    """Render one pane per comparison target, side by side."""
+
+    def __init__(self, results: Sequence["CompareResult"], refresh_per_second: float = 8.0) -> None:
+        self.results = results
+        self.refresh_per_second = refresh_per_second
+        self.console = _get_console()
+
+    def renderable(self, tail_lines: int = 0) -> Any:
+        from rich.panel import Panel
+        from rich.table import Table
+        from rich.text import Text
+
+        grid = Table.grid(expand=True, padding=(0, 1))
+        for _ in self.results:
+            grid.add_column(ratio=1)
+        panes = []
+        for result in self.results:
+            body = result.content
+            if tail_lines:
+                # Only the tail fits while streaming; the final frame shows everything.
+                body = "\n".join(body.splitlines()[-tail_lines:])
+            panes.append(
+                Panel(
+                    Text(body),
+                    title=result.label,
+                    subtitle=_metrics(result),
+                    border_style="red" if result.error else "blue",
+                )
+            )
+        grid.add_row(*panes)
+        return grid
+
+    def live(self) -> Any:
+        from rich.live import Live
+
+        tail = max(3, self.console.size.height - 4)
+        return Live(
+            get_renderable=lambda: self.renderable(tail_lines=tail),
+            console=self.console,
+            refresh_per_second=self.refresh_per_second,
+            transient=True,
+        )
+
+    def print_final(self) -> None:
+        self.console.print(self.renderable())
@@ -0,0 +1,87 @@
+"""JSONL event stream for ``llm chat --events``.
+
+Every record carries ``event`` and ``t`` (seconds since the request started,
+from ``time.monotonic``).  A streamed request produces::
+
+    request → connected → first_token → delta… → finish → usage → done
+
+with ``error`` replacing the tail when the provider fails.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+
+
+class EventLog:
+    """Write one JSON object per request/stream event."""
+
+    def __init__(self, sink: Optional[TextIO] = None) -> None:
+        self.sink = sink
+        self.started: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+        self.deltas = 0
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, now: Optional[float] = None, **fields: Any) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.started is None:
+                self.started = now
+            record: Dict[str, Any] = {"event": event, "t": round(now - self.started, 6)}
+            record.update(fields)
+            self._write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _write(self, line: str) -> None:
+        if self.sink is not None:
+            self.sink.write(line)
+            self.sink.flush()
+            return
+        buffer = getattr(sys.stdout, "buffer", None)
+        if buffer is None:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            return
+        buffer.write(line.encode("utf-8"))
+        buffer.flush()
+
+    def observe_chunk(self, chunk: Any, now: Optional[float] = None) -> None:
+        """Translate one SDK stream chunk into delta/finish/usage events."""
+        now = time.monotonic() if now is None else now
+        choice = chunk.choices[0] if getattr(chunk, "choices", None) else None
+        content = getattr(getattr(choice, "delta", None), "content", None)
+        if content:
+            if self.first_token_at is None:
+                self.first_token_at = now
+                ttft = None if self.started is None else round(now - self.started, 6)
+                self.emit("first_token", now, ttft=ttft)
+            self.emit("delta", now, index=self.deltas, content=content)
+            self.deltas += 1
+        finish_reason = getattr(choice, "finish_reason", None)
+        if finish_reason:
+            self.emit("finish", now, finish_reason=finish_reason)
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            self.emit("usage", now, **usage_fields(usage))
+
+    def observe_response(self, response: Any) -> None:
+        """Events for a non-streamed completion."""
+        choice = response.choices[0]
+        self.emit("response", model=getattr(response, "model", None), content=choice.message.content)
+        if choice.finish_reason:
+            self.emit("finish", finish_reason=choice.finish_reason)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.emit("usage", **usage_fields(usage))
+
+
+def usage_fields(usage: Any) -> Dict[str, Any]:
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+    }
@@ -0,0 +1,142 @@
+"""Single-pass incremental Markdown rendering for streamed responses.
+
+Finished blocks (text up to a blank line, or a closed code fence) are printed
+once and never touched again; only the trailing open block is re-parsed, and
+only when the live region refreshes, so the cost of a frame tracks the size
+of the block being written rather than the whole response.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from rich.console import Console
+
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+
+DEFAULT_REFRESH_PER_SECOND = 10.0
+
+
+class MarkdownBlockSplitter:
+    """Split a growing Markdown buffer into committed blocks and an open tail."""
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._scanned = 0
+        self._boundary = 0
+        self._fence: Optional[str] = None
+
+    @property
+    def tail(self) -> str:
+        return self._pending
+
+    @property
+    def in_fence(self) -> bool:
+        return self._fence is not None
+
+    def feed(self, text: str) -> Optional[str]:
+        """Append ``text``; return the newly completed blocks, if any."""
+        self._pending += text
+        while True:
+            end = self._pending.find("\n", self._scanned)
+            if end == -1:
+                break
+            line = self._pending[self._scanned : end]
+            self._scanned = end + 1
+            match = _FENCE.match(line)
+            if self._fence is not None:
+                if (
+                    match
+                    and match.group(1)[0] == self._fence[0]
+                    and len(match.group(1)) >= len(self._fence)
+                    and not line.strip()[len(match.group(1)) :]
+                ):
+                    self._fence = None
+                    self._boundary = self._scanned
+            elif match:
+                self._fence = match.group(1)
+            elif not line.strip():
+                self._boundary = self._scanned
+
+        if not self._boundary:
+            return None
+        block = self._pending[: self._boundary]
+        self._pending = self._pending[self._boundary :]
+        self._scanned -= self._boundary
+        self._boundary = 0
+        return block if block.strip() else None
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left (the final block) and reset."""
+        block = self._pending
+        self._pending = ""
+        self._scanned = self._boundary = 0
+        self._fence = None
+        return block if block.strip() else None
+
+
+class LiveMarkdown:
+    """Context manager that renders a Markdown stream block by block.
+
+    On a terminal the open block is shown in a transient ``rich.live.Live``
+    region refreshed at ``refresh_per_second``; committed blocks are printed
+    above it.  A tail taller than the terminal is cut with an ellipsis rather
+    than scrolled, since rich cannot erase lines that have left the screen;
+    the whole block is printed once it is committed.  Off a terminal only
+    committed blocks are printed.
+    """
+
+    def __init__(self, console: Console, refresh_per_second: float = DEFAULT_REFRESH_PER_SECOND) -> None:
+        self.console = console
+        self.refresh_per_second = refresh_per_second
+        self.splitter = MarkdownBlockSplitter()
+        self.blocks_committed = 0
+        self._live: Any = None
+        self._tail_source: Optional[str] = None
+        self._tail_renderable: Any = None
+
+    def _render_tail(self) -> Any:
+        from rich.markdown import Markdown
+
+        tail = self.splitter.tail
+        if tail != self._tail_source:
+            self._tail_source = tail
+            self._tail_renderable = Markdown(tail)
+        return self._tail_renderable
+
+    def _commit(self, block: str) -> None:
+        from rich.markdown import Markdown
+
+        if self.blocks_committed:
+            self.console.print()
+        self.console.print(Markdown(block))
+        self.blocks_committed += 1
+
+    def __enter__(self) -> "LiveMarkdown":
+        if self.console.is_terminal:
+            from rich.live import Live
+
+            self._live = Live(
+                get_renderable=self._render_tail,
+                console=self.console,
+                refresh_per_second=self.refresh_per_second,
+                transient=True,
+                vertical_overflow="ellipsis",
+            )
+            self._live.start()
+        return self
+
+    def update(self, text: str) -> None:
+        block = self.splitter.feed(text)
+        if block is not None:
+            self._commit(block)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
+        block = self.splitter.flush()
+        if block is not None:
+            self._commit(block)
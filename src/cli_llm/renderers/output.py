@@ -2,15 +2,55 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
-
-from rich.console import Console
-from rich.markdown import Markdown
+import json
+import logging
+import sys
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, List, Optional, TextIO
 
 from ..config import AppConfig, TIPF, RSTF
+from .events import EventLog, usage_fields
+from .live_markdown import LiveMarkdown
+from .pipeline import PipelineStats, StreamPipeline
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from rich.console import Console
+
+LOGGER = logging.getLogger("cli_llm")
+
+_console: Optional[Console] = None
+
+
+def _get_console() -> Console:
+    """Create the shared rich console on first use (rich is slow to import)."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+
+OUTPUT_FORMATS = ("raw", "markdown", "plain", "jsonl")
+
+
+def resolve_output_format(requested: Optional[str] = None, stream: Optional[TextIO] = None) -> str:
+    """``auto`` (or nothing) means Markdown on a terminal and raw text otherwise."""
+    if requested and requested != "auto":
+        return requested
+    isatty = getattr(stream or sys.stdout, "isatty", None)
+    return "markdown" if isatty is not None and isatty() else "raw"
+
 
-_console = Console()
+def _write_stdout(text: str) -> None:
+    """Write UTF-8 straight to the buffered binary stdout, bypassing rich."""
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+    buffer.write(text.encode("utf-8"))
+    buffer.flush()
 
 
 def highlight_code_blocks(content: str, session_type: str = "Context") -> str:
@@ -23,21 +63,132 @@ class ResponseRenderer:
     """Stateful renderer that tracks token accumulation for streamed responses."""
 
     app_config: AppConfig
+    output_format: str = "markdown"
+    events: Optional[EventLog] = None
+    stream_stats: Optional[PipelineStats] = field(default=None, init=False)
+
+    @property
+    def decorated(self) -> bool:
+        """Whether status lines and colours belong on stdout (Markdown mode only)."""
+        return self.output_format == "markdown" and self.events is None
 
     def process_streamed_chunk(self, response, count_tokens: bool = False) -> str:
-        """Process a streamed response, returning the concatenated text."""
-        full_content = ""
+        """Render a streamed response incrementally, returning the concatenated text.
+
+        The stream is read on a background thread and written in coalesced
+        frames (see :class:`StreamPipeline`); counters end up in ``stream_stats``.
+        """
+        if self.events is None and self.output_format == "jsonl":
+            return self._stream_jsonl(response)
+        pipeline = StreamPipeline(
+            response,
+            frame_interval=self.app_config.frame_interval,
+            on_chunk=None if self.events is None else self.events.observe_chunk,
+        )
+        self.stream_stats = pipeline.stats
+        parts: List[str] = []
+        if self.events is not None:
+            parts.extend(pipeline.frames())
+        elif self.decorated:
+            with LiveMarkdown(_get_console()) as view:
+                for frame in pipeline.frames():
+                    parts.append(frame)
+                    view.update(frame)
+        else:
+            sys.stdout.flush()
+            for frame in pipeline.frames():
+                parts.append(frame)
+                _write_stdout(frame)
+            self._finish_plain(parts)
+        LOGGER.debug("📺 Stream pipeline: %s", pipeline.stats.summary())
+        return "".join(parts)
+
+    def _finish_plain(self, parts: List[str]) -> None:
+        if self.output_format == "plain" and parts and not parts[-1].endswith("\n"):
+            _write_stdout("\n")
+
+    def _emit_jsonl(self, content: str, model: Any, finish_reason: Any, usage: Any) -> None:
+        record = {
+            "model": model,
+            "content": content,
+            "finish_reason": finish_reason,
+            "usage": None if usage is None else usage_fields(usage),
+        }
+        _write_stdout(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _stream_jsonl(self, response) -> str:
+        parts: List[str] = []
+        model = finish_reason = usage = None
         for chunk in response:
-            content = chunk.choices[0].delta.content if chunk.choices else None
-            if not content:
+            model = getattr(chunk, "model", None) or model
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
                 continue
-            _console.out(content, end="")
-            if count_tokens:
-                full_content += content
-        _console.out("\n")
-        if full_content:
-            _console.print(Markdown(full_content))
-        return full_content
+            choice = chunk.choices[0]
+            finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+            if choice.delta.content:
+                parts.append(choice.delta.content)
+        content = "".join(parts)
+        self._emit_jsonl(content, model or getattr(response, "model", None), finish_reason, usage)
+        return content
+
+    async def aprocess_streamed_chunk(self, response, count_tokens: bool = False) -> str:
+        """Async twin of :meth:`process_streamed_chunk` for ``async for`` streams."""
+        parts: List[str] = []
+        if self.events is not None:
+            async for chunk in response:
+                self.events.observe_chunk(chunk)
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    parts.append(content)
+            return "".join(parts)
+        if not self.decorated:
+            model = finish_reason = usage = None
+            sys.stdout.flush()
+            async for chunk in response:
+                model = getattr(chunk, "model", None) or model
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+                content = chunk.choices[0].delta.content
+                if content:
+                    parts.append(content)
+                    if self.output_format != "jsonl":
+                        _write_stdout(content)
+            if self.output_format == "jsonl":
+                self._emit_jsonl("".join(parts), model, finish_reason, usage)
+            else:
+                self._finish_plain(parts)
+            return "".join(parts)
+        with LiveMarkdown(_get_console()) as view:
+            async for chunk in response:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if not content:
+                    continue
+                parts.append(content)
+                view.update(content)
+        return "".join(parts)
+
+    def _emit_text(self, content: str) -> None:
+        sys.stdout.flush()
+        if self.output_format == "jsonl":
+            self._emit_jsonl(content, None, None, None)
+            return
+        _write_stdout(content)
+        self._finish_plain([content])
+
+    def print_markdown(self, content: str) -> None:
+        """Render a finished answer (e.g. one reused from a cache)."""
+        if self.events is not None:
+            self.events.emit("response", content=content, cached=True)
+            return
+        if not self.decorated:
+            self._emit_text(content)
+            return
+        from rich.markdown import Markdown
+
+        _get_console().print(Markdown(content))
 
     def process_unstreamed_chunk(
         self,
@@ -47,6 +198,21 @@ class ResponseRenderer:
         extra_session_type: Optional[str] = None,
     ) -> str:
         """Process a non-streamed response and print timing info."""
+        if self.events is not None:
+            self.events.observe_response(response)
+            return response.choices[0].message.content or ""
+        if not self.decorated:
+            choice = response.choices[0]
+            content = choice.message.content or ""
+            if self.output_format == "jsonl":
+                self._emit_jsonl(content, response.model, choice.finish_reason, getattr(response, "usage", None))
+            else:
+                self._emit_text(content)
+            return content
+
+        from rich.markdown import Markdown
+
+        console = _get_console()
         choice = response.choices[0]
         modelname = response.model
         finish_reason = choice.finish_reason
@@ -59,8 +225,8 @@ class ResponseRenderer:
         status = finish_reason_map.get(finish_reason, "Unknown")
 
         if extra_session_type == "Reasoning":
-            _console.print(f"{TIPF}@ {modelname} reasoning ========================================={RSTF}")
+            console.print(f"{TIPF}@ {modelname} reasoning ========================================={RSTF}")
 
-        _console.print(Markdown(choice.message.content))
-        _console.print(f"{TIPF}@ {modelname} [{status}] Response time: {response_time:.2f}s:{RSTF}")
+        console.print(Markdown(choice.message.content))
+        console.print(f"{TIPF}@ {modelname} [{status}] Response time: {response_time:.2f}s:{RSTF}")
         return choice.message.content
@@ -0,0 +1,134 @@
+"""Decouple reading a response stream from writing it to the terminal.
+
+A reader thread drains the SDK iterator into a bounded queue as fast as the
+network delivers; the caller's thread pulls from the queue and joins whatever
+deltas arrived since the last frame, writing at most one frame per
+``frame_interval``.  A slow terminal therefore costs a few larger writes
+instead of back-pressuring the HTTP stream one tiny delta at a time.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional
+
+DEFAULT_FRAME_INTERVAL = 0.03
+DEFAULT_QUEUE_SIZE = 4096
+
+_DONE = object()
+
+
+@dataclass(slots=True)
+class PipelineStats:
+    chunks: int = 0
+    frames: int = 0
+    max_queue_depth: int = 0
+
+    def summary(self) -> str:
+        return f"{self.chunks} chunks → {self.frames} frames (max queue depth {self.max_queue_depth})"
+
+
+class _ReaderError:
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class StreamPipeline:
+    """Reader thread + coalescing writer over a chat completion stream."""
+
+    def __init__(
+        self,
+        response: Any,
+        *,
+        frame_interval: float = DEFAULT_FRAME_INTERVAL,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        on_chunk: Optional[Callable[[Any, float], None]] = None,
+    ) -> None:
+        self.response = response
+        self.on_chunk = on_chunk
+        self.frame_interval = max(0.0, frame_interval)
+        self.stats = PipelineStats()
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+        self._stop = threading.Event()
+        self._reader: Optional[threading.Thread] = None
+
+    def _read(self) -> None:
+        try:
+            for chunk in self.response:
+                if self._stop.is_set():
+                    return
+                if self.on_chunk is not None:
+                    # Called on the reader thread so timestamps reflect arrival, not rendering.
+                    self.on_chunk(chunk, time.monotonic())
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if not content:
+                    continue
+                self.stats.chunks += 1
+                self._queue.put(content)
+                depth = self._queue.qsize()
+                if depth > self.stats.max_queue_depth:
+                    self.stats.max_queue_depth = depth
+        except BaseException as exc:  # surfaced on the writer side
+            self._queue.put(_ReaderError(exc))
+        else:
+            self._queue.put(_DONE)
+
+    def frames(self) -> Iterator[str]:
+        """Yield coalesced text frames until the stream ends."""
+        self._reader = threading.Thread(target=self._read, name="cli-llm-stream-reader", daemon=True)
+        self._reader.start()
+        next_frame = 0.0
+        try:
+            while True:
+                item = self._queue.get()
+                delay = next_frame - time.monotonic()
+                if delay > 0 and item is not _DONE:
+                    # Let more deltas pile up instead of writing a frame per token.
+                    time.sleep(delay)
+                parts: List[str] = []
+                finished = False
+                while True:
+                    if item is _DONE:
+                        finished = True
+                        break
+                    if isinstance(item, _ReaderError):
+                        if parts:
+                            self.stats.frames += 1
+                            yield "".join(parts)
+                        raise item.exc
+                    parts.append(item)
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if parts:
+                    self.stats.frames += 1
+                    yield "".join(parts)
+                    next_frame = time.monotonic() + self.frame_interval
+                if finished:
+                    return
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop the reader (e.g. on Ctrl-C) and release the HTTP stream."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        close = getattr(self.response, "close", None)
+        if close is not None and self._reader is not None and self._reader.is_alive():
+            try:
+                close()
+            except Exception:  # pragma: no cover - best effort
+                pass
+        # Unblock a reader waiting on a full queue.
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
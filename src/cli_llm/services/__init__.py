@@ -9,12 +9,15 @@ from .session import (
 )
 
 from .input_handler import read_input
+from .daemon import DaemonProvider, connect_daemon
 
 __all__ = [
     "ChatService",
+    "DaemonProvider",
     "TokenTracker",
     "sanitize_input",
     "ensure_url_parser_ok",
     "sigint_handler",
     "read_input",
+    "connect_daemon",
 ]
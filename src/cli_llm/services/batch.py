@@ -0,0 +1,296 @@
+"""Resumable concurrent batch execution over JSONL prompt files.
+
+Each input line is either ``{"id": ..., "prompt": "..."}`` (optionally with
+``role``/``model``/``temperature``) or a ``ChatRequest``-shaped record with
+``messages``.  Results are appended to an output JSONL keyed by ``id`` and
+every successful id is appended to a checkpoint file, so re-running the same
+command after a crash or Ctrl-C only sends the records that did not finish.
+Failed records are retried on the next run; the last line per ``id`` wins.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO
+
+from ..prompts import SYS_ROLES, SystemPrompt
+from ..providers import ChatRequest
+from .session import sanitize_input
+
+LOGGER = logging.getLogger("cli_llm")
+
+_REQUEST_FIELDS = ("model", "messages", "temperature", "response_format", "tools", "tool_choice")
+
+
+class BatchInputError(ValueError):
+    """Raised when a batch input line cannot be turned into a request."""
+
+
+@dataclass(frozen=True, slots=True)
+class BatchRecord:
+    id: str
+    request: ChatRequest
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@dataclass(slots=True)
+class BatchStats:
+    """Live counters for a batch run."""
+
+    total: int = 0
+    skipped: int = 0
+    done: int = 0
+    failed: int = 0
+    output_tokens: int = 0
+    latencies: List[float] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+
+    def tokens_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.output_tokens / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.done}/{self.total} done, {self.failed} failed"
+            + (f", {self.skipped} resumed" if self.skipped else "")
+            + f" | {self.tokens_per_second():.1f} tok/s"
+            + f" | p50 {_percentile(self.latencies, 0.5):.2f}s"
+            + f" p95 {_percentile(self.latencies, 0.95):.2f}s"
+        )
+
+
+def parse_batch_line(
+    line: str,
+    line_number: int,
+    *,
+    default_model: str,
+    default_role: str,
+    temperature: Optional[float] = None,
+) -> BatchRecord:
+    try:
+        raw = json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise BatchInputError(f"line {line_number}: invalid JSON ({exc})") from exc
+    if isinstance(raw, str):
+        raw = {"prompt": raw}
+    if not isinstance(raw, dict):
+        raise BatchInputError(f"line {line_number}: expected a JSON object")
+
+    record_id = str(raw.get("id", line_number))
+    if "messages" in raw:
+        params = {key: raw[key] for key in _REQUEST_FIELDS if key in raw}
+        params.setdefault("model", default_model)
+        if params.get("temperature") is None and temperature is not None:
+            params["temperature"] = temperature
+        return BatchRecord(record_id, ChatRequest(**params, stream=False))
+
+    prompt = raw.get("prompt")
+    if not isinstance(prompt, str):
+        raise BatchInputError(f"line {line_number}: record needs 'prompt' or 'messages'")
+    role = SYS_ROLES.get(raw.get("role") or default_role) or SYS_ROLES[SystemPrompt.default_role()]
+    chosen_temp = raw.get("temperature")
+    if chosen_temp is None:
+        chosen_temp = temperature
+    return BatchRecord(
+        record_id,
+        ChatRequest(
+            model=raw.get("model") or default_model,
+            messages=[
+                {"role": "system", "content": role.content},
+                {"role": "user", "content": sanitize_input(prompt)},
+            ],
+            temperature=role.temperature if chosen_temp is None else chosen_temp,
+            stream=False,
+        ),
+    )
+
+
+def read_checkpoint(path: Path) -> Set[str]:
+    if not path.exists():
+        return set()
+    with path.open(encoding="utf-8") as handle:
+        return {line.rstrip("\n") for line in handle if line.strip()}
+
+
+class BatchRunner:
+    """Run batch records through an async provider with bounded concurrency."""
+
+    def __init__(
+        self,
+        provider: Any,
+        *,
+        output_path: Path,
+        checkpoint_path: Path,
+        concurrency: int = 8,
+        progress: Optional[TextIO] = None,
+    ) -> None:
+        self.provider = provider
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path
+        self.concurrency = max(1, concurrency)
+        self.progress = progress
+        self.stats = BatchStats()
+
+    async def run(self, records: Iterator[BatchRecord], total: int) -> BatchStats:
+        completed = read_checkpoint(self.checkpoint_path)
+        self.stats = BatchStats(total=total)
+
+        def pending() -> Iterator[BatchRecord]:
+            for record in records:
+                if record.id in completed:
+                    self.stats.skipped += 1
+                    self.stats.done += 1
+                    continue
+                yield record
+
+        queue = pending()
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.output_path.open("a", encoding="utf-8") as output, self.checkpoint_path.open(
+            "a", encoding="utf-8"
+        ) as checkpoint:
+
+            async def worker() -> None:
+                # Workers share one lazy iterator, so at most `concurrency`
+                # records are in flight and the input is never fully loaded.
+                for record in queue:
+                    await self._run_one(record, output, checkpoint)
+
+            workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                self._report(final=True)
+        return self.stats
+
+    async def _run_one(self, record: BatchRecord, output: TextIO, checkpoint: TextIO) -> None:
+        started = time.monotonic()
+        try:
+            response = await self.provider.create_chat_async(record.request)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            LOGGER.error("⚠️ Batch record %s failed: %s", record.id, exc)
+            self.stats.failed += 1
+            self._write(output, {"id": record.id, "status": "error", "error": str(exc)})
+            self._report()
+            return
+
+        latency = time.monotonic() - started
+        usage = getattr(response, "usage", None)
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        choice = response.choices[0]
+        self._write(
+            output,
+            {
+                "id": record.id,
+                "status": "ok",
+                "model": getattr(response, "model", record.request.model),
+                "content": choice.message.content,
+                "finish_reason": choice.finish_reason,
+                "latency": round(latency, 4),
+                "usage": {
+                    "prompt_tokens": getattr(usage, "prompt_tokens", None),
+                    "completion_tokens": completion_tokens,
+                }
+                if usage is not None
+                else None,
+            },
+        )
+        checkpoint.write(record.id + "\n")
+        checkpoint.flush()
+        self.stats.done += 1
+        self.stats.output_tokens += completion_tokens
+        self.stats.latencies.append(latency)
+        self._report()
+
+    @staticmethod
+    def _write(output: TextIO, payload: Dict[str, Any]) -> None:
+        output.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        output.flush()
+
+    def _report(self, final: bool = False) -> None:
+        if self.progress is None:
+            return
+        if final:
+            self.progress.write(("\r" if self.progress.isatty() else "") + self.stats.summary() + "\n")
+        elif self.progress.isatty():
+            self.progress.write("\r" + self.stats.summary())
+        self.progress.flush()
+
+
+def iter_batch_records(
+    path: Path,
+    *,
+    default_model: str,
+    default_role: str,
+    temperature: Optional[float] = None,
+) -> Iterator[BatchRecord]:
+    with path.open(encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if line.strip():
+                yield parse_batch_line(
+                    line,
+                    line_number,
+                    default_model=default_model,
+                    default_role=default_role,
+                    temperature=temperature,
+                )
+
+
+def count_batch_records(path: Path) -> int:
+    with path.open(encoding="utf-8") as handle:
+        return sum(1 for line in handle if line.strip())
+
+
+def run_batch(
+    provider: Any,
+    input_path: Path,
+    *,
+    output_path: Path,
+    checkpoint_path: Path,
+    default_model: str,
+    default_role: str,
+    temperature: Optional[float] = None,
+    concurrency: int = 8,
+    progress: Optional[TextIO] = None,
+) -> BatchStats:
+    """Synchronous entry point used by the CLI."""
+    runner = BatchRunner(
+        provider,
+        output_path=output_path,
+        checkpoint_path=checkpoint_path,
+        concurrency=concurrency,
+        progress=progress,
+    )
+    records = iter_batch_records(
+        input_path,
+        default_model=default_model,
+        default_role=default_role,
+        temperature=temperature,
+    )
+    total = count_batch_records(input_path)
+
+    async def _main() -> BatchStats:
+        try:
+            return await runner.run(records, total)
+        finally:
+            transports = getattr(provider, "transports", None)
+            if transports is not None:
+                await transports.aclose()
+
+    return asyncio.run(_main())
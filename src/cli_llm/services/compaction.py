@@ -0,0 +1,129 @@
+"""Rolling-summary compaction for long ``--session`` conversations.
+
+When the live part of a session (latest summary plus the turns after it)
+grows past ``compact_at`` of the model's context window, ``llm chat`` starts
+``llm session compact NAME`` as a detached process once the answer has been
+printed.  That process folds the previous summary and all but the last
+``keep_turns`` turns into a new summary, ideally with a cheaper
+``compact_model``, and appends it to the log.  Turns added while it runs are
+untouched because a summary only covers messages before its ``through``
+offset.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+from .context_pack import DEFAULT_BUDGET
+from .conversation import Conversation, SessionMessage
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+LOGGER = logging.getLogger("cli_llm")
+
+COMPACT_SYSTEM_PROMPT = (
+    "You maintain the running summary of a long conversation between a user and an assistant. "
+    "Keep decisions, facts, file names, commands, numbers and open questions; drop pleasantries "
+    "and repetition. Write compact Markdown bullet points."
+)
+COMPACT_TEMPLATE = "Previous summary:\n{summary}\n\nConversation since then:\n{turns}\n\nWrite the updated summary."
+
+
+@dataclass(slots=True)
+class CompactionPolicy:
+    compact_at: float = 0.5
+    keep_turns: int = 4
+    model: Optional[str] = None
+    provider: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config: Any) -> "CompactionPolicy":
+        return cls(
+            compact_at=config.session_compact_at,
+            keep_turns=config.session_keep_turns,
+            model=config.session_compact_model,
+            provider=config.session_compact_provider,
+        )
+
+    def due(self, live_tokens: int, context_window: Optional[int]) -> bool:
+        return live_tokens > self.compact_at * (context_window or DEFAULT_BUDGET)
+
+
+@contextlib.contextmanager
+def _exclusive(conversation: Conversation) -> Iterator[bool]:
+    """Yield whether this process won the compaction lock for ``conversation``."""
+    if fcntl is None:  # pragma: no cover - non-POSIX platforms
+        yield True
+        return
+    conversation.path.parent.mkdir(parents=True, exist_ok=True)
+    with open(conversation.path.with_suffix(".compact.lock"), "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def compaction_prompt(summary: Optional[SessionMessage], turns: list) -> str:
+    transcript = "\n\n".join(f"{message.role.upper()}: {message.content}" for message in turns)
+    return COMPACT_TEMPLATE.format(summary=summary.content if summary else "(none)", turns=transcript)
+
+
+def compact(
+    conversation: Conversation,
+    summarize: Callable[[str], str],
+    count: Callable[[str], int],
+    *,
+    keep_turns: int = 4,
+    encoding: Optional[str] = None,
+) -> bool:
+    """Summarize everything but the last ``keep_turns`` turns; ``False`` if nothing was done."""
+    with _exclusive(conversation) as acquired:
+        if not acquired:
+            LOGGER.info("🗜️ Session %s is already being compacted", conversation.name)
+            return False
+        summary, items = conversation.live()
+        user_starts = [index for index, (_, message) in enumerate(items) if message.role == "user"]
+        if len(user_starts) <= max(0, keep_turns):
+            return False
+        cut = user_starts[-keep_turns] if keep_turns > 0 else len(items)
+        through = items[cut][0] if cut < len(items) else conversation.path.stat().st_size
+        older = [message for _, message in items[:cut]]
+        content = summarize(compaction_prompt(summary, older)).strip()
+        if not content:
+            LOGGER.warning("⚠️ Empty summary for session %s; keeping history as is", conversation.name)
+            return False
+        conversation.append(SessionMessage.summary(content, through, count(content), encoding))
+        LOGGER.info("🗜️ Compacted %s messages of session %s", len(older), conversation.name)
+        return True
+
+
+def spawn_compaction(name: str, for_model: str, provider: Optional[str] = None) -> None:
+    """Run ``llm session compact`` in the background, detached from the terminal.
+
+    ``provider`` and ``for_model`` are the chat's own, so the summary is
+    written with them unless ``[sessions]`` names a compaction model.
+    """
+    LOGGER.info("🗜️ Compacting session %s in the background", name)
+    args = [sys.executable, "-m", "cli_llm", "session", "compact", name, "--for-model", for_model]
+    if provider:
+        args += ["--provider", provider]
+    subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
@@ -0,0 +1,126 @@
+"""Concurrent side-by-side comparison of providers and models."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..providers import ChatRequest
+from .session import ChatService
+
+LOGGER = logging.getLogger("cli_llm")
+
+
+def parse_targets(
+    providers_csv: Optional[str], models_csv: Optional[str], active_provider: str
+) -> List[Tuple[str, Optional[str]]]:
+    """Expand ``-p a,b:model`` and ``-m x,y`` into (provider, model) pairs.
+
+    A ``name:model`` entry pins that profile's model; otherwise each provider
+    is paired with every ``-m`` model (or its own default when none is given).
+    """
+    providers = [item.strip() for item in (providers_csv or "").split(",") if item.strip()]
+    models = [item.strip() for item in (models_csv or "").split(",") if item.strip()]
+    targets: List[Tuple[str, Optional[str]]] = []
+    for entry in providers or [active_provider]:
+        name, _, pinned = entry.partition(":")
+        if pinned:
+            targets.append((name, pinned))
+            continue
+        for model in models or [None]:
+            targets.append((name, model))
+    return targets
+
+
+@dataclass(slots=True)
+class CompareResult:
+    """Timings and output for one comparison pane."""
+
+    provider: str
+    model: str
+    content: str = ""
+    started_at: float = field(default_factory=time.monotonic)
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    output_tokens: Optional[int] = None
+    tokens_estimated: bool = False
+    error: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    @property
+    def ttft(self) -> Optional[float]:
+        return None if self.first_token_at is None else self.first_token_at - self.started_at
+
+    @property
+    def latency(self) -> Optional[float]:
+        return None if self.finished_at is None else self.finished_at - self.started_at
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        if not self.output_tokens or self.first_token_at is None or self.finished_at is None:
+            return None
+        generating = self.finished_at - self.first_token_at
+        return self.output_tokens / generating if generating > 0 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "ttft": self.ttft,
+            "latency": self.latency,
+            "output_tokens": self.output_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "tokens_per_second": self.tokens_per_second,
+            "error": self.error,
+            "content": self.content,
+        }
+
+
+async def _stream_one(result: CompareResult, service: ChatService, request: ChatRequest) -> None:
+    result.started_at = time.monotonic()
+    try:
+        response = await service.provider.create_chat_async(request)
+        async for chunk in response:
+            usage = getattr(chunk, "usage", None)
+            if usage is not None and getattr(usage, "completion_tokens", None):
+                result.output_tokens = usage.completion_tokens
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if not content:
+                continue
+            if result.first_token_at is None:
+                result.first_token_at = time.monotonic()
+            result.content += content
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        LOGGER.error("⚠️ compare %s failed: %s", result.label, exc)
+        result.error = str(exc)
+    finally:
+        result.finished_at = time.monotonic()
+
+    if result.output_tokens is None and result.content:
+        result.output_tokens = _estimate_tokens(service, result)
+        result.tokens_estimated = True
+
+
+def _estimate_tokens(service: ChatService, result: CompareResult) -> int:
+    """Tokenize the answer locally, or ~4 bytes per token when the tokenizer cannot load."""
+    try:
+        return service.count_tokens_in_text(result.content, result.model)
+    except Exception as exc:  # tokenizer unavailable (e.g. offline)
+        LOGGER.warning("⚠️ Estimating %s output tokens from size: %s", result.label, exc)
+        return (len(result.content.encode("utf-8")) + 3) // 4
+
+
+async def run_compare(
+    entries: Sequence[Tuple[CompareResult, ChatService, ChatRequest]],
+) -> List[CompareResult]:
+    """Stream every entry concurrently, filling each ``CompareResult`` in place."""
+    await asyncio.gather(*(_stream_one(result, service, request) for result, service, request in entries))
+    return [result for result, _, _ in entries]
@@ -0,0 +1,204 @@
+"""Fit the system role, AGENTS.md, piped stdin and the prompt into a token budget.
+
+Parts are measured with the target model's tokenizer.  Fixed parts (system
+role, prompt) are never trimmed; the others are trimmed lowest priority first
+until the total fits:
+
+* ``markdown`` parts lose whole sections from the end, keeping the preamble;
+* ``log`` parts keep a head and a (larger) tail, replacing the middle with a
+  marker line.
+
+Every trim is recorded in :attr:`PackResult.dropped` so the CLI can say what
+the model did not see.  :func:`size_bound` lets callers skip the tokenizer
+altogether when the byte counts already prove that everything fits.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+from ..models import DEFAULT_ENCODING, ModelInfo, ModelRegistry
+from ..utils import lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import tiktoken
+else:
+    tiktoken = lazy_import("tiktoken")
+
+LOGGER = logging.getLogger("cli_llm")
+
+DEFAULT_BUDGET = 32768
+DEFAULT_AGENTS_BUDGET = 4096
+HEAD_SHARE = 0.25  # log tails usually hold the error, so they get the larger share
+
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+
+@dataclass(slots=True)
+class ContextPart:
+    name: str
+    text: str
+    strategy: str = "fixed"  # fixed | markdown | log
+    priority: int = 0  # lower priorities are trimmed first
+    cap: Optional[int] = None
+    tokens: int = 0
+
+
+@dataclass(slots=True)
+class PackResult:
+    parts: Dict[str, str]
+    tokens: int
+    budget: int
+    dropped: List[str] = field(default_factory=list)
+
+    @property
+    def trimmed(self) -> bool:
+        return bool(self.dropped)
+
+
+def token_counter(model: str, registry: ModelRegistry) -> Callable[[str], int]:
+    """Count with the model's tokenizer, or ~4 bytes per token when it cannot load."""
+    name = registry.get(model).encoding
+    try:
+        try:
+            encoding = tiktoken.get_encoding(name)
+        except (KeyError, ValueError):
+            encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as exc:  # offline and not cached
+        LOGGER.warning("⚠️ Tokenizer %s unavailable (%s); estimating context size", name, exc)
+        return lambda text: (len(text.encode("utf-8")) + 3) // 4
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def size_bound(parts: Sequence[ContextPart], budget: int) -> Optional[int]:
+    """Byte-count upper bound on the parts' tokens, or ``None`` if they may not fit.
+
+    A BPE token is at least one byte, so parts whose sizes are within their
+    caps and ``budget`` fit without being tokenized.
+    """
+    total = 0
+    for part in parts:
+        size = len(part.text.encode("utf-8"))
+        if part.cap is not None and size > part.cap:
+            return None
+        total += size
+    return total if total <= budget else None
+
+
+def default_budget(info: ModelInfo) -> int:
+    """Context window minus room for the answer (capped at a quarter of the window)."""
+    if info.context_window is None:
+        return DEFAULT_BUDGET
+    reserve = min(info.max_output or 4096, info.context_window // 4)
+    return info.context_window - reserve
+
+
+def pack_context(parts: Sequence[ContextPart], budget: int, count: Callable[[str], int]) -> PackResult:
+    dropped: List[str] = []
+    for part in parts:
+        part.tokens = count(part.text) if part.text else 0
+    for part in parts:
+        if part.cap is not None and part.tokens > part.cap:
+            _trim(part, part.cap, count, dropped)
+
+    overflow = sum(part.tokens for part in parts) - budget
+    for part in sorted((p for p in parts if p.strategy != "fixed"), key=lambda p: p.priority):
+        if overflow <= 0:
+            break
+        before = part.tokens
+        _trim(part, max(0, part.tokens - overflow), count, dropped)
+        overflow -= before - part.tokens
+
+    total = sum(part.tokens for part in parts)
+    if dropped:
+        LOGGER.info("✂️ Packed context to %s/%s tokens: %s", total, budget, "; ".join(dropped))
+    return PackResult({part.name: part.text for part in parts}, total, budget, dropped)
+
+
+def _trim(part: ContextPart, target: int, count: Callable[[str], int], dropped: List[str]) -> None:
+    before = part.tokens
+    if target <= 0:
+        part.text, part.tokens = "", 0
+        dropped.append(f"{part.name}: dropped entirely ({before:,} tokens)")
+        return
+    if part.strategy == "markdown":
+        note = _drop_sections(part, target, count)
+    elif part.strategy == "log":
+        note = _keep_head_tail(part, target, count)
+    else:
+        return
+    part.tokens = count(part.text) if part.text else 0
+    dropped.append(f"{part.name}: {note} ({before:,} → {part.tokens:,} tokens)")
+
+
+def _sections(text: str) -> List[str]:
+    sections: List[str] = []
+    current: List[str] = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and _HEADING_RE.match(line) and current:
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
+def _section_title(section: str) -> str:
+    first = section.lstrip("\n").split("\n", 1)[0]
+    return first.lstrip("#").strip() or "preamble"
+
+
+def _drop_sections(part: ContextPart, target: int, count: Callable[[str], int]) -> str:
+    sections = _sections(part.text)
+    sizes = [count(section) for section in sections]
+    kept = len(sections)
+    while kept > 1 and sum(sizes[:kept]) > target:
+        kept -= 1
+    removed = [_section_title(section) for section in sections[kept:]]
+    part.text = "".join(sections[:kept])
+    if sizes[0] > target and kept == 1:
+        # Even the first section is too big: fall back to keeping its head.
+        part.tokens = sizes[0]
+        _keep_lines(part, target, count, head_share=1.0)
+        return f"dropped {len(removed)} of {len(sections)} sections and cut the first"
+    return f"dropped {len(removed)} of {len(sections)} sections ({', '.join(removed)})"
+
+
+def _keep_head_tail(part: ContextPart, target: int, count: Callable[[str], int]) -> str:
+    total_lines, head, tail = _keep_lines(part, target, count, head_share=HEAD_SHARE)
+    return f"kept first {head:,} and last {tail:,} of {total_lines:,} lines"
+
+
+def _keep_lines(part: ContextPart, target: int, count: Callable[[str], int], head_share: float) -> tuple:
+    lines = part.text.splitlines(keepends=True)
+    sizes = [count(line) for line in lines]
+    marker_cost = 12
+    available = max(0, target - marker_cost)
+
+    head = used = 0
+    head_budget = int(available * head_share)
+    while head < len(lines) and used + sizes[head] <= head_budget:
+        used += sizes[head]
+        head += 1
+    tail = 0
+    while tail < len(lines) - head and used + sizes[len(lines) - 1 - tail] <= available:
+        used += sizes[len(lines) - 1 - tail]
+        tail += 1
+
+    omitted = len(lines) - head - tail
+    if head == tail == 0 and lines:
+        # A single enormous line (minified JSON, base64): keep a proportional prefix.
+        text = part.text
+        part.text = text[: len(text) * available // max(1, part.tokens)] + "\n[… truncated …]\n"
+        return len(lines), 0, 0
+    marker = f"[… {omitted:,} lines omitted …]\n" if omitted else ""
+    part.text = "".join(lines[:head]) + marker + "".join(lines[len(lines) - tail:])
+    return len(lines), head, tail
@@ -0,0 +1,298 @@
+"""Named multi-turn sessions stored as append-only JSONL logs.
+
+Each line is one message ``{"role", "content", "tokens", "encoding", "t"}``.
+Appends are a single ``O_APPEND`` write of whole lines under an ``flock`` and
+are fsynced, so a crash can at worst leave a torn final line; readers skip it
+and the next append trims it first.  Token counts are stored with the
+encoding they were measured in, so budget checks on resume never re-tokenize
+old turns.  Loading reads the file backwards and stops once the token window
+is full, so resuming a session with hundreds of turns costs only the turns
+that are actually sent.
+
+Compaction (see :mod:`.compaction`) appends a ``{"kind": "summary",
+"through": <offset>}`` record: it stands in for every message that starts
+before byte ``through``, so the log itself is never rewritten.  A small
+``NAME.idx`` sidecar, updated under the same lock as the log, remembers where
+the latest summary record starts and keeps a running total of the live
+tokens, so neither a resume nor the per-turn compaction check scans the log.
+The sidecar also records the log size it matches; when a crash leaves the
+two out of step, the next append rebuilds it.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+LOGGER = logging.getLogger("cli_llm")
+
+SESSIONS_DIR = DATA_DIR / "sessions"
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+SESSION_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+_BLOCK = 64 * 1024
+
+
+@dataclass(slots=True)
+class SessionMessage:
+    role: str
+    content: str
+    tokens: int = 0
+    encoding: Optional[str] = None
+    t: float = 0.0
+    through: Optional[int] = None  # set on summaries only
+
+    @property
+    def is_summary(self) -> bool:
+        return self.through is not None
+
+    def to_message(self) -> Dict[str, str]:
+        if self.is_summary:
+            return {"role": "system", "content": SUMMARY_PREFIX + self.content}
+        return {"role": self.role, "content": self.content}
+
+    def to_record(self) -> Dict[str, Any]:
+        record = {"role": self.role, "content": self.content, "tokens": self.tokens, "encoding": self.encoding, "t": self.t}
+        if self.is_summary:
+            record.update(kind="summary", through=self.through)
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "SessionMessage":
+        return cls(
+            role=record["role"],
+            content=record["content"],
+            tokens=int(record.get("tokens") or 0),
+            encoding=record.get("encoding"),
+            t=float(record.get("t") or 0.0),
+            through=int(record["through"]) if record.get("kind") == "summary" else None,
+        )
+
+    @classmethod
+    def summary(cls, content: str, through: int, tokens: int, encoding: Optional[str]) -> "SessionMessage":
+        return cls("system", content, tokens, encoding, through=through)
+
+
+class Conversation:
+    """One named session log."""
+
+    def __init__(self, name: str, root: Path = SESSIONS_DIR) -> None:
+        if not SESSION_NAME_RE.match(name):
+            raise ValueError(f"invalid session name {name!r}: use letters, digits, '.', '_' or '-'")
+        self.name = name
+        self.path = root / f"{name}.jsonl"
+        self.index_path = root / f"{name}.idx"
+
+    @contextlib.contextmanager
+    def _locked(self, handle: int) -> Iterator[None]:
+        if fcntl is None:  # pragma: no cover - non-POSIX platforms
+            yield
+            return
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def append(self, *messages: SessionMessage) -> None:
+        """Durably append ``messages`` in one write."""
+        now = time.time()
+        lines = [
+            (json.dumps(dict(message.to_record(), t=message.t or now), ensure_ascii=False) + "\n").encode("utf-8")
+            for message in messages
+        ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            with self._locked(fd):
+                self._repair_torn_tail(fd)
+                size = os.fstat(fd).st_size
+                index = self._read_index()
+                payload = b"".join(lines)
+                os.write(fd, payload)
+                os.fsync(fd)
+                if index.get("size") == size and "live_tokens" in index and not any(m.is_summary for m in messages):
+                    index["live_tokens"] += sum(message.tokens for message in messages)
+                    index["size"] = size + len(payload)
+                else:
+                    # A new summary resets the live total; rebuilding reads only the live part.
+                    index = self._rebuild_index(size + len(payload))
+                self._write_index(index)
+        finally:
+            os.close(fd)
+
+    def _read_index(self) -> Dict[str, Any]:
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return index if isinstance(index, dict) else {}
+
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        # Only a hint: a stale sidecar is detected by its size and rebuilt.
+        scratch = self.index_path.with_name(self.index_path.name + ".tmp")
+        scratch.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(scratch, self.index_path)
+
+    def _rebuild_index(self, size: int) -> Dict[str, Any]:
+        """Re-derive the sidecar from the log; scans it whole when nothing was compacted."""
+        index: Dict[str, Any] = {"size": size}
+        latest: Optional[SessionMessage] = None
+        live = 0
+        for offset, message in self._reverse_records():
+            if latest is not None and offset < latest.through:
+                break
+            if message.is_summary:
+                if latest is None:
+                    latest = message
+                    index["summary"] = offset
+                    live += message.tokens
+                continue
+            live += message.tokens
+        index["live_tokens"] = live
+        return index
+
+    def latest_summary(self) -> Optional[SessionMessage]:
+        """The summary record the sidecar points at, read with one seek."""
+        offset = self._read_index().get("summary")
+        if not isinstance(offset, int):
+            return None
+        try:
+            with self.path.open("rb") as handle:
+                handle.seek(offset)
+                message = _parse(handle.readline())
+        except OSError:
+            return None
+        return message if message is not None and message.is_summary else None
+
+    @staticmethod
+    def _repair_torn_tail(fd: int) -> None:
+        size = os.fstat(fd).st_size
+        if size == 0 or os.pread(fd, 1, size - 1) == b"\n":
+            return
+        # Drop the partial line left by an interrupted write.
+        offset = size
+        while offset > 0:
+            start = max(0, offset - _BLOCK)
+            cut = os.pread(fd, offset - start, start).rfind(b"\n")
+            if cut != -1:
+                os.ftruncate(fd, start + cut + 1)
+                return
+            offset = start
+        os.ftruncate(fd, 0)
+
+    def _reverse_records(self) -> Iterator[Tuple[int, SessionMessage]]:
+        """Yield ``(byte offset, message)`` from the newest record backwards."""
+        try:
+            handle = self.path.open("rb")
+        except FileNotFoundError:
+            return
+        with handle:
+            handle.seek(0, os.SEEK_END)
+            offset = handle.tell()
+            remainder = b""
+            torn = True  # the bytes after the final newline are never a complete record
+            while offset > 0:
+                start = max(0, offset - _BLOCK)
+                handle.seek(start)
+                block = handle.read(offset - start) + remainder
+                offset = start
+                lines = block.split(b"\n")
+                remainder = lines.pop(0)
+                position = start + len(block)
+                for line in reversed(lines):
+                    position -= len(line) + 1
+                    if torn:
+                        torn = False
+                        continue
+                    message = _parse(line)
+                    if message is not None:
+                        yield position + 1, message
+            if remainder and not torn:
+                message = _parse(remainder)
+                if message is not None:
+                    yield 0, message
+
+    def live(self) -> Tuple[Optional[SessionMessage], List[Tuple[int, SessionMessage]]]:
+        """The latest summary and, oldest first, the messages it does not cover."""
+        summary: Optional[SessionMessage] = None
+        items: List[Tuple[int, SessionMessage]] = []
+        for offset, message in self._reverse_records():
+            if summary is not None and offset < summary.through:
+                break
+            if message.is_summary:
+                summary = summary or message
+                continue
+            items.append((offset, message))
+        items.reverse()
+        return summary, items
+
+    def live_tokens(self) -> int:
+        """Tokens of the latest summary plus the messages it does not cover."""
+        index = self._read_index()
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+        if index.get("size") == size and isinstance(index.get("live_tokens"), int):
+            return index["live_tokens"]
+        summary, items = self.live()  # sidecar missing or stale: count the slow way
+        return (summary.tokens if summary else 0) + sum(message.tokens for _, message in items)
+
+    def window(self, budget: int) -> List[SessionMessage]:
+        """The latest summary plus the most recent whole turns that fit ``budget``.
+
+        Messages measured with a different encoding are costed at their stored
+        count anyway; the pre-flight check still guards the real limit.
+        """
+        latest = self.latest_summary()
+        # The summary outranks the oldest verbatim turns, so its cost is reserved first.
+        summary = latest if latest is not None and latest.tokens + 4 <= budget else None
+        remaining = budget - (summary.tokens + 4 if summary is not None else 0)
+        picked: List[SessionMessage] = []
+        for offset, message in self._reverse_records():
+            if latest is not None and offset < latest.through:
+                break
+            if message.is_summary:
+                continue
+            remaining -= message.tokens + 4
+            if remaining < 0:
+                break
+            picked.append(message)
+        picked.reverse()
+        while picked and picked[0].role != "user":
+            picked.pop(0)
+        if summary is not None:
+            picked.insert(0, summary)
+        return picked
+
+    def messages(self) -> List[SessionMessage]:
+        """Every record in order, summaries included; reads the whole log."""
+        return [message for _, message in reversed(list(self._reverse_records()))]
+
+
+def _parse(line: bytes) -> Optional[SessionMessage]:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        LOGGER.warning("⚠️ Skipping unreadable session record")
+        return None
+    if not isinstance(record, dict) or "role" not in record or "content" not in record:
+        return None
+    return SessionMessage.from_record(record)
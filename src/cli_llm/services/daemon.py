@@ -0,0 +1,330 @@
+"""Opt-in warm daemon that keeps provider clients alive between invocations.
+
+``llm daemon start`` launches a background process listening on a Unix
+socket.  ``llm chat`` probes the socket and, when a daemon answers, swaps the
+in-process provider for :class:`DaemonProvider`, which forwards the
+``ChatRequest`` and replays streamed deltas as SDK-shaped chunks so the
+renderer and ``ChatService`` stay unchanged.  Without a daemon the CLI keeps
+executing in-process.
+
+Wire format: one JSON object per line in each direction.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple, Union
+
+from ..config import AppConfig, ConfigLoader
+from ..providers import (
+    ChatRequest,
+    HedgedProvider,
+    OpenAIProvider,
+    ProviderError,
+    ProviderRouter,
+    TransportPool,
+)
+
+LOGGER = logging.getLogger("cli_llm")
+
+_RUNTIME_DIR = Path(os.environ.get("XDG_RUNTIME_DIR") or Path.home() / ".cli-llm")
+DAEMON_SOCKET_PATH = Path(
+    os.environ.get("CLI_LLM_DAEMON_SOCKET", _RUNTIME_DIR / "cli-llm-daemon.sock")
+)
+PROBE_TIMEOUT = 0.2
+
+
+def _send(stream: Any, payload: Mapping[str, Any]) -> None:
+    stream.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+def _plain(value: Any) -> Any:
+    """Convert SDK pydantic objects (usage, etc.) into JSON-friendly data."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, Mapping):
+        return {key: _plain(item) for key, item in value.items()}
+    return vars(value) if hasattr(value, "__dict__") else str(value)
+
+
+# ── server ───────────────────────────────────────────────────
+
+
+class _WarmState:
+    """Config loader plus the pooled transports, shared by handlers."""
+
+    def __init__(self, loader: ConfigLoader) -> None:
+        self.loader = loader
+        self.transports = TransportPool()
+        self._lock = threading.Lock()
+
+    def resolve(
+        self, overrides: Mapping[str, Any], environment: Mapping[str, str]
+    ) -> Union[OpenAIProvider, HedgedProvider]:
+        with self._lock:
+            # ConfigLoader only re-parses the TOML file when its mtime changes.
+            config = self.loader.load(cli_overrides=overrides, environment=environment)
+        provider = ProviderRouter(config, transports=self.transports).resolve()
+        for member in getattr(provider, "providers", [provider]):
+            member.client()
+        return provider
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_UnixServer"
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as exc:
+            _send(self.wfile, {"error": f"Malformed daemon request: {exc}"})
+            return
+
+        op = message.get("op")
+        if op == "ping":
+            _send(self.wfile, {"ok": True, "pid": os.getpid()})
+        elif op == "shutdown":
+            _send(self.wfile, {"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        elif op == "chat":
+            self._chat(message)
+        else:
+            _send(self.wfile, {"error": f"Unknown daemon op: {op!r}"})
+
+    def _chat(self, message: Mapping[str, Any]) -> None:
+        try:
+            provider = self.server.state.resolve(
+                message.get("overrides") or {}, message.get("env") or {}
+            )
+            request = ChatRequest(**message["request"])
+            response = provider.create_chat(request)
+        except Exception as exc:
+            LOGGER.error("⚠️ Daemon provider error: %s", exc, exc_info=True)
+            _send(self.wfile, {"error": str(exc)})
+            return
+
+        if not request.stream:
+            choice = response.choices[0]
+            _send(
+                self.wfile,
+                {
+                    "model": response.model,
+                    "content": choice.message.content,
+                    "finish_reason": choice.finish_reason,
+                    "usage": _plain(getattr(response, "usage", None)),
+                    "done": True,
+                },
+            )
+            return
+
+        try:
+            for chunk in response:
+                frame: Dict[str, Any] = {"model": getattr(chunk, "model", None)}
+                if chunk.choices:
+                    choice = chunk.choices[0]
+                    frame["delta"] = choice.delta.content
+                    frame["finish_reason"] = choice.finish_reason
+                usage = getattr(chunk, "usage", None)
+                if usage is not None:
+                    frame["usage"] = _plain(usage)
+                _send(self.wfile, frame)
+            _send(self.wfile, {"done": True})
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away (Ctrl-C); stop pulling tokens from upstream.
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+        except Exception as exc:
+            LOGGER.error("⚠️ Daemon stream error: %s", exc, exc_info=True)
+            _send(self.wfile, {"error": str(exc)})
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Path, state: _WarmState) -> None:
+        self.state = state
+        super().__init__(str(path), _Handler)
+
+
+def serve(
+    loader: Optional[ConfigLoader] = None,
+    socket_path: Path = DAEMON_SOCKET_PATH,
+) -> None:
+    """Run the daemon in the foreground until ``shutdown`` is requested."""
+    if ping(socket_path) is not None:
+        raise RuntimeError(f"A daemon is already listening on {socket_path}.")
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        socket_path.unlink()  # stale socket from a crashed daemon
+
+    state = _WarmState(loader or ConfigLoader())
+    # Build the default profile's client up front so the first chat is warm.
+    state.resolve({}, dict(os.environ))
+
+    old_umask = os.umask(0o177)
+    try:
+        server = _UnixServer(socket_path, state)
+    finally:
+        os.umask(old_umask)
+    LOGGER.info("Daemon listening on %s", socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        state.transports.close()
+        if socket_path.exists():
+            socket_path.unlink()
+
+
+# ── client ───────────────────────────────────────────────────
+
+
+def _request(
+    socket_path: Path, payload: Mapping[str, Any], timeout: Optional[float] = None
+) -> Tuple[socket.socket, Any]:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+        stream = sock.makefile("rwb")
+        _send(stream, payload)
+    except OSError:
+        sock.close()
+        raise
+    return sock, stream
+
+
+def ping(socket_path: Path = DAEMON_SOCKET_PATH) -> Optional[Dict[str, Any]]:
+    """Return the daemon's status frame, or ``None`` when nobody is listening."""
+    if not socket_path.exists():
+        return None
+    try:
+        sock, stream = _request(socket_path, {"op": "ping"}, timeout=PROBE_TIMEOUT)
+    except OSError:
+        return None
+    with sock, stream:
+        try:
+            line = stream.readline()
+        except OSError:
+            return None
+    return json.loads(line) if line else None
+
+
+def shutdown(socket_path: Path = DAEMON_SOCKET_PATH) -> bool:
+    """Ask a running daemon to exit; returns ``False`` if none was running."""
+    if ping(socket_path) is None:
+        return False
+    sock, stream = _request(socket_path, {"op": "shutdown"}, timeout=PROBE_TIMEOUT)
+    with sock, stream:
+        stream.readline()
+    return True
+
+
+@dataclass(slots=True)
+class _DaemonStream:
+    """Iterable of SDK-shaped chunks replayed from daemon frames."""
+
+    sock: socket.socket
+    stream: Any
+    model: Optional[str] = None
+
+    def __iter__(self) -> Iterator[SimpleNamespace]:
+        with self.sock, self.stream:
+            for line in self.stream:
+                frame = json.loads(line)
+                if "error" in frame:
+                    raise ProviderError(frame["error"])
+                if frame.get("done"):
+                    return
+                self.model = frame.get("model") or self.model
+                choices = []
+                if "delta" in frame:
+                    choices.append(
+                        SimpleNamespace(
+                            delta=SimpleNamespace(content=frame["delta"]),
+                            finish_reason=frame.get("finish_reason"),
+                        )
+                    )
+                usage = frame.get("usage")
+                yield SimpleNamespace(
+                    model=self.model,
+                    choices=choices,
+                    usage=SimpleNamespace(**usage) if usage else None,
+                )
+        raise ProviderError("Daemon closed the stream unexpectedly.")
+
+
+@dataclass(slots=True)
+class DaemonProvider:
+    """Provider adapter that forwards requests to the warm daemon."""
+
+    config: AppConfig
+    socket_path: Path = DAEMON_SOCKET_PATH
+    environment: Mapping[str, str] = field(default_factory=lambda: os.environ)
+
+    def create_chat(self, request: ChatRequest) -> Any:
+        payload = {
+            "op": "chat",
+            "overrides": {
+                "provider": self.config.provider,
+                "default_model": self.config.default_model,
+            },
+            "env": {
+                key: self.environment[key]
+                for key in ConfigLoader.env_key_map
+                if self.environment.get(key)
+            },
+            "request": asdict(request),
+        }
+        try:
+            sock, stream = _request(self.socket_path, payload)
+        except OSError as exc:
+            raise ProviderError(f"Daemon unavailable: {exc}") from exc
+
+        if request.stream:
+            return _DaemonStream(sock, stream)
+
+        with sock, stream:
+            line = stream.readline()
+        if not line:
+            raise ProviderError("Daemon closed the connection unexpectedly.")
+        frame = json.loads(line)
+        if "error" in frame:
+            raise ProviderError(frame["error"])
+        usage = frame.get("usage")
+        return SimpleNamespace(
+            model=frame.get("model"),
+            usage=SimpleNamespace(**usage) if usage else None,
+            choices=[
+                SimpleNamespace(
+                    finish_reason=frame.get("finish_reason"),
+                    message=SimpleNamespace(content=frame.get("content")),
+                )
+            ],
+        )
+
+
+def connect_daemon(
+    config: AppConfig, socket_path: Path = DAEMON_SOCKET_PATH
+) -> Optional[DaemonProvider]:
+    """Return a :class:`DaemonProvider` when a daemon answers, else ``None``."""
+    if os.environ.get("CLI_LLM_NO_DAEMON"):
+        return None
+    if ping(socket_path) is None:
+        return None
+    return DaemonProvider(config, socket_path=socket_path)
@@ -13,45 +13,73 @@ import os
 import subprocess
 import sys
 import tempfile
-from pathlib import Path
+from functools import partial
+from typing import TYPE_CHECKING, Optional
 
-from prompt_toolkit import PromptSession
-from prompt_toolkit.formatted_text import ANSI as ANSIFormattedText
-from prompt_toolkit.history import FileHistory
-from prompt_toolkit.key_binding import KeyBindings, KeyPressEvent
-from prompt_toolkit.keys import Keys
+from ..config import CACHE_DIR
 
-CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "cli-llm"
-HISTORY_PATH = CACHE_DIR / "chat_history"
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from prompt_toolkit.completion import Completer
+    from prompt_toolkit.key_binding import KeyBindings, KeyPressEvent
 
 # ── key bindings (shared by prompt mode) ─────────────────────
 
-_bindings = KeyBindings()
 
-
-@_bindings.add(Keys.Enter)
 def _submit(event: KeyPressEvent) -> None:
     """Submit the current buffer."""
     event.current_buffer.validate_and_handle()
 
 
-@_bindings.add(Keys.Escape, Keys.Enter)
 def _newline_meta(event: KeyPressEvent) -> None:
     """Insert newline (Meta+Enter / Esc+Enter)."""
     event.current_buffer.insert_text("\n")
 
 
+def _search_history(completer: Completer, event: KeyPressEvent) -> None:
+    """Pick from every indexed prompt containing the typed text (Ctrl+R).
+
+    The matches are placed in the buffer's completion menu directly, so the
+    session itself keeps no completer and Tab is left alone.
+    """
+    from prompt_toolkit.buffer import CompletionState
+    from prompt_toolkit.completion import CompleteEvent
+
+    buffer = event.current_buffer
+    completions = list(completer.get_completions(buffer.document, CompleteEvent(completion_requested=True)))
+    if completions:
+        buffer.complete_state = CompletionState(original_document=buffer.document, completions=completions)
+
+
+def _build_bindings(history_completer: Optional[Completer] = None) -> KeyBindings:
+    """Bind the prompt-mode keys; prompt_toolkit is imported only when needed."""
+    from prompt_toolkit.key_binding import KeyBindings
+    from prompt_toolkit.keys import Keys
+
+    bindings = KeyBindings()
+    bindings.add(Keys.Enter)(_submit)
+    bindings.add(Keys.Escape, Keys.Enter)(_newline_meta)
+    if history_completer is not None:
+        bindings.add(Keys.ControlR)(partial(_search_history, history_completer))
+    return bindings
+
+
 # ── mode 1: prompt_toolkit (default) ─────────────────────────
 
 
 def _read_promptkit(prompt_text: str) -> str:
     """Rich terminal input via prompt_toolkit (raw mode, history, line‑editing)."""
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.formatted_text import ANSI as ANSIFormattedText
+    from prompt_toolkit.history import ThreadedHistory
+
+    from .prompt_history import HistorySearchCompleter, PromptHistory
+
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    history = FileHistory(str(HISTORY_PATH))
+    history = PromptHistory()
 
     session: PromptSession = PromptSession(
-        history=history,
-        key_bindings=_bindings,
+        history=ThreadedHistory(history),  # the prompt appears before history is read
+        key_bindings=_build_bindings(HistorySearchCompleter(history)),
         multiline=False,  # Enter submits; Alt+Enter → newline
         enable_history_search=True,
     )
@@ -0,0 +1,206 @@
+"""Unix-filter map mode: one model response per stdin line.
+
+Lines are read lazily and sent with at most ``concurrency`` requests in
+flight.  In ordered mode a bounded window of pending results (``window``
+lines) keeps output aligned with input without buffering the whole stream;
+``ordered=False`` prints each answer as soon as it arrives.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TextIO, Tuple, Union
+
+from ..providers import ChatRequest
+from .session import sanitize_input
+
+LOGGER = logging.getLogger("cli_llm")
+
+LINE_PLACEHOLDER = "{line}"
+
+
+@dataclass(slots=True)
+class MapStats:
+    lines: int = 0
+    failed: int = 0
+
+
+def render_template(template: str, line: str) -> str:
+    """Substitute ``{line}``; without a placeholder the line is appended."""
+    if LINE_PLACEHOLDER in template:
+        return template.replace(LINE_PLACEHOLDER, line)
+    return f"{template}\n{line}" if template else line
+
+
+def _one_line(text: Optional[str]) -> str:
+    return " ".join((text or "").split())
+
+
+_Incoming = Union[str, BaseException, None]
+
+
+def _pump(source: TextIO, queue: "asyncio.Queue[_Incoming]", loop: asyncio.AbstractEventLoop) -> None:
+    """Feed ``source`` lines into ``queue``; always ends with ``None`` or the read error."""
+    end: _Incoming = None
+    try:
+        for line in iter(source.readline, ""):
+            asyncio.run_coroutine_threadsafe(queue.put(line), loop).result()
+    except BaseException as exc:  # handed to the consumer, which re-raises it
+        end = exc
+    finally:
+        try:
+            asyncio.run_coroutine_threadsafe(queue.put(end), loop)
+        except RuntimeError:  # loop closed (cancelled run); nobody is waiting
+            pass
+
+
+async def run_map(
+    provider: Any,
+    build_request: Callable[[str], ChatRequest],
+    template: str,
+    source: TextIO,
+    sink: TextIO,
+    errors: TextIO,
+    *,
+    concurrency: int = 4,
+    window: Optional[int] = None,
+    ordered: bool = True,
+) -> MapStats:
+    """Map every line of ``source`` through the provider and write to ``sink``.
+
+    ``build_request`` turns a rendered prompt into a ``ChatRequest`` (normally
+    :meth:`ChatService.build_request`).  Failed lines print an empty output
+    line (ordered mode) and a message on ``errors``.
+    """
+    stats = MapStats()
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def ask(number: int, line: str) -> Tuple[int, Optional[str]]:
+        try:
+            prompt = sanitize_input(render_template(template, line))
+            response = await provider.create_chat_async(build_request(prompt))
+            return number, _one_line(response.choices[0].message.content)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            LOGGER.error("⚠️ map line %s failed: %s", number, exc)
+            errors.write(f"line {number}: {exc}\n")
+            errors.flush()
+            stats.failed += 1
+            return number, None
+        finally:
+            slots.release()
+
+    def emit(text: Optional[str]) -> None:
+        if text is None and not ordered:
+            return
+        sink.write((text or "") + "\n")
+        sink.flush()
+
+    loop = asyncio.get_running_loop()
+    incoming: "asyncio.Queue[_Incoming]" = asyncio.Queue(maxsize=max(1, concurrency))
+    # A daemon thread does the blocking reads so Ctrl-C never waits on stdin.
+    threading.Thread(target=_pump, args=(source, incoming, loop), daemon=True).start()
+
+    async def read_lines():
+        number = 0
+        while True:
+            line = await incoming.get()
+            if line is None:
+                return
+            if isinstance(line, BaseException):
+                raise line
+            number += 1
+            stats.lines = number
+            yield number, line.rstrip("\r\n")
+
+    if not ordered:
+        tasks = set()
+
+        def done(task: "asyncio.Task[Tuple[int, Optional[str]]]") -> None:
+            tasks.discard(task)
+            if not task.cancelled():
+                emit(task.result()[1])
+
+        try:
+            async for number, line in read_lines():
+                await slots.acquire()
+                task = asyncio.ensure_future(ask(number, line))
+                tasks.add(task)
+                task.add_done_callback(done)
+            if tasks:
+                await asyncio.gather(*list(tasks))
+        finally:
+            for task in list(tasks):
+                task.cancel()
+        return stats
+
+    # Ordered: the queue holds started tasks in input order; its size bounds the
+    # reorder buffer, and the consumer emits each head as soon as it resolves.
+    pending: "asyncio.Queue[Optional[asyncio.Task[Tuple[int, Optional[str]]]]]" = asyncio.Queue(
+        maxsize=max(window or 2 * concurrency, concurrency, 1)
+    )
+
+    async def produce() -> None:
+        async for number, line in read_lines():
+            await slots.acquire()
+            await pending.put(asyncio.ensure_future(ask(number, line)))
+        await pending.put(None)
+
+    async def consume() -> None:
+        while True:
+            task = await pending.get()
+            if task is None:
+                return
+            emit((await task)[1])
+
+    producer = asyncio.ensure_future(produce())
+    consumer = asyncio.ensure_future(consume())
+    try:
+        await asyncio.gather(producer, consumer)
+    finally:
+        producer.cancel()
+        consumer.cancel()
+        while not pending.empty():
+            task = pending.get_nowait()
+            if task is not None:
+                task.cancel()
+    return stats
+
+
+def map_lines(
+    provider: Any,
+    build_request: Callable[[str], ChatRequest],
+    template: str,
+    source: TextIO,
+    sink: TextIO,
+    errors: TextIO,
+    *,
+    concurrency: int = 4,
+    window: Optional[int] = None,
+    ordered: bool = True,
+) -> MapStats:
+    """Synchronous entry point used by the CLI."""
+
+    async def _main() -> MapStats:
+        try:
+            return await run_map(
+                provider,
+                build_request,
+                template,
+                source,
+                sink,
+                errors,
+                concurrency=concurrency,
+                window=window,
+                ordered=ordered,
+            )
+        finally:
+            transports = getattr(provider, "transports", None)
+            if transports is not None:
+                await transports.aclose()
+
+    return asyncio.run(_main())
@@ -0,0 +1,229 @@
+"""Map-reduce over piped input that is larger than the model's context.
+
+The input is cut into line-aligned chunks of about ``chunk_tokens`` tokens,
+each repeating the last ``overlap_tokens`` of its predecessor.  Boundaries are
+computed from the start of the input and map prompts carry no chunk numbers,
+so when a log grows only its new tail produces new requests: every earlier
+chunk hashes to the same cache key as last time.
+
+Map answers are then folded together: while the partial answers do not fit
+one reduce request they are grouped and reduced in rounds.  The caller sends
+the final reduce prompt through the normal chat path so it streams and is
+rendered like any other answer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from ..config import CACHE_DIR
+from ..providers import ChatRequest, ProviderError, ResponseCache, request_key
+
+LOGGER = logging.getLogger("cli_llm")
+
+MAP_REDUCE_CACHE_DIR = CACHE_DIR / "map-reduce"
+DEFAULT_CHUNK_TOKENS = 8192
+DEFAULT_OVERLAP_TOKENS = 200
+REDUCE_ATTEMPTS = 2
+
+MAP_TEMPLATE = (
+    "The text below is one excerpt of a larger input. Answer the question using only this "
+    "excerpt; quote the relevant details. If the excerpt contains nothing relevant, reply "
+    "exactly NOTHING RELEVANT.\n\nQuestion: {question}\n\n--- Excerpt ---\n{chunk}"
+)
+REDUCE_TEMPLATE = (
+    "Below are partial answers to the same question, each written from a different excerpt "
+    "of a larger input, in input order. Combine them into one complete answer; drop "
+    "duplicates and partials that found nothing relevant.\n\nQuestion: {question}\n\n{partials}"
+)
+NOTHING_RELEVANT = "NOTHING RELEVANT"
+
+
+@dataclass(slots=True)
+class MapReduceStats:
+    chunks: int = 0
+    cached: int = 0
+    failed: int = 0
+    reduce_rounds: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.chunks} chunks ({self.cached} cached, {self.failed} failed), "
+            f"{self.reduce_rounds} reduce round{'s' if self.reduce_rounds != 1 else ''}"
+        )
+
+
+def split_chunks(text: str, count: Callable[[str], int], chunk_tokens: int, overlap_tokens: int) -> List[str]:
+    """Cut ``text`` into line-aligned chunks of at most ``chunk_tokens`` with overlap."""
+    lines: List[str] = []
+    for line in text.splitlines(keepends=True):
+        lines.extend(_split_long_line(line, count, chunk_tokens))
+    sizes = [count(line) for line in lines]
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(lines):
+        end, used = start, 0
+        while end < len(lines) and (end == start or used + sizes[end] <= chunk_tokens):
+            used += sizes[end]
+            end += 1
+        chunks.append("".join(lines[start:end]))
+        if end >= len(lines):
+            break
+        # Step back over whole lines worth ``overlap_tokens``, always advancing.
+        next_start, carried = end, 0
+        while next_start - 1 > start and carried + sizes[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+            carried += sizes[next_start]
+        start = next_start
+    return chunks
+
+
+def _split_long_line(line: str, count: Callable[[str], int], chunk_tokens: int) -> List[str]:
+    tokens = count(line)
+    if tokens <= chunk_tokens:
+        return [line]
+    pieces = -(-tokens // chunk_tokens)
+    step = -(-len(line) // pieces)
+    return [line[index : index + step] for index in range(0, len(line), step)]
+
+
+def map_prompt(question: str, chunk: str) -> str:
+    return MAP_TEMPLATE.format(question=question, chunk=chunk)
+
+
+def reduce_prompt(question: str, partials: List[str]) -> str:
+    body = "\n\n".join(f"--- Partial answer {index} ---\n{text}" for index, text in enumerate(partials, 1))
+    return REDUCE_TEMPLATE.format(question=question, partials=body)
+
+
+def group_partials(partials: List[str], count: Callable[[str], int], budget: int) -> List[List[str]]:
+    """Greedy in-order groups whose combined size fits ``budget``; at least two per group."""
+    groups: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for text in partials:
+        size = count(text) + 8
+        if len(current) >= 2 and used + size > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += size
+    if current:
+        if len(current) == 1 and groups:
+            groups[-1].append(current[0])
+        else:
+            groups.append(current)
+    return groups
+
+
+class MapReduce:
+    """Run map requests concurrently (bounded) and reduce their answers hierarchically.
+
+    ``provider`` is any object with the blocking ``create_chat`` method, so the
+    daemon, hedging and response-cache wrappers all apply; calls run on worker
+    threads with at most ``concurrency`` in flight.
+    """
+
+    def __init__(
+        self,
+        provider: Any,
+        build_request: Callable[[str], ChatRequest],
+        count: Callable[[str], int],
+        *,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+        reduce_tokens: Optional[int] = None,
+        concurrency: int = 4,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.provider = provider
+        self.build_request = build_request
+        self.count = count
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.chunk_tokens // 2))
+        self.reduce_tokens = reduce_tokens or self.chunk_tokens
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+        self.stats = MapReduceStats()
+
+    def _endpoint(self) -> str:
+        return getattr(getattr(self.provider, "config", None), "api_endpoint", "") or ""
+
+    async def _ask(self, prompt: str, slots: asyncio.Semaphore) -> str:
+        request = self.build_request(prompt)
+        key = request_key(request, self._endpoint()) if self.cache is not None else None
+        if key is not None:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.stats.cached += 1
+                return entry["content"]
+        async with slots:
+            response = await asyncio.to_thread(self.provider.create_chat, request)
+        content = response.choices[0].message.content or ""
+        if key is not None:
+            self.cache.put(key, {"content": content, "model": getattr(response, "model", None)})
+        return content
+
+    async def _map(self, question: str, chunks: List[str], slots: asyncio.Semaphore) -> List[str]:
+        async def one(index: int, chunk: str) -> Optional[str]:
+            try:
+                return await self._ask(map_prompt(question, chunk), slots)
+            except Exception as exc:
+                LOGGER.error("⚠️ map-reduce chunk %s failed: %s", index, exc)
+                self.stats.failed += 1
+                return None
+
+        answers = await asyncio.gather(*(one(index, chunk) for index, chunk in enumerate(chunks, 1)))
+        if all(answer is None for answer in answers):
+            raise ProviderError(f"all {len(chunks)} map-reduce chunks failed")
+        return [answer for answer in answers if answer and answer.strip() != NOTHING_RELEVANT]
+
+    async def _reduce_group(self, question: str, group: List[str], slots: asyncio.Semaphore) -> str:
+        """Reduce one group, retrying transient failures; a lost group fails the run."""
+        attempt = 1
+        while True:
+            try:
+                return await self._ask(reduce_prompt(question, group), slots)
+            except Exception as exc:
+                LOGGER.warning("⚠️ map-reduce reduce attempt %s/%s failed: %s", attempt, REDUCE_ATTEMPTS, exc)
+                if attempt >= REDUCE_ATTEMPTS:
+                    raise ProviderError(
+                        f"map-reduce reduce round {self.stats.reduce_rounds} failed after "
+                        f"{REDUCE_ATTEMPTS} attempts: {exc}"
+                    ) from exc
+                attempt += 1
+
+    async def _reduce(self, question: str, partials: List[str], slots: asyncio.Semaphore) -> List[str]:
+        overhead = self.count(reduce_prompt(question, []))
+        budget = max(1, self.reduce_tokens - overhead)
+        while len(partials) > 1 and sum(self.count(text) + 8 for text in partials) > budget:
+            # Every group holds at least two partials, so each round shrinks the list.
+            groups = group_partials(partials, self.count, budget)
+            self.stats.reduce_rounds += 1
+            LOGGER.info("🧮 Reduce round %s: %s partials → %s", self.stats.reduce_rounds, len(partials), len(groups))
+            partials = list(
+                await asyncio.gather(*(self._reduce_group(question, group, slots) for group in groups))
+            )
+        return partials
+
+    async def arun(self, question: str, text: str) -> str:
+        """Return the final reduce prompt (or the question with the lone chunk)."""
+        chunks = split_chunks(text, self.count, self.chunk_tokens, self.overlap_tokens)
+        self.stats.chunks = len(chunks)
+        if len(chunks) <= 1:
+            return f"{question}\n{text}" if text else question
+        LOGGER.info("🧮 Map-reduce over %s chunks (≤%s tokens each)", len(chunks), self.chunk_tokens)
+        slots = asyncio.Semaphore(self.concurrency)
+        partials = await self._map(question, chunks, slots)
+        if not partials:
+            partials = [NOTHING_RELEVANT]
+        partials = await self._reduce(question, partials, slots)
+        self.stats.reduce_rounds += 1  # the final reduce, sent by the caller
+        return reduce_prompt(question, partials)
+
+    def run(self, question: str, text: str) -> str:
+        return asyncio.run(self.arun(question, text))
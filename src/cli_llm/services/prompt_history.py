@@ -0,0 +1,149 @@
+"""Capped, indexed prompt history for the prompt_toolkit reader.
+
+``FileHistory`` re-parses its whole, ever-growing file before the first
+prompt.  :class:`PromptHistory` keeps entries in a small SQLite table instead:
+
+* up-arrow loads only the ``RECENT_ENTRIES`` most recent prompts, newest
+  first, from an index on the last-used time;
+* :meth:`PromptHistory.search` answers Ctrl-R from the same table, so older
+  prompts stay reachable without ever being loaded;
+* repeating a prompt moves it to the front instead of storing it again, and
+  the table is trimmed back to ``MAX_ENTRIES`` every ``COMPACT_EVERY`` stores;
+* WAL mode lets concurrent ``llm`` processes append without clobbering each
+  other.
+
+The legacy ``chat_history`` file is imported once, when the database is
+created.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from prompt_toolkit.completion import CompleteEvent, Completer, Completion
+from prompt_toolkit.document import Document
+from prompt_toolkit.history import FileHistory, History
+
+from ..config import CACHE_DIR
+
+LOGGER = logging.getLogger("cli_llm")
+
+PROMPT_HISTORY_PATH = CACHE_DIR / "prompt_history.sqlite3"
+LEGACY_HISTORY_PATH = CACHE_DIR / "chat_history"
+MAX_ENTRIES = 10_000
+RECENT_ENTRIES = 1_000
+COMPACT_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS prompts_used ON prompts(used);
+"""
+
+
+class PromptHistory(History):
+    """prompt_toolkit ``History`` over a capped SQLite table."""
+
+    def __init__(
+        self,
+        path: Path = PROMPT_HISTORY_PATH,
+        *,
+        max_entries: int = MAX_ENTRIES,
+        recent: int = RECENT_ENTRIES,
+        legacy_path: Optional[Path] = LEGACY_HISTORY_PATH,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.recent = recent
+        self.legacy_path = legacy_path
+        self._db: Optional[sqlite3.Connection] = None
+        # prompt_toolkit loads on a worker thread and stores on the main one.
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fresh = not self.path.exists()
+            db = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("PRAGMA synchronous = NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+            if fresh and self.legacy_path is not None and self.legacy_path.exists():
+                self._import_legacy(self.legacy_path)
+        return self._db
+
+    def _import_legacy(self, legacy_path: Path) -> None:
+        newest_first = list(FileHistory(str(legacy_path)).load_history_strings())[: self.max_entries]
+        now = time.time()
+        assert self._db is not None
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO prompts (text, used) VALUES (?, ?)",
+                # Keep the original order: older entries get older timestamps.
+                [(text, now - index * 1e-3) for index, text in enumerate(newest_first)],
+            )
+        LOGGER.info("📜 Imported %s prompts from %s", len(newest_first), legacy_path)
+
+    def load_history_strings(self) -> Iterable[str]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT text FROM prompts ORDER BY used DESC LIMIT ?", (self.recent,)
+            ).fetchall()
+        for (text,) in rows:
+            yield text
+
+    def store_string(self, string: str) -> None:
+        with self._lock:
+            db = self._connect()
+            with db:
+                cursor = db.execute(
+                    "INSERT INTO prompts (text, used) VALUES (?, ?) "
+                    "ON CONFLICT(text) DO UPDATE SET used = excluded.used",
+                    (string, time.time()),
+                )
+                if cursor.lastrowid and cursor.lastrowid % COMPACT_EVERY == 0:
+                    self._compact(db)
+
+    def _compact(self, db: sqlite3.Connection) -> None:
+        removed = db.execute(
+            "DELETE FROM prompts WHERE used <= "
+            "(SELECT used FROM prompts ORDER BY used DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        if removed > 0:
+            LOGGER.debug("📜 Dropped %s old prompts from history", removed)
+
+    def search(self, text: str, limit: int = 50) -> List[str]:
+        """Most recently used prompts containing ``text`` (case-insensitive for ASCII)."""
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT text FROM prompts WHERE text LIKE ? ESCAPE '\\' ORDER BY used DESC LIMIT ?",
+                (pattern, limit),
+            ).fetchall()
+        return [text for (text,) in rows]
+
+
+class HistorySearchCompleter(Completer):
+    """Offer every indexed prompt containing the current text; bound to Ctrl-R."""
+
+    def __init__(self, history: PromptHistory) -> None:
+        self.history = history
+
+    def get_completions(self, document: Document, complete_event: CompleteEvent) -> Iterator[Completion]:
+        for text in self.history.search(document.text.strip()):
+            yield Completion(
+                text,
+                start_position=-len(document.text_before_cursor),
+                display=" ".join(text.split())[:80],
+            )
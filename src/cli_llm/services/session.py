@@ -4,20 +4,44 @@ from __future__ import annotations
 
 import logging
 import os
+import queue
 import re
 import signal
 import sys
+import threading
 import time
-from dataclasses import dataclass
-from typing import Any, Optional
-
-import tiktoken
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 from ..config import TIPF, RSTF, ERRF
-from ..providers import ChatRequest, OpenAIProvider
+from ..models import DEFAULT_ENCODING, ContextWindowExceeded, ModelRegistry, model_registry
+from ..providers import AsyncOpenAIProvider, CacheMiss, ChatRequest, OpenAIProvider
 from ..renderers import ResponseRenderer
 from .. import prompts
 from ..prompts import SYS_ROLES
+from ..utils import lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import tiktoken
+
+    from .similar import SimilarHit, SimilarityCache
+    from .transcripts import TranscriptWriter
+else:
+    tiktoken = lazy_import("tiktoken")
 
 LOGGER = logging.getLogger("cli_llm")
 
@@ -28,24 +52,123 @@ class TokenTracker:
 
     input_tokens: int = 0
     output_tokens: int = 0
-
-    def add_input(self, count: int) -> None:
+    estimated_input: int = 0
+    estimated_output: int = 0
+    cost: float = 0.0
+    unpriced_models: Set[str] = field(default_factory=set)
+
+    def add_cost(self, cost: Optional[float], model: str) -> None:
+        """Accumulate a request's cost; ``None`` marks a model without known pricing."""
+        if cost is None:
+            self.unpriced_models.add(model)
+        else:
+            self.cost += cost
+
+    def add_input(self, count: int, estimated: bool = False) -> None:
         self.input_tokens += count
+        if estimated:
+            self.estimated_input += count
 
-    def add_output(self, count: int) -> None:
+    def add_output(self, count: int, estimated: bool = False) -> None:
         self.output_tokens += count
-
-    def display(self) -> None:
+        if estimated:
+            self.estimated_output += count
+
+    @staticmethod
+    def _accuracy(total: int, estimated: int) -> str:
+        if not estimated:
+            return "exact"
+        if estimated == total:
+            return "estimated"
+        return f"{estimated:,} estimated"
+
+    def display(self, file: Optional[TextIO] = None) -> None:
         total_tokens = self.input_tokens + self.output_tokens
         if total_tokens == 0:
-            print(f"\n{TIPF}📊 No tokens counted yet. Use --count-tokens to enable token counting.{RSTF}")
+            print(f"\n{TIPF}📊 No tokens counted yet. Use --count-tokens to enable token counting.{RSTF}", file=file)
+            return
+        print(f"\n{TIPF}📊 Token Usage:{RSTF}", file=file)
+        print(
+            f"  Input tokens: {self.input_tokens:,} ({self._accuracy(self.input_tokens, self.estimated_input)})",
+            file=file,
+        )
+        print(
+            f"  Output tokens: {self.output_tokens:,} ({self._accuracy(self.output_tokens, self.estimated_output)})",
+            file=file,
+        )
+        print(f"  Total tokens: {total_tokens:,}", file=file)
+        if not self.unpriced_models:
+            print(f"  Estimated cost: ~${self.cost:.4f}", file=file)
             return
-        print(f"\n{TIPF}📊 Token Usage:{RSTF}")
-        print(f"  Input tokens: {self.input_tokens:,}")
-        print(f"  Output tokens: {self.output_tokens:,}")
-        print(f"  Total tokens: {total_tokens:,}")
-        estimated_cost = (self.input_tokens * 0.00001) + (self.output_tokens * 0.00003)
-        print(f"  Estimated cost: ~${estimated_cost:.4f}")
+        unpriced = ", ".join(sorted(self.unpriced_models))
+        if self.cost:
+            print(f"  Estimated cost: ~${self.cost:.4f} (excluding {unpriced}: no pricing)", file=file)
+        else:
+            print(f"  Estimated cost: unknown (no pricing for {unpriced})", file=file)
+
+
+class StreamTokenCounter:
+    """Estimate output tokens delta by delta on a background thread.
+
+    Used when the provider does not report usage for streams; by the time the
+    stream ends the count is (nearly) done, so there is no re-encoding pause.
+    """
+
+    def __init__(self, count: Callable[[str], int]) -> None:
+        self.total = 0
+        self.deltas = 0
+        self._queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, args=(count,), name="cli-llm-token-counter", daemon=True)
+        self._thread.start()
+
+    def _run(self, count: Callable[[str], int]) -> None:
+        try:
+            count("")  # load the encoding while the first token is still in flight
+        except Exception as exc:  # tokenizer unavailable; drain the queue and report nothing
+            LOGGER.warning("⚠️ Token counting unavailable: %s", exc)
+            count = lambda text: 0  # noqa: E731
+        while True:
+            text = self._queue.get()
+            if text is None:
+                return
+            self.total += count(text)
+
+    def feed(self, text: str) -> None:
+        self.deltas += 1
+        self._queue.put(text)
+
+    def finish(self) -> int:
+        self._queue.put(None)
+        self._thread.join()
+        return self.total
+
+    def cancel(self) -> None:
+        self._queue.put(None)
+
+
+@dataclass(slots=True)
+class _StreamTap:
+    """Observe chunks on their way to the renderer: usage and per-delta counts."""
+
+    counter: Optional[StreamTokenCounter] = None
+    usage: Any = None
+
+    def _observe(self, chunk: Any) -> None:
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            self.usage = usage
+        if self.counter is not None and chunk.choices and chunk.choices[0].delta.content:
+            self.counter.feed(chunk.choices[0].delta.content)
+
+    def wrap(self, response: Any) -> Iterator[Any]:
+        for chunk in response:
+            self._observe(chunk)
+            yield chunk
+
+    async def awrap(self, response: Any) -> AsyncIterator[Any]:
+        async for chunk in response:
+            self._observe(chunk)
+            yield chunk
 
 
 def sanitize_input(input_str: str) -> str:
@@ -73,13 +196,20 @@ class ChatService:
 
     def __init__(
         self,
-        provider: OpenAIProvider,
+        provider: Union[OpenAIProvider, AsyncOpenAIProvider],
         renderer: ResponseRenderer,
         token_tracker: TokenTracker,
+        similar: Optional[SimilarityCache] = None,
+        models: Optional[ModelRegistry] = None,
+        transcripts: Optional[TranscriptWriter] = None,
     ) -> None:
         self.provider = provider
         self.renderer = renderer
         self.token_tracker = token_tracker
+        self.similar = similar
+        self.transcripts = transcripts
+        self.models = models or model_registry(getattr(getattr(provider, "config", None), "models", None))
+        self._token_cache: Dict[Tuple[str, str], int] = {}
 
     def get_sys_role(self, role: str, fallback: str = "coder") -> prompts.SystemPrompt:
         if role not in SYS_ROLES:
@@ -87,13 +217,30 @@ class ChatService:
             return SYS_ROLES[fallback]
         return SYS_ROLES[role]
 
+    def _cached_count(self, text: str, model: str) -> int:
+        # System prompts and AGENTS context repeat across requests; encode them once.
+        key = (model, text)
+        count = self._token_cache.get(key)
+        if count is None:
+            if len(self._token_cache) >= 256:
+                self._token_cache.clear()
+            count = len(self._encoding_for_model(model).encode(text))
+            self._token_cache[key] = count
+        return count
+
+    def seed_token_counts(self, model: str, counted: Iterable[Tuple[str, int]]) -> None:
+        """Prime the count cache with known ``(text, tokens)`` pairs, e.g. from a session log."""
+        for text, tokens in counted:
+            if len(self._token_cache) >= 256:
+                self._token_cache.clear()
+            self._token_cache[(model, text)] = tokens
+
     def count_tokens_in_messages(self, messages: list, model: str) -> int:
-        encoding = self._encoding_for_model(model)
         total_tokens = 0
 
         for message in messages:
             if message.get("content"):
-                total_tokens += len(encoding.encode(message["content"]))
+                total_tokens += self._cached_count(message["content"], model)
             total_tokens += 4
             if message.get("name"):
                 total_tokens += 1
@@ -105,33 +252,48 @@ class ChatService:
         return len(encoding.encode(text))
 
     def _encoding_for_model(self, model: str) -> tiktoken.Encoding:
-        model_encoding_map = {
-            "deepseek-coder": "cl100k_base",
-            "deepseek-chat": "cl100k_base",
-            "deepseek-reasoner": "cl100k_base",
-            "gpt-4": "cl100k_base",
-            "gpt-3.5-turbo": "cl100k_base",
-            "gpt-4o": "cl100k_base",
-            "gpt-4o-mini": "cl100k_base",
-        }
-        encoding_name = model_encoding_map.get(model, "cl100k_base")
+        encoding_name = self.models.get(model).encoding
         try:
             return tiktoken.get_encoding(encoding_name)
-        except KeyError:  # pragma: no cover - defensive fallback
-            return tiktoken.get_encoding("cl100k_base")
+        except (KeyError, ValueError):  # unknown name in a user override
+            LOGGER.warning("⚠️ Unknown encoding %s for %s; using %s", encoding_name, model, DEFAULT_ENCODING)
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+    def _preflight(self, request: ChatRequest) -> None:
+        """Refuse requests whose input cannot fit the model's context window."""
+        window = self.models.get(request.model).context_window
+        if window is None:
+            return
+        # A BPE token is at least one byte, so the byte count bounds the token count.
+        upper_bound = 2 + sum(4 + len((message.get("content") or "").encode("utf-8")) for message in request.messages)
+        if upper_bound <= window:
+            return
+        try:
+            tokens = self.count_tokens_in_messages(request.messages, request.model)
+        except Exception as exc:  # tokenizer unavailable (e.g. offline); let the server decide
+            LOGGER.warning("⚠️ Skipping context check for %s: %s", request.model, exc)
+            return
+        if tokens > window:
+            raise ContextWindowExceeded(
+                f"Prompt is {tokens:,} tokens but {request.model} accepts at most {window:,}; "
+                "shorten the input or pick a model with a larger context."
+            )
 
-    def chat(
+    def build_request(
         self,
         prompt: str,
-        no_stream: bool,
         model: str,
         role_name: str,
+        *,
+        no_stream: bool = False,
         count_tokens: bool = False,
         custom_temp: Optional[float] = None,
         json_output: bool = False,
         role_fallback: str = "coder",
         agents_context_text: str = "",
-    ) -> None:
+        history: Sequence[Dict[str, str]] = (),
+    ) -> ChatRequest:
+        """Assemble the system/user messages for ``prompt`` into a ``ChatRequest``."""
         role = self.get_sys_role(role_name, fallback=role_fallback)
         temperature = custom_temp if custom_temp is not None else role.temperature
 
@@ -140,6 +302,7 @@ class ChatService:
 
         messages = [
             {"role": "system", "content": role.content},
+            *({"role": item["role"], "content": item["content"]} for item in history),
             {"role": "user", "content": prompt},
         ]
 
@@ -148,70 +311,323 @@ class ChatService:
                 f"\n\n---\n# Project Context (AGENTS.md)\n---\n{agents_context_text}"
             )
 
-        if count_tokens:
-            token_count = self.count_tokens_in_messages(messages, model)
-            self.token_tracker.add_input(token_count)
-            LOGGER.info("📊 Input tokens: %s", token_count)
-
         LOGGER.info("🚀 Request to %s (%s)", model, "non-stream" if no_stream else "stream")
+        info = self.models.get(model)
         response_format = None
         if json_output:
-            response_format = {"type": "json_object"}
+            if info.supports("json_mode"):
+                response_format = {"type": "json_object"}
+            else:
+                LOGGER.info("ℹ️ %s has no JSON mode; relying on the prompt instruction", model)
+
+        return ChatRequest(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            response_format=response_format,
+            stream=not no_stream,
+            include_usage=(
+                count_tokens and not no_stream and info.supports("stream_usage") and self._stream_usage_supported()
+            ),
+        )
+
+    def _stream_usage_supported(self) -> bool:
+        """Profiles opt out with ``stream_usage = false`` if their server rejects ``stream_options``."""
+        config = getattr(self.provider, "config", None)
+        profile = getattr(config, "providers", {}).get(getattr(config, "provider", None), {})
+        return profile.get("stream_usage", True)
+
+    def _start_tap(self, request: ChatRequest, count_tokens: bool) -> _StreamTap:
+        if not count_tokens:
+            return _StreamTap()
+        return _StreamTap(StreamTokenCounter(lambda text: self.count_tokens_in_text(text, request.model)))
+
+    def _record_input(self, request: ChatRequest, usage: Any) -> int:
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        if prompt_tokens is not None:
+            self.token_tracker.add_input(prompt_tokens)
+            LOGGER.info("📊 Input tokens: %s", prompt_tokens)
+            return prompt_tokens
+        token_count = self.count_tokens_in_messages(request.messages, request.model)
+        self.token_tracker.add_input(token_count, estimated=True)
+        LOGGER.info("📊 Estimated input tokens: %s", token_count)
+        return token_count
+
+    @staticmethod
+    def _cached_tokens(usage: Any) -> int:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None)
+        if cached is None:
+            cached = getattr(usage, "prompt_cache_hit_tokens", None)  # DeepSeek
+        return cached or 0
+
+    def _charge(self, model: str, input_tokens: int, output_tokens: int, usage: Any) -> None:
+        info = self.models.get(model)
+        self.token_tracker.add_cost(info.cost(input_tokens, output_tokens, self._cached_tokens(usage)), model)
+
+    def _record_streamed_output(
+        self, request: ChatRequest, response: Any, full_content: str, tap: _StreamTap, count_tokens: bool
+    ) -> None:
+        if not count_tokens:
+            return
+        input_tokens = self._record_input(request, tap.usage)
+        model = getattr(response, "model", None) or request.model
+        completion_tokens = getattr(tap.usage, "completion_tokens", None)
+        if completion_tokens is not None:
+            if tap.counter is not None:
+                tap.counter.cancel()
+            self.token_tracker.add_output(completion_tokens)
+            LOGGER.info("📊 Streamed output tokens: %s", completion_tokens)
+            self._charge(model, input_tokens, completion_tokens, tap.usage)
+            return
+        if tap.counter is not None and tap.counter.deltas:
+            output_token_count = tap.counter.finish()
+        elif full_content:
+            if tap.counter is not None:
+                tap.counter.cancel()
+            output_token_count = self.count_tokens_in_text(full_content, model)
+        else:
+            output_token_count = 0
+        if output_token_count:
+            self.token_tracker.add_output(output_token_count, estimated=True)
+            LOGGER.info("📊 Estimated streamed output tokens: %s", output_token_count)
+        self._charge(model, input_tokens, output_token_count, tap.usage)
+
+    def _record_unstreamed_output(
+        self, request: ChatRequest, response: Any, answer: str, count_tokens: bool
+    ) -> None:
+        if not count_tokens:
+            return
+        usage = getattr(response, "usage", None)
+        input_tokens = self._record_input(request, usage)
+        model = getattr(response, "model", None) or request.model
+        if usage:
+            output_tokens = usage.completion_tokens
+            self.token_tracker.add_output(output_tokens)
+            LOGGER.info("📊 Output tokens: %s", output_tokens)
+        else:
+            output_tokens = self.count_tokens_in_text(answer, model)
+            self.token_tracker.add_output(output_tokens, estimated=True)
+            LOGGER.info("📊 Estimated output tokens: %s", output_tokens)
+        self._charge(model, input_tokens, output_tokens, usage)
+
+    @property
+    def _decorated(self) -> bool:
+        """Status lines belong on stdout only when the renderer targets a terminal."""
+        return getattr(self.renderer, "decorated", True)
+
+    def _event(self, name: str, **fields: Any) -> None:
+        events = getattr(self.renderer, "events", None)
+        if events is not None:
+            events.emit(name, **fields)
+
+    def _report_request(self, request: ChatRequest) -> None:
+        config = getattr(self.provider, "config", None)
+        self._event(
+            "request",
+            provider=getattr(config, "provider", None),
+            model=request.model,
+            stream=request.stream,
+        )
+
+    def _report_completion(self, start_time: float) -> None:
+        response_time = time.time() - start_time
+        LOGGER.info("✅ Response completed in %.2fs", response_time)
+        self._event("done", elapsed=round(response_time, 6))
+        if self._decorated:
+            print(f"\n{TIPF}⏱️ Response time: {response_time:.2f}s{RSTF}")
 
+    def _report_error(self, exc: Exception) -> None:
+        LOGGER.error("⚠️ Provider error: %s", exc, exc_info=True)
+        self._event("error", type=type(exc).__name__, message=str(exc))
+        if self._decorated:
+            print(f"{ERRF}❌ Error: {exc}{RSTF}")
+        else:
+            print(f"Error: {exc}", file=sys.stderr)
+
+    def _log_transcript(
+        self,
+        request: ChatRequest,
+        prompt: str,
+        role_name: str,
+        start_time: float,
+        tokens_before: Tuple[int, int],
+        usage: Any = None,
+        answer: str = "",
+        error: Optional[Exception] = None,
+    ) -> None:
+        """Queue the request for the history store; tracker deltas win over raw usage."""
+        if self.transcripts is None:
+            return
+        input_tokens = self.token_tracker.input_tokens - tokens_before[0] or getattr(usage, "prompt_tokens", None)
+        output_tokens = self.token_tracker.output_tokens - tokens_before[1] or getattr(usage, "completion_tokens", None)
+        config = getattr(self.provider, "config", None)
+        self.transcripts.record(
+            created=start_time,
+            provider=getattr(config, "provider", None),
+            model=request.model,
+            role=role_name,
+            prompt=prompt,
+            answer=answer or "",
+            elapsed=round(time.time() - start_time, 6),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            error=f"{type(error).__name__}: {error}" if error is not None else None,
+        )
+
+    def _offer_similar(self, hit: SimilarHit) -> bool:
+        """Show a near-duplicate hit and ask whether to reuse it."""
+        print(
+            f"{TIPF}♻️ Similar question answered {hit.describe_age()} by {hit.model} "
+            f"(similarity {hit.similarity:.2f}).{RSTF}",
+            file=None if self._decorated else sys.stderr,
+        )
+        try:
+            reply = input("Reuse that answer? [Y/n] ")
+        except EOFError:
+            return False
+        return not reply.strip().lower().startswith("n")
+
+    def _reuse_similar(self, prompt: str, role_name: str) -> bool:
+        # Without a terminal to ask on, the model is always called (scripts must
+        # never receive an answer to a different question), so skip the lookup.
+        if self.similar is None or not sys.stdin.isatty() or not self.similar.accepts(prompt, role_name):
+            return False
+        hit = self.similar.lookup(prompt, role_name)
+        if hit is None or not self._offer_similar(hit):
+            return False
+        LOGGER.info("♻️ Reused similar answer (similarity %.2f)", hit.similarity)
+        self.renderer.print_markdown(hit.answer)
+        return True
+
+    def chat(
+        self,
+        prompt: str,
+        no_stream: bool,
+        model: str,
+        role_name: str,
+        count_tokens: bool = False,
+        custom_temp: Optional[float] = None,
+        json_output: bool = False,
+        role_fallback: str = "coder",
+        agents_context_text: str = "",
+        history: Sequence[Dict[str, str]] = (),
+    ) -> Optional[str]:
+        if self._reuse_similar(prompt, role_name):
+            return None
+        request = self.build_request(
+            prompt,
+            model,
+            role_name,
+            no_stream=no_stream,
+            count_tokens=count_tokens,
+            custom_temp=custom_temp,
+            json_output=json_output,
+            role_fallback=role_fallback,
+            agents_context_text=agents_context_text,
+            history=history,
+        )
         start_time = time.time()
+        tokens_before = (self.token_tracker.input_tokens, self.token_tracker.output_tokens)
+        usage = None
         try:
-            if not no_stream:
-                request = ChatRequest(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    response_format=response_format,
-                    stream=True,
+            self._preflight(request)
+            self._report_request(request)
+            response = self.provider.create_chat(request)
+            self._event("connected")
+            if request.stream:
+                if self._decorated:
+                    print(f"{TIPF} 💭Generating...{RSTF}")
+                tap = self._start_tap(request, count_tokens)
+                answer = self.renderer.process_streamed_chunk(
+                    tap.wrap(response),
+                    count_tokens=count_tokens,
                 )
-                response = self.provider.create_chat(request)
-                print(f"{TIPF} 💭Generating...{RSTF}")
-                full_content = self.renderer.process_streamed_chunk(
+                self._record_streamed_output(request, response, answer, tap, count_tokens)
+                usage = tap.usage
+            else:
+                answer = self.renderer.process_unstreamed_chunk(
                     response,
+                    time.time() - start_time,
                     count_tokens=count_tokens,
+                    extra_session_type="Reasoning",
                 )
-                if count_tokens and full_content:
-                    model_name = getattr(response, "model", model)
-                    output_token_count = self.count_tokens_in_text(full_content, model_name)
-                    self.token_tracker.add_output(output_token_count)
-                    LOGGER.info("📊 Streamed output tokens: %s", output_token_count)
-            else:
-                request = ChatRequest(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    response_format=response_format,
-                    stream=False,
+                self._record_unstreamed_output(request, response, answer, count_tokens)
+                usage = getattr(response, "usage", None)
+            if self.similar is not None:
+                self.similar.record(prompt, role_name, getattr(response, "model", None) or model, answer)
+            self._report_completion(start_time)
+            self._log_transcript(request, prompt, role_name, start_time, tokens_before, usage, answer)
+            return answer
+        except CacheMiss:
+            raise  # nothing was sent; the caller turns it into a failing exit status
+        except Exception as exc:
+            self._report_error(exc)
+            self._log_transcript(request, prompt, role_name, start_time, tokens_before, usage, error=exc)
+            return None
+
+    async def achat(
+        self,
+        prompt: str,
+        no_stream: bool,
+        model: str,
+        role_name: str,
+        count_tokens: bool = False,
+        custom_temp: Optional[float] = None,
+        json_output: bool = False,
+        role_fallback: str = "coder",
+        agents_context_text: str = "",
+        history: Sequence[Dict[str, str]] = (),
+    ) -> Optional[str]:
+        """Async twin of :meth:`chat`; requires a provider with ``create_chat_async``."""
+        request = self.build_request(
+            prompt,
+            model,
+            role_name,
+            no_stream=no_stream,
+            count_tokens=count_tokens,
+            custom_temp=custom_temp,
+            json_output=json_output,
+            role_fallback=role_fallback,
+            agents_context_text=agents_context_text,
+            history=history,
+        )
+        start_time = time.time()
+        tokens_before = (self.token_tracker.input_tokens, self.token_tracker.output_tokens)
+        usage = None
+        try:
+            self._preflight(request)
+            self._report_request(request)
+            response = await self.provider.create_chat_async(request)
+            self._event("connected")
+            if request.stream:
+                if self._decorated:
+                    print(f"{TIPF} 💭Generating...{RSTF}")
+                tap = self._start_tap(request, count_tokens)
+                full_content = await self.renderer.aprocess_streamed_chunk(
+                    tap.awrap(response),
+                    count_tokens=count_tokens,
                 )
-                response = self.provider.create_chat(request)
+                self._record_streamed_output(request, response, full_content, tap, count_tokens)
+                answer = full_content
+                usage = tap.usage
+            else:
                 answer = self.renderer.process_unstreamed_chunk(
                     response,
                     time.time() - start_time,
                     count_tokens=count_tokens,
                     extra_session_type="Reasoning",
                 )
-                if count_tokens:
-                    if hasattr(response, "usage") and response.usage:
-                        output_tokens = response.usage.completion_tokens
-                        self.token_tracker.add_output(output_tokens)
-                        LOGGER.info("📊 Output tokens: %s", output_tokens)
-                    else:
-                        output_tokens = self.count_tokens_in_text(answer, response.model)
-                        self.token_tracker.add_output(output_tokens)
-                        LOGGER.info("📊 Estimated output tokens: %s", output_tokens)
-
-            response_time = time.time() - start_time
-            LOGGER.info("✅ Response completed in %.2fs", response_time)
-            print(f"\n{TIPF}⏱️ Response time: {response_time:.2f}s{RSTF}")
-
+                self._record_unstreamed_output(request, response, answer, count_tokens)
+                usage = getattr(response, "usage", None)
+            self._report_completion(start_time)
+            self._log_transcript(request, prompt, role_name, start_time, tokens_before, usage, answer)
+            return answer
         except Exception as exc:
-            LOGGER.error("⚠️ Provider error: %s", exc, exc_info=True)
-            print(f"{ERRF}❌ Error: {exc}{RSTF}")
+            self._report_error(exc)
+            self._log_transcript(request, prompt, role_name, start_time, tokens_before, usage, error=exc)
+            return None
 
     def display_tokens_if_any(self) -> None:
         if self.token_tracker.input_tokens or self.token_tracker.output_tokens:
-            self.token_tracker.display()
+            self.token_tracker.display(file=None if self._decorated else sys.stderr)
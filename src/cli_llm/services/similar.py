@@ -0,0 +1,211 @@
+"""Near-duplicate prompt cache built on MinHash signatures and an LSH index.
+
+Prompts are normalised (case, whitespace, line order, dates, clock times and
+long digit runs such as ids are ignored; short numbers like error codes are
+kept) and shingled into word 3-grams.  A 128-permutation MinHash
+signature estimates Jaccard similarity; the signature is split into 32 bands
+of 4 rows whose hashes form the locality-sensitive index, so a lookup only
+compares against entries sharing at least one band bucket.  Entries and band
+buckets live in a small SQLite database under ``CACHE_DIR``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import re
+import sqlite3
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+from ..config import CACHE_DIR
+
+LOGGER = logging.getLogger("cli_llm")
+
+SIMILAR_DB_PATH = CACHE_DIR / "similar.sqlite3"
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DEFAULT_MAX_ENTRIES = 5000
+# Long prompts (pasted logs, files) are rarely repeated near-verbatim and are
+# the costliest to shingle, so they bypass the cache.
+MAX_PROMPT_CHARS = 16 * 1024
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+# Timestamps and ids vary between otherwise identical reports; short numbers
+# (error codes, ports, counts) usually change the question and are kept.
+_VOLATILE_NUMBERS = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[t ]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?"
+    r"|\b\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?\b"
+    r"|\d{6,}"
+)
+_WORDS = re.compile(r"\w+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Lower-case, mask timestamps and ids, and sort lines so trivial edits disappear."""
+    lines = (" ".join(_VOLATILE_NUMBERS.sub("0", line.lower()).split()) for line in text.splitlines())
+    return "\n".join(sorted(line for line in lines if line))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[str]:
+    words = _WORDS.findall(normalize_prompt(text))
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[index : index + size]) for index in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> List[int]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return [_MERSENNE] * NUM_PERM
+    return [min((a * value + b) % _MERSENNE for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(signature: Sequence[int]) -> List[str]:
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS : (band + 1) * ROWS]
+        digest = hashlib.blake2b(array("Q", rows).tobytes(), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+
+def estimate_jaccard(left: Sequence[int], right: Sequence[int]) -> float:
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERM
+
+
+@dataclass(frozen=True, slots=True)
+class SimilarHit:
+    """A cached answer whose prompt is close to the current one."""
+
+    similarity: float
+    created: float
+    model: str
+    answer: str
+
+    @property
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.created)
+
+    def describe_age(self) -> str:
+        age = self.age_seconds
+        for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+            if age >= size:
+                return f"{int(age // size)}{unit} ago"
+        return "just now"
+
+
+class SimilarityCache:
+    """Per-role MinHash/LSH store of previous prompts and answers."""
+
+    def __init__(
+        self,
+        roles: Iterable[str],
+        threshold: float = 0.8,
+        *,
+        path: Path = SIMILAR_DB_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.roles = set(roles)
+        self.threshold = threshold
+        self.path = path
+        self.max_entries = max_entries
+        self._db: Optional[sqlite3.Connection] = None
+
+    def enabled_for(self, role: str) -> bool:
+        return role in self.roles
+
+    def accepts(self, prompt: str, role: str) -> bool:
+        """Whether ``prompt`` is worth hashing for ``role`` at all."""
+        return self.enabled_for(role) and len(prompt) <= MAX_PROMPT_CHARS
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), timeout=5.0)
+            db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY,
+                    role TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    signature BLOB NOT NULL,
+                    answer TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS bands (
+                    bucket TEXT NOT NULL,
+                    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE
+                );
+                CREATE INDEX IF NOT EXISTS bands_bucket ON bands(bucket);
+                CREATE INDEX IF NOT EXISTS bands_entry ON bands(entry_id);
+                """
+            )
+            db.execute("PRAGMA foreign_keys = ON")
+            self._db = db
+        return self._db
+
+    def lookup(self, prompt: str, role: str) -> Optional[SimilarHit]:
+        """Best cached answer for ``role`` at or above the Jaccard threshold."""
+        if not self.accepts(prompt, role):
+            return None
+        signature = minhash(prompt)
+        buckets = band_keys(signature)
+        try:
+            db = self._connect()
+            rows = db.execute(
+                f"""
+                SELECT DISTINCT e.id, e.created, e.model, e.signature, e.answer
+                FROM bands b JOIN entries e ON e.id = b.entry_id
+                WHERE b.bucket IN ({",".join("?" * len(buckets))}) AND e.role = ?
+                """,
+                (*buckets, role),
+            ).fetchall()
+        except sqlite3.Error as exc:
+            LOGGER.warning("⚠️ Similarity cache unavailable: %s", exc)
+            return None
+
+        best: Optional[SimilarHit] = None
+        for _, created, model, blob, answer in rows:
+            score = estimate_jaccard(signature, array("Q", blob))
+            if score >= self.threshold and (best is None or score > best.similarity):
+                best = SimilarHit(score, created, model, answer)
+        return best
+
+    def record(self, prompt: str, role: str, model: str, answer: str) -> None:
+        if not answer or not self.accepts(prompt, role):
+            return
+        signature = minhash(prompt)
+        try:
+            db = self._connect()
+            with db:
+                entry_id = db.execute(
+                    "INSERT INTO entries (role, model, created, signature, answer) VALUES (?, ?, ?, ?, ?)",
+                    (role, model, time.time(), array("Q", signature).tobytes(), answer),
+                ).lastrowid
+                db.executemany(
+                    "INSERT INTO bands (bucket, entry_id) VALUES (?, ?)",
+                    [(bucket, entry_id) for bucket in band_keys(signature)],
+                )
+                db.execute(
+                    "DELETE FROM entries WHERE id NOT IN (SELECT id FROM entries ORDER BY id DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as exc:
+            LOGGER.warning("⚠️ Could not update similarity cache: %s", exc)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
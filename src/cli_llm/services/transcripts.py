@@ -0,0 +1,222 @@
+"""SQLite transcript store behind ``llm history``.
+
+Every chat request is recorded with provider, model, role, timing and token
+usage in ``~/.cli-llm/history.sqlite3``.  The database runs in WAL mode so
+``llm history`` can read while other processes write, and an external-content
+FTS5 table indexes prompts and answers for ranked full-text search.
+
+Writes never happen on the request path: :class:`TranscriptWriter` queues
+records for a background thread that commits them in batches and is flushed
+when the CLI exits.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import DATA_DIR
+
+LOGGER = logging.getLogger("cli_llm")
+
+TRANSCRIPTS_DB_PATH = DATA_DIR / "history.sqlite3"
+WRITE_BATCH = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    provider TEXT,
+    model TEXT,
+    role TEXT,
+    prompt TEXT NOT NULL,
+    answer TEXT NOT NULL DEFAULT '',
+    elapsed REAL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS transcripts_created ON transcripts(created);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    prompt, answer, content='transcripts', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_ai AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts(rowid, prompt, answer) VALUES (new.id, new.prompt, new.answer);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_ad AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, prompt, answer)
+    VALUES ('delete', old.id, old.prompt, old.answer);
+END;
+"""
+
+
+@dataclass(slots=True)
+class TranscriptRecord:
+    created: float
+    prompt: str
+    answer: str = ""
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    role: Optional[str] = None
+    elapsed: Optional[float] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    error: Optional[str] = None
+    id: Optional[int] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "TranscriptRecord":
+        return cls(**{field.name: row[field.name] for field in fields(cls)})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class SearchHit:
+    id: int
+    created: float
+    model: Optional[str]
+    role: Optional[str]
+    snippet: str
+
+
+class TranscriptStore:
+    """Connection wrapper; use one instance per thread."""
+
+    def __init__(self, path: Path = TRANSCRIPTS_DB_PATH) -> None:
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), timeout=5.0)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("PRAGMA synchronous = NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def write_many(self, records: List[TranscriptRecord]) -> None:
+        columns = [field.name for field in fields(TranscriptRecord) if field.name != "id"]
+        db = self._connect()
+        with db:
+            db.executemany(
+                f"INSERT INTO transcripts ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [tuple(getattr(record, column) for column in columns) for record in records],
+            )
+
+    def get(self, transcript_id: int) -> Optional[TranscriptRecord]:
+        row = self._connect().execute("SELECT * FROM transcripts WHERE id = ?", (transcript_id,)).fetchone()
+        return TranscriptRecord.from_row(row) if row else None
+
+    def search(
+        self,
+        query: str,
+        *,
+        limit: int = 20,
+        model: Optional[str] = None,
+        role: Optional[str] = None,
+    ) -> List[SearchHit]:
+        """Best-ranked (BM25) transcripts matching ``query``."""
+        sql = """
+            SELECT t.id, t.created, t.model, t.role,
+                   snippet(transcripts_fts, -1, '[', ']', '…', 12) AS snippet
+            FROM transcripts_fts JOIN transcripts t ON t.id = transcripts_fts.rowid
+            WHERE transcripts_fts MATCH ?
+        """
+        params: List[Any] = []
+        if model:
+            sql += " AND t.model = ?"
+            params.append(model)
+        if role:
+            sql += " AND t.role = ?"
+            params.append(role)
+        # A plain ``ORDER BY rank`` lets FTS5 rank inside the index; any tie-breaker
+        # turns it into a sort over every match.
+        sql += " ORDER BY transcripts_fts.rank LIMIT ?"
+        db = self._connect()
+        try:
+            rows = db.execute(sql, (query, *params, limit)).fetchall()
+        except sqlite3.OperationalError:
+            # Not valid FTS5 syntax (e.g. a stray quote or colon): search the words literally.
+            literal = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+            rows = db.execute(sql, (literal, *params, limit)).fetchall() if literal else []
+        return [SearchHit(row["id"], row["created"], row["model"], row["role"], row["snippet"]) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        db = self._connect()
+        total = db.execute(
+            """
+            SELECT COUNT(*) AS requests, COALESCE(SUM(input_tokens), 0) AS input_tokens,
+                   COALESCE(SUM(output_tokens), 0) AS output_tokens, COUNT(error) AS errors,
+                   MIN(created) AS first, MAX(created) AS last
+            FROM transcripts
+            """
+        ).fetchone()
+        by_model = db.execute(
+            """
+            SELECT provider, model, COUNT(*) AS requests, COALESCE(SUM(input_tokens), 0) AS input_tokens,
+                   COALESCE(SUM(output_tokens), 0) AS output_tokens, AVG(elapsed) AS avg_elapsed,
+                   COUNT(error) AS errors
+            FROM transcripts GROUP BY provider, model ORDER BY requests DESC
+            """
+        ).fetchall()
+        return {"total": dict(total), "models": [dict(row) for row in by_model]}
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class TranscriptWriter:
+    """Queue transcripts for a background thread that commits them in batches."""
+
+    def __init__(self, store: Optional[TranscriptStore] = None) -> None:
+        self.store = store or TranscriptStore()
+        self._queue: "queue.SimpleQueue[Optional[TranscriptRecord]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="cli-llm-transcripts", daemon=True)
+        self._thread.start()
+
+    def record(self, **values: Any) -> None:
+        values.setdefault("created", time.time())
+        self._queue.put(TranscriptRecord(**values))
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            batch: List[TranscriptRecord] = []
+            stop = record is None
+            if record is not None:
+                batch.append(record)
+            while not stop and len(batch) < WRITE_BATCH:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                else:
+                    batch.append(record)
+            if batch:
+                try:
+                    self.store.write_many(batch)
+                except sqlite3.Error as exc:
+                    LOGGER.warning("⚠️ Could not write %s transcript(s): %s", len(batch), exc)
+            if stop:
+                self.store.close()
+                return
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush queued transcripts and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
@@ -2,11 +2,14 @@
 
 from .presets import DEFAULT_TOOL_NAMES, ToolDefinition, get_tool_definitions
 from .service import (
+    AgentLimits,
+    AgentResult,
     ToolCall,
     ToolCallError,
     ToolcallService,
     ToolExecutionResult,
     execute_tool,
+    execute_tools,
     parse_tool_calls,
     parse_streaming_tool_calls,
     safe_stdout,
@@ -16,6 +19,8 @@ from .service import (
 from .system_prompt import build_toolcall_system_prompt
 
 __all__ = [
+    "AgentLimits",
+    "AgentResult",
     "DEFAULT_TOOL_NAMES",
     "ToolCall",
     "ToolCallError",
@@ -24,6 +29,7 @@ __all__ = [
     "ToolcallService",
     "build_toolcall_system_prompt",
     "execute_tool",
+    "execute_tools",
     "get_tool_definitions",
     "parse_tool_calls",
     "parse_streaming_tool_calls",
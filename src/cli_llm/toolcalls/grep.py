@@ -0,0 +1,173 @@
+"""Grep engine behind the ``grep`` tool.
+
+With an ``rg`` binary on ``PATH`` the search is delegated to ripgrep, whose
+output is read as it streams and cut off once the tool's output cap is
+reached.  Otherwise files from the pruned :func:`~.walk.iter_tree` walk are
+searched on a small thread pool: each file is sniffed for a NUL byte in its
+first block (binary files are skipped) and then read line by line, and the
+walk stops as soon as enough output has been collected.  Both engines report
+``path:line:text`` in path order.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import io
+import os
+import re
+import shutil
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Iterable, List, Optional, Pattern
+
+from .walk import PRUNED_DIRS, TreeEntry, iter_tree, relative_to
+
+GREP_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+BINARY_SNIFF_BYTES = 8192
+_STOP_CHECK_LINES = 1024
+
+
+def rg_binary() -> Optional[str]:
+    """The ripgrep executable to delegate to, unless ``CLI_LLM_NO_RG`` is set."""
+    if os.environ.get("CLI_LLM_NO_RG"):
+        return None
+    return shutil.which("rg")
+
+
+def grep(
+    root: Path,
+    cwd: Path,
+    pattern: str,
+    *,
+    glob: Optional[str] = None,
+    ignore_case: bool = False,
+    max_chars: int,
+) -> List[str]:
+    """Matching ``path:line:text`` lines; stops once they exceed ``max_chars``.
+
+    Raises :class:`re.error` for a pattern neither engine accepts.
+    """
+    rg = rg_binary() if root.is_dir() else None
+    if rg is not None:
+        lines = _rg_grep(rg, root, cwd, pattern, glob=glob, ignore_case=ignore_case, max_chars=max_chars)
+        if lines is not None:
+            return lines
+    matcher = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    if root.is_file():
+        files: Iterable[TreeEntry] = [TreeEntry(relative_to(root, cwd), str(root), False)]
+    else:
+        files = iter_tree(root, cwd)
+        if glob:
+            files = (entry for entry in files if _glob_matches(entry.rel, glob))
+    return _python_grep(files, matcher, max_chars)
+
+
+def _glob_matches(rel: str, glob: str) -> bool:
+    """Match ``glob`` the way ``rg --glob`` does: against the basename unless it names a path."""
+    if "/" not in glob:
+        rel = rel.rsplit("/", 1)[-1]
+    return fnmatch.fnmatch(rel, glob)
+
+
+def _rg_grep(
+    rg: str,
+    root: Path,
+    cwd: Path,
+    pattern: str,
+    *,
+    glob: Optional[str],
+    ignore_case: bool,
+    max_chars: int,
+) -> Optional[List[str]]:
+    """ripgrep's matches, or ``None`` when it rejected the pattern or failed."""
+    args = [rg, "--line-number", "--no-heading", "--with-filename", "--color", "never",
+            "--no-require-git", "--sort", "path", "--no-messages", "--hidden", "--glob", "!.*/"]
+    if ignore_case:
+        args.append("--ignore-case")
+    if glob:
+        args += ["--glob", glob]
+    for name in sorted(PRUNED_DIRS):
+        args += ["--glob", f"!{name}/"]
+    args += ["--regexp", pattern]
+    rel = relative_to(root, cwd)
+    if rel:
+        args += ["--", rel]
+    try:
+        process = subprocess.Popen(args, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    lines: List[str] = []
+    size = 0
+    assert process.stdout is not None
+    with process:
+        for raw in io.TextIOWrapper(process.stdout, encoding="utf-8", errors="replace"):
+            line = raw.rstrip("\n")
+            lines.append(line)
+            size += len(line) + 1
+            if size > max_chars:
+                process.kill()
+                break
+    if process.returncode == 2 and not lines:
+        return None
+    return lines
+
+
+def _grep_file(entry: TreeEntry, matcher: Pattern[str], max_chars: int, stop: threading.Event) -> List[str]:
+    hits: List[str] = []
+    size = 0
+    try:
+        with open(entry.path, "rb") as handle:
+            if b"\0" in handle.read(BINARY_SNIFF_BYTES):
+                return hits
+            handle.seek(0)
+            text = io.TextIOWrapper(handle, encoding="utf-8", errors="replace")
+            for number, line in enumerate(text, start=1):
+                if number % _STOP_CHECK_LINES == 0 and stop.is_set():
+                    break
+                if matcher.search(line):
+                    line = line.rstrip("\n")
+                    hit = f"{entry.rel}:{number}:{line}"
+                    hits.append(hit)
+                    size += len(hit) + 1
+                    if size > max_chars:
+                        break
+    except OSError:
+        pass
+    return hits
+
+
+def _python_grep(files: Iterable[TreeEntry], matcher: Pattern[str], max_chars: int) -> List[str]:
+    stop = threading.Event()
+    lines: List[str] = []
+    size = 0
+    pending: Deque[Future] = deque()
+    pool = ThreadPoolExecutor(max_workers=GREP_WORKERS, thread_name_prefix="cli-llm-grep")
+
+    def collect(future: Future) -> bool:
+        nonlocal size
+        for hit in future.result():
+            lines.append(hit)
+            size += len(hit) + 1
+            if size > max_chars:
+                stop.set()
+                return False
+        return True
+
+    try:
+        # A bounded window of in-flight files keeps results in path order
+        # without materializing the whole walk.
+        for entry in files:
+            pending.append(pool.submit(_grep_file, entry, matcher, max_chars, stop))
+            if len(pending) >= GREP_WORKERS * 4 and not collect(pending.popleft()):
+                return lines
+        while pending:
+            if not collect(pending.popleft()):
+                return lines
+        return lines
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
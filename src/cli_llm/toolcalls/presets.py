@@ -16,6 +16,7 @@ class ToolDefinition:
     parameters: Dict[str, Any]
     prompt_snippet: Optional[str] = None
     prompt_guidelines: List[str] = field(default_factory=list)
+    read_only: bool = True  # read-only tools may run concurrently in agent mode
 
 
 DEFAULT_TOOL_NAMES = ["read", "grep", "find", "ls"]
@@ -65,7 +66,10 @@ PRESET_TOOLS: Dict[str, ToolDefinition] = {
     "find": ToolDefinition(
         name="find",
         label="find",
-        description="Find files by glob pattern. Returns paths relative to the working directory.",
+        description=(
+            "Find files by glob pattern. Returns paths relative to the working directory. "
+            "Hidden directories are searched; .git, node_modules, virtualenvs and .gitignored paths are skipped."
+        ),
         prompt_snippet="Find files by glob pattern",
         prompt_guidelines=["Use find for filename or path discovery."],
         parameters=_object_schema(
@@ -104,6 +108,7 @@ PRESET_TOOLS: Dict[str, ToolDefinition] = {
             },
             ["command"],
         ),
+        read_only=False,
     ),
 }
 
@@ -1,20 +1,27 @@
-"""Single tool-call execution service."""
+"""Tool-call execution service: single calls and the multi-step agent loop."""
 
 from __future__ import annotations
 
 import fnmatch
+import heapq
 import json
+import os
 import re
 import subprocess
-from dataclasses import dataclass
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Protocol
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol
 
 from ..providers import ChatRequest
+from .grep import grep
 from .presets import ToolDefinition
 from .system_prompt import build_toolcall_system_prompt
+from .walk import iter_tree
 
 MAX_STDOUT_CHARS = 64 * 1024
+TOOL_WORKERS = 4
 
 
 class ToolCallError(RuntimeError):
@@ -36,6 +43,23 @@ class ToolExecutionResult:
     exit_code: int
 
 
+@dataclass(frozen=True, slots=True)
+class AgentLimits:
+    max_steps: int = 8
+    max_seconds: float = 120.0
+    max_tokens: int = 100_000
+
+
+@dataclass(slots=True)
+class AgentResult:
+    answer: Optional[str]
+    steps: int = 0
+    stopped: str = "answer"  # or "max_steps", "max_seconds", "max_tokens"
+    input_tokens: int = 0
+    output_tokens: int = 0
+    results: List[ToolExecutionResult] = field(default_factory=list)
+
+
 class ToolcallProvider(Protocol):
     def create_chat(self, request: ChatRequest) -> Any:
         ...
@@ -167,6 +191,82 @@ def execute_tool(tool: ToolDefinition, arguments: Dict[str, Any], cwd: Path) ->
     raise ToolCallError(f"No executor for tool {tool.name}.")
 
 
+def _execute_call(call: ToolCall, definitions: Dict[str, ToolDefinition], cwd: Path) -> ToolExecutionResult:
+    """Run ``call``, turning any failure into a result the model can read."""
+    tool = definitions.get(call.name)
+    try:
+        if tool is None:
+            raise ToolCallError(f"Tool '{call.name}' is not enabled.")
+        return execute_tool(tool, call.arguments, cwd)
+    except (ToolCallError, OSError, ValueError, subprocess.TimeoutExpired) as exc:
+        # re.error is a ValueError subclass.
+        return ToolExecutionResult(tool=call.name, arguments=call.arguments, stdout=f"error: {exc}\n", exit_code=1)
+
+
+def execute_tools(
+    calls: List[ToolCall],
+    tools: Iterable[ToolDefinition],
+    cwd: Path,
+    *,
+    max_workers: int = TOOL_WORKERS,
+) -> List[ToolExecutionResult]:
+    """Run one turn's calls, in call order of the results.
+
+    Consecutive read-only calls run concurrently in a bounded thread pool.
+    Any other call (``bash``) is a barrier: every earlier call finishes first,
+    it runs alone, and later calls start only once it is done, so reads see
+    the effects of the commands the model issued before them.
+    """
+    definitions = {tool.name: tool for tool in tools}
+    results: List[ToolExecutionResult] = []
+    batch: List[ToolCall] = []
+    pool: Optional[ThreadPoolExecutor] = None
+
+    def flush() -> None:
+        nonlocal pool
+        if len(batch) > 1 and max_workers > 1:
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cli-llm-tool")
+            results.extend(pool.map(lambda call: _execute_call(call, definitions, cwd), batch))
+        else:
+            results.extend(_execute_call(call, definitions, cwd) for call in batch)
+        batch.clear()
+
+    try:
+        for call in calls:
+            tool = definitions.get(call.name)
+            if tool is None or tool.read_only:
+                batch.append(call)
+                continue
+            flush()
+            results.append(_execute_call(call, definitions, cwd))
+        flush()
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+    return results
+
+
+def _assistant_message(message: Any, calls: List[ToolCall]) -> Dict[str, Any]:
+    return {
+        "role": "assistant",
+        "content": getattr(message, "content", None),
+        "tool_calls": [
+            {
+                "id": call.id,
+                "type": "function",
+                "function": {"name": call.name, "arguments": json.dumps(call.arguments)},
+            }
+            for call in calls
+        ],
+    }
+
+
+def _tool_message(call: ToolCall, result: ToolExecutionResult) -> Dict[str, Any]:
+    content = result.stdout if result.exit_code == 0 else f"{result.stdout}[exit code {result.exit_code}]\n"
+    return {"role": "tool", "tool_call_id": call.id, "content": content}
+
+
 def _execute_read(tool: ToolDefinition, arguments: Dict[str, Any], cwd: Path) -> ToolExecutionResult:
     path = _resolve_path(cwd, arguments["path"])
     lines = path.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
@@ -179,23 +279,23 @@ def _execute_read(tool: ToolDefinition, arguments: Dict[str, Any], cwd: Path) ->
 def _execute_ls(tool: ToolDefinition, arguments: Dict[str, Any], cwd: Path) -> ToolExecutionResult:
     path = _resolve_path(cwd, arguments.get("path"))
     limit = int(arguments.get("limit", 200))
-    entries = []
-    for child in sorted(path.iterdir(), key=lambda item: item.name):
-        entries.append(child.name + ("/" if child.is_dir() else ""))
-        if len(entries) >= limit:
-            break
+    with os.scandir(path) as scanner:
+        # DirEntry.is_dir() answers from the directory listing; only symlinks cost a stat.
+        children = heapq.nsmallest(limit, ((entry.name, entry.is_dir()) for entry in scanner))
+    entries = [name + ("/" if is_dir else "") for name, is_dir in children]
     return ToolExecutionResult(tool=tool.name, arguments=arguments, stdout=safe_stdout("\n".join(entries) + "\n"), exit_code=0)
 
 
 def _execute_find(tool: ToolDefinition, arguments: Dict[str, Any], cwd: Path) -> ToolExecutionResult:
     root = _resolve_path(cwd, arguments.get("path"))
-    pattern = arguments["pattern"]
     limit = int(arguments.get("limit", 200))
+    matcher = re.compile(fnmatch.translate(arguments["pattern"]))
     matches = []
-    for path in sorted(root.rglob("*")):
-        rel = path.relative_to(cwd.resolve()).as_posix()
-        if fnmatch.fnmatch(path.name, pattern) or fnmatch.fnmatch(rel, pattern):
-            matches.append(rel + ("/" if path.is_dir() else ""))
+    # Unlike grep, find keeps hidden directories such as .github visible, as rglob did.
+    for entry in iter_tree(root, cwd.resolve(), include_dirs=True, include_hidden=True):
+        name = entry.rel.rsplit("/", 1)[-1]
+        if matcher.match(name) or matcher.match(entry.rel):
+            matches.append(entry.rel + ("/" if entry.is_dir else ""))
             if len(matches) >= limit:
                 break
     return ToolExecutionResult(tool=tool.name, arguments=arguments, stdout=safe_stdout("\n".join(matches) + "\n"), exit_code=0)
@@ -203,19 +303,17 @@ def _execute_find(tool: ToolDefinition, arguments: Dict[str, Any], cwd: Path) ->
 
 def _execute_grep(tool: ToolDefinition, arguments: Dict[str, Any], cwd: Path) -> ToolExecutionResult:
     root = _resolve_path(cwd, arguments.get("path"))
-    pattern = arguments["pattern"]
-    glob = arguments.get("glob")
-    flags = re.IGNORECASE if arguments.get("ignore_case") else 0
-    matcher = re.compile(pattern, flags)
-    files = [root] if root.is_file() else [path for path in root.rglob("*") if path.is_file()]
-    lines = []
-    for path in sorted(files):
-        rel = path.relative_to(cwd.resolve()).as_posix()
-        if glob and not fnmatch.fnmatch(rel, glob):
-            continue
-        for index, line in enumerate(path.read_text(encoding="utf-8", errors="replace").splitlines(), start=1):
-            if matcher.search(line):
-                lines.append(f"{rel}:{index}:{line}")
+    try:
+        lines = grep(
+            root,
+            cwd.resolve(),
+            arguments["pattern"],
+            glob=arguments.get("glob"),
+            ignore_case=bool(arguments.get("ignore_case")),
+            max_chars=MAX_STDOUT_CHARS,
+        )
+    except re.error as exc:
+        raise ToolCallError(f"Invalid grep pattern: {exc}") from exc
     return ToolExecutionResult(tool=tool.name, arguments=arguments, stdout=safe_stdout("\n".join(lines) + "\n"), exit_code=0)
 
 
@@ -264,3 +362,57 @@ class ToolcallService:
         if tool is None:
             raise ToolCallError(f"Tool '{call.name}' is not enabled.")
         return execute_tool(tool, call.arguments, self.cwd)
+
+    def run_agent(
+        self,
+        *,
+        prompt: str,
+        model: str,
+        tools: List[ToolDefinition],
+        limits: AgentLimits = AgentLimits(),
+        on_result: Optional[Callable[[ToolCall, ToolExecutionResult], None]] = None,
+    ) -> AgentResult:
+        """Feed tool results back to the model until it answers or a limit is hit."""
+        messages: List[Dict[str, Any]] = [
+            {"role": "system", "content": build_toolcall_system_prompt(tools, cwd=self.cwd, agent=True)},
+            {"role": "user", "content": prompt},
+        ]
+        openai_tools = to_openai_tools(tools)
+        outcome = AgentResult(answer=None)
+        started = time.monotonic()
+        while True:
+            if outcome.steps >= limits.max_steps:
+                outcome.stopped = "max_steps"
+                return outcome
+            request = ChatRequest(
+                model=model,
+                messages=list(messages),
+                tools=openai_tools,
+                tool_choice="auto",
+                stream=False,
+            )
+            response = self.provider.create_chat(request)
+            outcome.steps += 1
+            usage = getattr(response, "usage", None)
+            outcome.input_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            outcome.output_tokens += getattr(usage, "completion_tokens", 0) or 0
+            calls = parse_tool_calls(response)
+            message = response.choices[0].message
+            if not calls:
+                outcome.answer = getattr(message, "content", None) or ""
+                return outcome
+
+            messages.append(_assistant_message(message, calls))
+            results = execute_tools(calls, tools, self.cwd)
+            for call, result in zip(calls, results):
+                messages.append(_tool_message(call, result))
+                if on_result is not None:
+                    on_result(call, result)
+            outcome.results.extend(results)
+
+            if outcome.input_tokens + outcome.output_tokens >= limits.max_tokens:
+                outcome.stopped = "max_tokens"
+                return outcome
+            if time.monotonic() - started >= limits.max_seconds:
+                outcome.stopped = "max_seconds"
+                return outcome
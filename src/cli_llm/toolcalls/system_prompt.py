@@ -14,6 +14,7 @@ def build_toolcall_system_prompt(
     *,
     cwd: Path,
     current_date: Optional[str] = None,
+    agent: bool = False,
 ) -> str:
     tool_list = list(tools)
     visible_tools = [
@@ -42,6 +43,20 @@ def build_toolcall_system_prompt(
     guideline_text = "\n".join(f"- {line}" for line in guidelines)
     prompt_date = current_date or date.today().isoformat()
     prompt_cwd = str(cwd).replace("\\", "/")
+    if agent:
+        call_rules = """- Call several tools in one turn when they are independent; they run in parallel.
+- Tool results come back as tool messages; keep calling tools until you can answer.
+- Use only the provided tools.
+- Do not invent tool names or arguments.
+- Prefer read/grep/find/ls over bash for file inspection.
+- When you have enough information, answer in prose without a tool call."""
+    else:
+        call_rules = """- Call at most one tool.
+- Use only the provided tools.
+- Do not invent tool names or arguments.
+- Prefer read/grep/find/ls over bash for file inspection.
+- If no tool is needed, answer normally without a tool call.
+- Do not explain the tool call in prose when calling a tool."""
 
     return f"""You are an expert CLI assistant operating inside cli-llm, a lightweight tool-call harness.
 Use the available tools when they are the safest and most direct way to answer the user.
@@ -50,12 +65,7 @@ Available tools:
 {available_tools}
 
 Tool call rules:
-- Call at most one tool.
-- Use only the provided tools.
-- Do not invent tool names or arguments.
-- Prefer read/grep/find/ls over bash for file inspection.
-- If no tool is needed, answer normally without a tool call.
-- Do not explain the tool call in prose when calling a tool.
+{call_rules}
 
 Guidelines:
 {guideline_text}
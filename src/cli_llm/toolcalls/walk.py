@@ -0,0 +1,187 @@
+"""Pruned directory walking for the file tools.
+
+``Path.rglob`` descends into ``.git``, ``node_modules`` and virtualenvs and
+stats every entry.  :func:`iter_tree` walks with ``os.scandir`` instead,
+using the file types the directory listing already carries, and never enters
+:data:`PRUNED_DIRS`, virtualenvs (directories holding a ``pyvenv.cfg``) or
+anything matched by a ``.gitignore`` between the working directory and the
+entry.  Hidden directories are skipped too unless ``include_hidden`` is set;
+hidden files such as ``.env`` are always listed.
+Entries come out depth-first with names sorted per directory, which is the
+same order as sorting the full paths.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Pattern, Tuple
+
+PRUNED_DIRS = frozenset({".git", ".hg", ".svn", "node_modules", "__pycache__"})
+IGNORE_FILE = ".gitignore"
+
+
+@dataclass(frozen=True, slots=True)
+class TreeEntry:
+    rel: str  # POSIX path relative to the working directory
+    path: str
+    is_dir: bool
+
+
+@dataclass(frozen=True, slots=True)
+class _Rule:
+    base: str  # directory of the .gitignore, relative, with a trailing "/" ("" at the top)
+    regex: Pattern[str]
+    negated: bool
+    dir_only: bool
+
+
+def _glob_to_regex(pattern: str) -> str:
+    out: List[str] = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            out.append("(?:.*/)?")
+            index += 3
+            continue
+        if pattern.startswith("/**", index) and index + 3 == len(pattern):
+            out.append("/.*")
+            break
+        if char == "*":
+            out.append(".*" if pattern.startswith("**", index) else "[^/]*")
+            index += 2 if pattern.startswith("**", index) else 1
+            continue
+        if char == "?":
+            out.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", index + 2)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                body = pattern[index + 1 : end]
+                out.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+                index = end
+        elif char == "\\" and index + 1 < len(pattern):
+            index += 1
+            out.append(re.escape(pattern[index]))
+        else:
+            out.append(re.escape(char))
+        index += 1
+    return "".join(out)
+
+
+def parse_ignore(text: str, base: str = "") -> List[_Rule]:
+    """Rules from the text of a ``.gitignore`` living in directory ``base``."""
+    rules: List[_Rule] = []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated or line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        regex = _glob_to_regex(line.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        rules.append(_Rule(base, re.compile(regex, re.DOTALL), negated, dir_only))
+    return rules
+
+
+class IgnoreRules:
+    """The ``.gitignore`` rules in force for one directory; last match wins."""
+
+    __slots__ = ("rules",)
+
+    def __init__(self, rules: Tuple[_Rule, ...] = ()) -> None:
+        self.rules = rules
+
+    def child(self, directory: str, rel: str) -> "IgnoreRules":
+        try:
+            with open(os.path.join(directory, IGNORE_FILE), encoding="utf-8", errors="replace") as handle:
+                text = handle.read()
+        except OSError:
+            return self
+        added = parse_ignore(text, f"{rel}/" if rel else "")
+        return IgnoreRules(self.rules + tuple(added)) if added else self
+
+    def ignored(self, rel: str, is_dir: bool) -> bool:
+        verdict = False
+        for rule in self.rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.base and not rel.startswith(rule.base):
+                continue
+            if rule.regex.fullmatch(rel[len(rule.base) :]):
+                verdict = not rule.negated
+        return verdict
+
+
+def relative_to(path: Path, cwd: Path) -> str:
+    rel = os.path.relpath(path, cwd)
+    return "" if rel == "." else Path(rel).as_posix()
+
+
+def rules_for(cwd: Path, rel: str) -> IgnoreRules:
+    """Rules from ``cwd`` down to, but excluding, directory ``rel``."""
+    rules = IgnoreRules().child(str(cwd), "") if rel else IgnoreRules()
+    parts = rel.split("/") if rel else []
+    for depth in range(1, len(parts)):
+        sub = "/".join(parts[:depth])
+        rules = rules.child(os.path.join(cwd, sub), sub)
+    return rules
+
+
+def iter_tree(
+    root: Path, cwd: Path, *, include_dirs: bool = False, include_hidden: bool = False
+) -> Iterator[TreeEntry]:
+    """Files (and, if asked, directories) under ``root`` that the tools should see.
+
+    ``root`` and ``cwd`` must already be resolved; paths are reported
+    relative to ``cwd``.
+    """
+    root_rel = relative_to(root, cwd)
+    yield from _walk(str(root), root_rel, rules_for(cwd, root_rel), include_dirs, include_hidden, top=True)
+
+
+def _walk(
+    directory: str, rel: str, rules: IgnoreRules, include_dirs: bool, include_hidden: bool, top: bool = False
+) -> Iterator[TreeEntry]:
+    try:
+        with os.scandir(directory) as scanner:
+            entries = sorted(scanner, key=lambda entry: entry.name)
+    except OSError:
+        return
+    names = {entry.name for entry in entries}
+    if not top and "pyvenv.cfg" in names:
+        return
+    if IGNORE_FILE in names:
+        rules = rules.child(directory, rel)
+    for entry in entries:
+        name = entry.name
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            is_file = not is_dir and entry.is_file()
+        except OSError:
+            continue
+        if not (is_dir or is_file):
+            continue
+        if is_dir and (name in PRUNED_DIRS or (name.startswith(".") and not include_hidden)):
+            continue
+        child_rel = f"{rel}/{name}" if rel else name
+        if rules.rules and rules.ignored(child_rel, is_dir):
+            continue
+        if is_dir:
+            if include_dirs:
+                yield TreeEntry(child_rel, entry.path, True)
+            yield from _walk(entry.path, child_rel, rules, include_dirs, include_hidden)
+        else:
+            yield TreeEntry(child_rel, entry.path, False)
+
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import importlib.util
+import sys
 from dataclasses import dataclass
+from types import ModuleType
 
 RESET_SEQUENCE = "\033[0m"
 
@@ -46,6 +49,27 @@ def colored(text: str, prefix: str, reset: str = RESET_SEQUENCE) -> str:
     return f"{prefix}{text}{reset}"
 
 
+def lazy_import(name: str) -> ModuleType:
+    """Return ``name`` as a module whose body runs on first attribute access.
+
+    Heavy third-party SDKs (``openai``, ``tiktoken``) are only needed by a few
+    code paths; deferring them keeps ``llm --version`` and friends fast.
+    """
+
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
 __all__ = [
     "ColorCodes",
     "CLRS",
@@ -56,5 +80,6 @@ __all__ = [
     "RSTF",
     "NOTF",
     "colored",
+    "lazy_import",
     "RESET_SEQUENCE",
 ]
@@ -9,7 +9,7 @@ from unittest.mock import patch
 
 from click.testing import CliRunner
 
-from cli_llm.cli import cli, _AGENTS_MAX_BYTES
+from cli_llm.cli import cli
 from cli_llm.services import sanitize_input
 
 
@@ -71,18 +71,20 @@ def test_missing_file_warns_stderr(tmp_path, capsys) -> None:
     assert mock_service.chat.call_args.kwargs["agents_context_text"] == ""
 
 
-def test_large_file_truncation(tmp_path, capsys) -> None:
-    """Files larger than 16 KB are truncated and a warning is emitted."""
+def test_large_file_drops_trailing_sections(tmp_path, capsys) -> None:
+    """AGENTS.md over its token budget loses whole sections from the end, with a warning."""
     agents_file = tmp_path / "AGENTS.md"
-    content = "A" * (_AGENTS_MAX_BYTES + 1000)
-    agents_file.write_text(content)
+    sections = [f"## Section {index}\n" + "word " * 40 + "\n" for index in range(10)]
+    agents_file.write_text("# Project\nOverview.\n" + "".join(sections))
 
     from cli_llm.cli import _run_chat
     from cli_llm.config import ConfigLoader
 
     app_config = ConfigLoader().load()
+    app_config.agents_budget = 150
 
     with patch("cli_llm.cli.os.getcwd", return_value=str(tmp_path)), \
+         patch("cli_llm.services.context_pack.token_counter", return_value=lambda text: len(text.split())), \
          patch("cli_llm.cli.ChatService") as MockCS, \
          patch("cli_llm.cli.ProviderRouter"), \
          patch("cli_llm.cli.ResponseRenderer"), \
@@ -108,9 +110,11 @@ def test_large_file_truncation(tmp_path, capsys) -> None:
         )
 
     captured = capsys.readouterr()
-    assert "truncating" in captured.err.lower()
+    assert "context trimmed" in captured.err
+    assert "dropped 7 of 11 sections (Section 3, Section 4" in captured.err
     passed_text = mock_service.chat.call_args.kwargs["agents_context_text"]
-    assert len(passed_text) <= _AGENTS_MAX_BYTES
+    assert passed_text.startswith("# Project\nOverview.\n## Section 0")
+    assert "## Section 2" in passed_text and "## Section 3" not in passed_text
 
 
 def test_sanitization_applied(tmp_path, capsys) -> None:
@@ -190,3 +194,16 @@ def test_agents_context_appended_to_system_message() -> None:
     assert "# Project Context (AGENTS.md)" in sys_msg
     assert "# My Project Context" in sys_msg
     assert "AGENTS.md" not in user_msg
+
+
+def test_small_context_is_not_tokenized() -> None:
+    """Input whose byte count fits the budget never loads the tokenizer."""
+    from cli_llm.cli import _pack_chat_context
+    from cli_llm.config import ConfigLoader
+
+    app_config = ConfigLoader().load()
+    with patch("cli_llm.services.context_pack.token_counter", side_effect=AssertionError("tokenized")):
+        prompt, agents, left = _pack_chat_context(app_config, "gpt-4o", "coder", "why?", "log line\n", "# Rules\n")
+
+    assert (prompt, agents) == ("why?\nlog line\n", "# Rules\n")
+    assert 0 < left < 128000
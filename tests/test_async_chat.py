@@ -0,0 +1,90 @@
+"""Tests for the async provider, ChatService.achat and async renderer."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from cli_llm.config import AppConfig
+from cli_llm.providers import AsyncOpenAIProvider, ProviderRouter, TransportPool
+from cli_llm.renderers import ResponseRenderer
+from cli_llm.services import ChatService, TokenTracker
+
+
+def _chunk(content: str) -> SimpleNamespace:
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class _AsyncStream:
+    def __init__(self, chunks) -> None:
+        self._chunks = list(chunks)
+        self.model = "async-model"
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._chunks:
+            raise StopAsyncIteration
+        await asyncio.sleep(0)
+        return self._chunks.pop(0)
+
+
+class AsyncDummyProvider:
+    def __init__(self) -> None:
+        self.config = AppConfig()
+        self.requests = []
+
+    async def create_chat_async(self, request):
+        self.requests.append(request)
+        if request.stream:
+            return _AsyncStream([_chunk("a"), _chunk("b")])
+        return SimpleNamespace(
+            model="async-model",
+            usage=SimpleNamespace(completion_tokens=3),
+            choices=[SimpleNamespace(finish_reason="stop", message=SimpleNamespace(content="done"))],
+        )
+
+
+def test_router_resolves_pooled_async_provider() -> None:
+    pool = TransportPool()
+    config = AppConfig(api_key="k")
+
+    first = ProviderRouter(config, transports=pool).resolve_async()
+    second = ProviderRouter(config, transports=pool).resolve_async()
+
+    assert isinstance(first, AsyncOpenAIProvider)
+    assert first.client() is second.client()
+    asyncio.run(pool.aclose())
+
+
+def test_async_renderer_concatenates_stream() -> None:
+    renderer = ResponseRenderer(AppConfig())
+
+    content = asyncio.run(
+        renderer.aprocess_streamed_chunk(_AsyncStream([_chunk("x"), _chunk("y")]), count_tokens=True)
+    )
+
+    assert content == "xy"
+
+
+def test_achat_runs_concurrently_on_one_loop(monkeypatch) -> None:
+    provider = AsyncDummyProvider()
+    tracker = TokenTracker()
+    service = ChatService(provider, ResponseRenderer(AppConfig()), tracker)
+    monkeypatch.setattr(ChatService, "count_tokens_in_messages", lambda self, messages, model: 2)
+    monkeypatch.setattr(ChatService, "count_tokens_in_text", lambda self, text, model: 1)
+
+    async def fan_out() -> None:
+        await asyncio.gather(
+            service.achat("one", no_stream=False, model="m", role_name="coder", count_tokens=True),
+            service.achat("two", no_stream=True, model="m", role_name="coder", count_tokens=True),
+        )
+
+    asyncio.run(fan_out())
+
+    assert sorted(request.stream for request in provider.requests) == [False, True]
+    assert tracker.input_tokens == 4
+    # Streamed deltas ("a", "b") are counted one by one; the non-stream answer reports usage.
+    assert tracker.output_tokens == 2 + 3
+    assert tracker.estimated_output == 2
@@ -55,6 +55,16 @@ models = ["file-model", "deepseek-chat"]
     assert config.providers["deepseek"]["models"] == ["file-model", "deepseek-chat"]
 
 
+def test_empty_environment_does_not_fall_back_to_process_environment(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("OPENAI_API_KEY", "daemon-key")
+    monkeypatch.setenv("OPENAI_MODEL", "daemon-model")
+    loader = ConfigLoader(user_config_path=tmp_path / "missing.toml")
+
+    assert loader.load(environment={}).api_key != "daemon-key"
+    assert loader.load(environment={}).default_model != "daemon-model"
+    assert loader.load().api_key == "daemon-key"
+
+
 def test_environment_overrides_file_and_defaults(tmp_path) -> None:
     config_path = tmp_path / "config.toml"
     config_path.write_text(
@@ -128,3 +138,55 @@ model = "legacy-model"
     assert config.api_key == "legacy-key"
     assert config.api_endpoint == "https://legacy.example/v1"
     assert config.default_model == "legacy-model"
+
+
+def test_provider_profiles_keep_transport_settings(tmp_path, monkeypatch) -> None:
+    _clear_config_env(monkeypatch)
+    config_path = tmp_path / "config.toml"
+    config_path.write_text(
+        """
+[providers.local]
+api_endpoint = "http://localhost:1234/v1"
+max_connections = 8
+keepalive_expiry = 60
+connect_timeout = 2.5
+http2 = true
+read_timeout = "slow"
+""",
+        encoding="utf-8",
+    )
+
+    config = ConfigLoader(user_config_path=config_path).load(environment={})
+
+    profile = config.providers["local"]
+    assert profile["max_connections"] == 8
+    assert profile["keepalive_expiry"] == 60.0
+    assert profile["connect_timeout"] == 2.5
+    assert profile["http2"] is True
+    assert "read_timeout" not in profile
+
+
+def test_provider_profiles_reject_fractional_integer_settings(tmp_path, monkeypatch) -> None:
+    _clear_config_env(monkeypatch)
+    config_path = tmp_path / "config.toml"
+    config_path.write_text(
+        """
+[providers.local]
+max_connections = 2.5
+max_keepalive_connections = 4.0
+cache_max_bytes = 1.5
+cache_ttl = 30
+cache = 1
+""",
+        encoding="utf-8",
+    )
+
+    config = ConfigLoader(user_config_path=config_path).load(environment={})
+
+    profile = config.providers["local"]
+    assert "max_connections" not in profile
+    assert profile["max_keepalive_connections"] == 4
+    assert isinstance(profile["max_keepalive_connections"], int)
+    assert "cache_max_bytes" not in profile
+    assert profile["cache_ttl"] == 30.0
+    assert "cache" not in profile
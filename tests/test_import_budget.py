@@ -0,0 +1,78 @@
+"""Cold-start import budgets for the ``llm`` entry point."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+HEAVY_MODULES = ("openai", "rich", "tiktoken", "prompt_toolkit", "httpx")
+# Generous ceiling for ``import cli_llm.cli``; the eager graph used to cost ~500ms.
+IMPORT_BUDGET_US = 200_000
+
+
+def _run_python(code: str, *args: str, tmp_path: Path) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    env["HOME"] = str(tmp_path)
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+
+
+def _loaded_after(argv: list[str], tmp_path: Path) -> list[str]:
+    code = f"""
+import json, sys
+sys.argv = {json.dumps(["llm", *argv])}
+from cli_llm.cli import main
+try:
+    main()
+except SystemExit:
+    pass
+# lazy_import() registers placeholder modules; only count ones that actually ran.
+loaded = [
+    name for name in {HEAVY_MODULES!r}
+    if name in sys.modules and type(sys.modules[name]).__name__ != "_LazyModule"
+]
+print(json.dumps(sorted(loaded)), file=sys.stderr)
+"""
+    completed = _run_python(code, tmp_path=tmp_path)
+    return json.loads(completed.stderr.strip().splitlines()[-1])
+
+
+def test_import_cli_stays_within_importtime_budget(tmp_path) -> None:
+    completed = _run_python("import cli_llm.cli", "-X", "importtime", tmp_path=tmp_path)
+    assert completed.returncode == 0, completed.stderr
+
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative[name.strip()] = int(cumulative_us)
+
+    assert not [name for name in HEAVY_MODULES if name in cumulative]
+    assert cumulative["cli_llm.cli"] < IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--version"],
+        ["inspect"],
+        ["provider", "models"],
+        ["toolcall", "--list-tools"],
+    ],
+)
+def test_light_subcommands_skip_heavy_dependencies(argv, tmp_path) -> None:
+    assert _loaded_after(argv, tmp_path) == []
@@ -0,0 +1,135 @@
+"""Tests for the model metadata registry and its use in chat accounting."""
+
+from __future__ import annotations
+
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from cli_llm.config import AppConfig, ConfigLoader
+from cli_llm.models import ContextWindowExceeded, ModelInfo, ModelRegistry, model_registry
+from cli_llm.services import ChatService, TokenTracker
+from cli_llm.services import session as session_module
+
+
+class _Provider:
+    def __init__(self, config: AppConfig, response=None) -> None:
+        self.config = config
+        self.response = response
+        self.requests = []
+
+    def create_chat(self, request):
+        self.requests.append(request)
+        return self.response
+
+
+class _Renderer:
+    decorated = False
+    events = None
+
+    def process_unstreamed_chunk(self, response, *args, **kwargs) -> str:
+        return response.choices[0].message.content
+
+
+class _ByteEncoding:
+    def encode(self, text: str):
+        return list(text.encode("utf-8"))
+
+
+def test_dated_and_prefixed_names_resolve_to_base_entry() -> None:
+    registry = ModelRegistry()
+
+    assert registry.get("gpt-4o-2024-08-06").encoding == "o200k_base"
+    assert registry.get("gpt-4o-mini-2024-07-18").input_price == 0.15
+    assert registry.get("openai/gpt-4o").context_window == 128000
+    assert registry.get("gpt-4o-2024-08-06") is registry.get("gpt-4o-2024-08-06")
+    assert registry.get("gpt-4-0613").context_window == 8192
+    unknown = registry.get("my-local-model")
+    assert unknown == ModelInfo(name="my-local-model")
+    assert unknown.supports("json_mode") and unknown.cost(10, 10) is None
+
+
+def test_variants_do_not_fall_back_to_a_shorter_family_name() -> None:
+    registry = ModelRegistry()
+
+    for name in ("gpt-4-turbo", "gpt-4-turbo-2024-04-09", "openai/gpt-4-turbo"):
+        info = registry.get(name)
+        assert info.context_window == 128000 and info.supports("json_mode"), name
+    assert registry.get("gpt-4-32k").context_window == 32768
+    assert not registry.get("gpt-3.5-turbo-instruct").supports("tools")
+    assert "gpt-4-vision-experimental" not in registry
+    assert registry.get("gpt-4o-realtime").context_window is None
+
+
+def test_config_overrides_merge_field_by_field(tmp_path) -> None:
+    path = tmp_path / "config.toml"
+    path.write_text(
+        '[models."gpt-4o"]\ninput_price = 2\n\n'
+        '[models."llama3"]\ncontext_window = 8192\ncapabilities = ["tools"]\nencoding = 7\n',
+        encoding="utf-8",
+    )
+    config = ConfigLoader(user_config_path=path).load(environment={})
+    registry = model_registry(config.models)
+
+    assert registry.get("gpt-4o").input_price == 2.0
+    assert registry.get("gpt-4o").output_price == 10.0
+    llama = registry.get("llama3")
+    assert llama.context_window == 8192 and llama.encoding == "cl100k_base"
+    assert not llama.supports("json_mode")
+    assert model_registry() is model_registry()
+
+
+def test_cost_prices_cached_input_separately() -> None:
+    info = ModelRegistry().get("gpt-4o")
+
+    assert info.cost(1_000_000, 0) == pytest.approx(2.5)
+    assert info.cost(1_000_000, 1_000_000, cached_tokens=400_000) == pytest.approx(0.6 * 2.5 + 0.4 * 1.25 + 10)
+
+
+def test_chat_charges_registry_prices_and_reports_unknown_models() -> None:
+    usage = SimpleNamespace(
+        prompt_tokens=1000,
+        completion_tokens=500,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=200),
+    )
+    response = SimpleNamespace(
+        model="gpt-4o-mini-2024-07-18",
+        choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+        usage=usage,
+    )
+    tracker = TokenTracker()
+    service = ChatService(_Provider(AppConfig(), response), _Renderer(), tracker)
+
+    service.chat("hi", no_stream=True, model="gpt-4o-mini", role_name="coder", count_tokens=True)
+    response.model = "my-local-model"
+    service.chat("hi", no_stream=True, model="my-local-model", role_name="coder", count_tokens=True)
+
+    assert tracker.cost == pytest.approx((800 * 0.15 + 200 * 0.075 + 500 * 0.6) / 1_000_000)
+    out = io.StringIO()
+    tracker.display(file=out)
+    assert "excluding my-local-model: no pricing" in out.getvalue()
+
+
+def test_oversized_prompt_is_refused_before_sending(monkeypatch, capsys) -> None:
+    monkeypatch.setattr(session_module.tiktoken, "get_encoding", lambda name: _ByteEncoding())
+    config = AppConfig(models={"tiny": {"context_window": 600}})
+    provider = _Provider(config)
+    service = ChatService(provider, _Renderer(), TokenTracker())
+
+    service.chat("x" * 1000, no_stream=True, model="tiny", role_name="coder")
+
+    assert provider.requests == []
+    assert "accepts at most 600" in capsys.readouterr().err
+    with pytest.raises(ContextWindowExceeded):
+        service._preflight(service.build_request("x" * 1000, "tiny", "coder"))
+
+
+def test_json_mode_is_skipped_for_models_without_it() -> None:
+    config = AppConfig(models={"plain": {"capabilities": ["tools"]}})
+    service = ChatService(_Provider(config), _Renderer(), TokenTracker())
+
+    request = service.build_request("list files", "plain", "coder", json_output=True)
+
+    assert request.response_format is None
+    assert "JSON" in request.messages[-1]["content"]
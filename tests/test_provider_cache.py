@@ -0,0 +1,165 @@
+"""Tests for the on-disk response cache."""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from cli_llm.config import AppConfig
+from cli_llm.providers import (
+    CachingProvider,
+    ChatRequest,
+    ProviderError,
+    ResponseCache,
+    request_key,
+    with_response_cache,
+)
+from cli_llm.renderers import ResponseRenderer
+
+
+def _chunk(content: str, finish_reason=None) -> SimpleNamespace:
+    return SimpleNamespace(
+        model="live-model",
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)],
+    )
+
+
+class FakeProvider:
+    def __init__(self) -> None:
+        self.config = AppConfig(api_endpoint="https://api.example/v1")
+        self.calls = 0
+
+    def create_chat(self, request):
+        self.calls += 1
+        if request.stream:
+            return iter([_chunk("Hello "), _chunk("world", finish_reason="stop")])
+        return SimpleNamespace(
+            model="live-model",
+            choices=[
+                SimpleNamespace(
+                    message=SimpleNamespace(content="Hello world", tool_calls=None),
+                    finish_reason="stop",
+                )
+            ],
+            usage=SimpleNamespace(prompt_tokens=3, completion_tokens=2),
+        )
+
+
+def _request(stream: bool = True, **overrides) -> ChatRequest:
+    params = dict(model="m", messages=[{"role": "user", "content": "hi"}], temperature=0.0, stream=stream)
+    params.update(overrides)
+    return ChatRequest(**params)
+
+
+def test_request_key_ignores_stream_flag_but_not_parameters() -> None:
+    endpoint = "https://api.example/v1"
+    assert request_key(_request(stream=True), endpoint) == request_key(_request(stream=False), endpoint)
+    assert request_key(_request(), endpoint) != request_key(_request(temperature=0.5), endpoint)
+    assert request_key(_request(), endpoint) != request_key(_request(), "https://other/v1")
+
+
+def test_streamed_miss_is_stored_and_replayed_through_renderer(tmp_path, capsys) -> None:
+    inner = FakeProvider()
+    provider = CachingProvider(inner, ResponseCache(root=tmp_path))
+    renderer = ResponseRenderer(AppConfig())
+
+    first = renderer.process_streamed_chunk(provider.create_chat(_request()), count_tokens=True)
+    live_output = capsys.readouterr().out
+    second = renderer.process_streamed_chunk(provider.create_chat(_request()), count_tokens=True)
+
+    assert inner.calls == 1
+    assert first == second == "Hello world"
+    assert capsys.readouterr().out == live_output
+
+
+def test_non_stream_hit_keeps_usage(tmp_path) -> None:
+    inner = FakeProvider()
+    provider = CachingProvider(inner, ResponseCache(root=tmp_path))
+    provider.create_chat(_request(stream=False))
+
+    cached = provider.create_chat(_request(stream=False))
+
+    assert inner.calls == 1
+    assert cached.choices[0].message.content == "Hello world"
+    assert cached.usage.completion_tokens == 2
+
+
+def test_interrupted_stream_is_not_cached(tmp_path) -> None:
+    inner = FakeProvider()
+    provider = CachingProvider(inner, ResponseCache(root=tmp_path))
+    stream = iter(provider.create_chat(_request()))
+    next(stream)
+    stream.close()
+
+    provider.create_chat(_request())
+    assert inner.calls == 2
+
+
+def test_cache_only_miss_raises_without_network(tmp_path) -> None:
+    inner = FakeProvider()
+    provider = CachingProvider(inner, ResponseCache(root=tmp_path), offline=True)
+
+    with pytest.raises(ProviderError):
+        provider.create_chat(_request())
+    assert inner.calls == 0
+
+
+def test_expired_entries_are_dropped(tmp_path) -> None:
+    cache = ResponseCache(root=tmp_path, ttl=10)
+    cache.put("ab" * 32, {"content": "old"})
+    path = tmp_path / "ab" / f"{'ab' * 32}.json"
+    path.write_text(json.dumps({"content": "old", "created": time.time() - 60}))
+
+    assert cache.get("ab" * 32) is None
+    assert not path.exists()
+
+
+def test_eviction_drops_least_recently_used(tmp_path) -> None:
+    cache = ResponseCache(root=tmp_path, max_bytes=10_000)
+    keys = [f"{index:02d}" * 32 for index in range(3)]
+    for key in keys:
+        cache.put(key, {"content": "x" * 3000})
+    old = time.time() - 100
+    for offset, key in enumerate(keys):
+        os.utime(tmp_path / key[:2] / f"{key}.json", (old + offset, old + offset))
+    assert cache.get(keys[0]) is not None  # touch: now most recently used
+
+    cache.put("ff" * 32, {"content": "x" * 3000})
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+
+
+def test_profile_enables_cache_without_flag() -> None:
+    inner = FakeProvider()
+    config = AppConfig(provider="ci", providers={"ci": {"cache": True, "cache_ttl": 60.0}})
+
+    wrapped = with_response_cache(inner, config)
+
+    assert isinstance(wrapped, CachingProvider)
+    assert wrapped.cache.ttl == 60.0
+    assert with_response_cache(inner, AppConfig()) is inner
+
+
+def test_cli_cache_only_miss_exits_nonzero(tmp_path, monkeypatch) -> None:
+    from unittest.mock import patch
+
+    from click.testing import CliRunner
+
+    from cli_llm import cli as cli_module
+    from cli_llm.providers import cache as cache_module
+
+    monkeypatch.setattr(cache_module, "RESPONSE_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(cli_module, "connect_daemon", lambda config: None)
+    monkeypatch.setattr(cli_module, "ProviderRouter", lambda config: SimpleNamespace(resolve=FakeProvider))
+    with patch("cli_llm.cli.select.select", return_value=([], [], [])), \
+         patch("cli_llm.services.transcripts.TranscriptWriter"):
+        miss = CliRunner().invoke(cli_module.cli, ["chat", "--cache-only", "--no-similar", "hi"])
+
+    assert miss.exit_code == 1
+    assert "no cached response" in miss.output
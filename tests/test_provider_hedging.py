@@ -0,0 +1,120 @@
+"""Tests for hedged requests and failover routing."""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from cli_llm.config import AppConfig
+from cli_llm.providers import ChatRequest, HedgedProvider, OpenAIProvider, ProviderRouter
+
+_REQUEST = httpx.Request("POST", "https://api.example/v1/chat/completions")
+
+
+def _chunk(content: str) -> SimpleNamespace:
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class _Stream:
+    def __init__(self, pieces, first_delay: float = 0.0) -> None:
+        self.pieces = list(pieces)
+        self.first_delay = first_delay
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        if self.closed.wait(self.first_delay):  # like a socket closed under a blocked read
+            raise httpx.ReadError("closed")
+        for piece in self.pieces:
+            if self.closed.is_set():
+                return
+            yield _chunk(piece)
+
+    def close(self) -> None:
+        self.closed.set()
+
+
+class FakeProvider:
+    def __init__(self, name: str, result) -> None:
+        self.config = AppConfig(provider=name, default_model=f"{name}-model")
+        self.result = result
+        self.models: list[str] = []
+
+    def create_chat(self, request):
+        self.models.append(request.model)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _request() -> ChatRequest:
+    return ChatRequest(model="primary-model", messages=[], stream=True)
+
+
+def test_hedge_starts_fallback_after_threshold_and_cancels_loser() -> None:
+    slow = _Stream(["late"], first_delay=0.3)
+    primary = FakeProvider("primary", slow)
+    backup = FakeProvider("backup", _Stream(["fast", " answer"]))
+
+    stream = HedgedProvider([primary, backup], hedge_after=0.05).create_chat(_request())
+
+    assert "".join(chunk.choices[0].delta.content for chunk in stream) == "fast answer"
+    assert stream.provider == "backup"
+    assert backup.models == ["backup-model"]
+    assert slow.closed.wait(2)
+
+
+def test_losers_are_closed_as_soon_as_a_winner_claims_the_race() -> None:
+    stuck = _Stream(["never"], first_delay=30)
+    started = time.monotonic()
+
+    stream = HedgedProvider(
+        [FakeProvider("primary", stuck), FakeProvider("backup", _Stream(["fast"]))], hedge_after=0.05
+    ).create_chat(_request())
+
+    assert stuck.closed.wait(1)
+    assert [chunk.choices[0].delta.content for chunk in stream] == ["fast"]
+    assert time.monotonic() - started < 1
+
+
+def test_connection_error_fails_over_immediately() -> None:
+    primary = FakeProvider("primary", openai.APIConnectionError(request=_REQUEST))
+    backup = FakeProvider("backup", _Stream(["ok"]))
+
+    stream = HedgedProvider([primary, backup]).create_chat(_request())
+
+    assert [chunk.choices[0].delta.content for chunk in stream] == ["ok"]
+
+
+def test_client_errors_do_not_fail_over() -> None:
+    error = openai.BadRequestError(
+        "bad", response=httpx.Response(400, request=_REQUEST), body=None
+    )
+    backup = FakeProvider("backup", _Stream(["unused"]))
+
+    with pytest.raises(openai.BadRequestError):
+        HedgedProvider([FakeProvider("primary", error), backup]).create_chat(_request())
+    assert backup.models == []
+
+
+def test_router_wraps_profiles_with_fallbacks() -> None:
+    config = AppConfig(
+        provider="main",
+        default_model="main-model",
+        providers={
+            "main": {"fallbacks": ["spare", "missing"], "hedge_after": 0.5},
+            "spare": {"api_endpoint": "https://spare.example/v1", "default_model": "spare-model"},
+        },
+    )
+
+    provider = ProviderRouter(config).resolve()
+
+    assert isinstance(provider, HedgedProvider)
+    assert provider.hedge_after == 0.5
+    assert [member.config.provider for member in provider.providers] == ["main", "spare"]
+    assert provider.providers[1].config.api_endpoint == "https://spare.example/v1"
+    assert isinstance(ProviderRouter(AppConfig()).resolve(), OpenAIProvider)
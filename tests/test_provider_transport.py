@@ -0,0 +1,46 @@
+"""Tests for the pooled provider transport layer."""
+
+from __future__ import annotations
+
+from cli_llm.config import AppConfig
+from cli_llm.providers import ProviderRouter, TransportPool, TransportSettings
+from cli_llm.providers import transport as transport_module
+
+
+def test_router_shares_one_client_per_endpoint_and_key() -> None:
+    pool = TransportPool()
+    config = AppConfig(api_key="k1", api_endpoint="https://a.example/v1")
+
+    first = ProviderRouter(config, transports=pool).resolve().client()
+    second = ProviderRouter(config, transports=pool).resolve().client()
+    other_key = ProviderRouter(
+        AppConfig(api_key="k2", api_endpoint="https://a.example/v1"), transports=pool
+    ).resolve().client()
+
+    assert first is second
+    assert other_key is not first
+    pool.close()
+
+
+def test_transport_settings_read_from_active_profile() -> None:
+    config = AppConfig(
+        api_key="k",
+        provider="local",
+        providers={"local": {"max_connections": 4, "keepalive_expiry": 30.0, "read_timeout": 12.5}},
+    )
+
+    client = TransportPool().client(config)
+    kwargs = TransportSettings.from_profile(config.providers["local"]).httpx_kwargs()
+
+    assert kwargs["limits"].max_connections == 4
+    assert kwargs["limits"].keepalive_expiry == 30.0
+    assert kwargs["timeout"].read == 12.5
+    assert kwargs["timeout"].connect == 5.0
+    assert client.timeout.read == 12.5
+
+
+def test_http2_falls_back_when_h2_missing(monkeypatch) -> None:
+    monkeypatch.setattr(transport_module.importlib.util, "find_spec", lambda name: None)
+
+    assert TransportSettings(http2=True).httpx_kwargs()["http2"] is False
+    assert TransportSettings().httpx_kwargs()["http2"] is False
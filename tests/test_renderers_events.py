@@ -0,0 +1,77 @@
+"""Tests for the ``--events`` JSONL stream."""
+
+from __future__ import annotations
+
+import io
+import json
+from types import SimpleNamespace
+
+from cli_llm.config import AppConfig
+from cli_llm.renderers import EventLog, ResponseRenderer
+from cli_llm.services import ChatService, TokenTracker
+
+
+def _chunk(content=None, finish_reason=None, usage=None) -> SimpleNamespace:
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)],
+        usage=usage,
+    )
+
+
+class _Provider:
+    def __init__(self, result) -> None:
+        self.config = AppConfig(provider="local")
+        self.result = result
+
+    def create_chat(self, request):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _run(result) -> list[dict]:
+    sink = io.StringIO()
+    renderer = ResponseRenderer(AppConfig(frame_interval=0), events=EventLog(sink))
+    service = ChatService(_Provider(result), renderer, TokenTracker())
+    service.chat("hi", no_stream=False, model="m", role_name="coder")
+    return [json.loads(line) for line in sink.getvalue().splitlines()]
+
+
+def test_stream_events_cover_the_request_lifecycle(capsys) -> None:
+    usage = SimpleNamespace(prompt_tokens=4, completion_tokens=2, total_tokens=6)
+    events = _run(
+        [
+            _chunk(),
+            _chunk("Hel"),
+            _chunk("lo", finish_reason="stop"),
+            SimpleNamespace(choices=[], usage=usage),
+        ]
+    )
+
+    assert [event["event"] for event in events] == [
+        "request",
+        "connected",
+        "first_token",
+        "delta",
+        "delta",
+        "finish",
+        "usage",
+        "done",
+    ]
+    assert events[0] == {"event": "request", "t": 0.0, "provider": "local", "model": "m", "stream": True}
+    assert [event["content"] for event in events if event["event"] == "delta"] == ["Hel", "lo"]
+    assert [event["index"] for event in events if event["event"] == "delta"] == [0, 1]
+    assert events[2]["ttft"] is not None
+    assert events[6]["completion_tokens"] == 2
+    times = [event["t"] for event in events]
+    assert times == sorted(times)
+    assert capsys.readouterr().out == ""
+
+
+def test_provider_failure_emits_error_event(capsys) -> None:
+    events = _run(ConnectionError("refused"))
+
+    assert [event["event"] for event in events] == ["request", "error"]
+    assert events[-1]["type"] == "ConnectionError"
+    assert events[-1]["message"] == "refused"
+    assert capsys.readouterr().out == ""
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import io
+import json
 from types import SimpleNamespace
 
 from cli_llm.config import AppConfig
-from cli_llm.renderers import ResponseRenderer, highlight_code_blocks
+from cli_llm.renderers import ResponseRenderer, highlight_code_blocks, resolve_output_format
+from cli_llm.renderers.live_markdown import MarkdownBlockSplitter
 
 
 def _chunk(content: str) -> SimpleNamespace:
@@ -61,3 +64,71 @@ def test_process_unstreamed_chunk_formats_output(capsys) -> None:
     stdout = capsys.readouterr().out
     assert "reasoning" in stdout.lower()
     assert "[Length exceeded max_tokens limit]" in stdout
+
+
+def test_block_splitter_commits_each_block_once() -> None:
+    splitter = MarkdownBlockSplitter()
+    committed = [splitter.feed(piece) for piece in ["# Ti", "tle\n\nFirst para", "graph.\n", "\nTail"]]
+
+    assert committed == [None, "# Title\n\n", None, "First paragraph.\n\n"]
+    assert splitter.tail == "Tail"
+    assert splitter.flush() == "Tail"
+
+
+def test_block_splitter_keeps_open_fence_as_tail() -> None:
+    splitter = MarkdownBlockSplitter()
+
+    assert splitter.feed("```python\nx = 1\n\ny = 2\n") is None
+    assert splitter.in_fence
+    assert splitter.feed("```\nafter") == "```python\nx = 1\n\ny = 2\n```\n"
+    assert splitter.tail == "after"
+
+
+def test_process_streamed_chunk_renders_text_once(capsys) -> None:
+    renderer = ResponseRenderer(AppConfig())
+    response = [_chunk("unique"), _chunk("-marker\n\nsecond "), _chunk("block")]
+
+    content = renderer.process_streamed_chunk(response)
+    output = capsys.readouterr().out
+
+    assert content == "unique-marker\n\nsecond block"
+    assert output.count("unique-marker") == 1
+    assert output.count("second block") == 1
+
+
+def test_resolve_output_format_auto_detects_tty() -> None:
+    class _Tty(io.StringIO):
+        def isatty(self) -> bool:
+            return True
+
+    assert resolve_output_format("auto", io.StringIO()) == "raw"
+    assert resolve_output_format(None, _Tty()) == "markdown"
+    assert resolve_output_format("jsonl", _Tty()) == "jsonl"
+
+
+def test_raw_and_plain_bypass_rich(capsys) -> None:
+    chunks = [_chunk("# Title\n"), _chunk("**bold** ünï")]
+
+    raw = ResponseRenderer(AppConfig(frame_interval=0), output_format="raw")
+    assert raw.process_streamed_chunk(chunks) == "# Title\n**bold** ünï"
+    assert capsys.readouterr().out == "# Title\n**bold** ünï"
+
+    plain = ResponseRenderer(AppConfig(frame_interval=0), output_format="plain")
+    plain.process_streamed_chunk(chunks)
+    assert capsys.readouterr().out == "# Title\n**bold** ünï\n"
+
+
+def test_jsonl_emits_one_record_per_response(capsys) -> None:
+    renderer = ResponseRenderer(AppConfig(), output_format="jsonl")
+    response = SimpleNamespace(
+        model="m",
+        choices=[SimpleNamespace(finish_reason="stop", message=SimpleNamespace(content="hi"))],
+        usage=SimpleNamespace(prompt_tokens=1, completion_tokens=2, total_tokens=3),
+    )
+
+    renderer.process_unstreamed_chunk(response, response_time=0.5)
+    record = json.loads(capsys.readouterr().out)
+
+    assert record["content"] == "hi"
+    assert record["usage"]["completion_tokens"] == 2
+    assert record["finish_reason"] == "stop"
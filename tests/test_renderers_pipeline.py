@@ -0,0 +1,84 @@
+"""Tests for the reader/writer stream pipeline."""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from cli_llm.config import AppConfig
+from cli_llm.renderers import ResponseRenderer
+from cli_llm.renderers.pipeline import StreamPipeline
+
+
+def _chunk(content) -> SimpleNamespace:
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+def test_fast_stream_is_coalesced_into_few_frames() -> None:
+    release = threading.Event()
+
+    def stream():
+        yield _chunk("first ")
+        release.wait(1)
+        for index in range(200):
+            yield _chunk(f"{index} ")
+
+    pipeline = StreamPipeline(stream(), frame_interval=0.05)
+    frames = []
+    for frame in pipeline.frames():
+        frames.append(frame)
+        release.set()
+        time.sleep(0.01)  # a slow terminal
+
+    assert "".join(frames) == "first " + "".join(f"{index} " for index in range(200))
+    assert frames[0] == "first "
+    assert pipeline.stats.chunks == 201
+    assert pipeline.stats.frames == len(frames) < 20
+    assert pipeline.stats.max_queue_depth > 1
+
+
+def test_reader_errors_surface_after_delivered_text() -> None:
+    def stream():
+        yield _chunk("partial")
+        yield _chunk(None)
+        raise ConnectionError("dropped")
+
+    pipeline = StreamPipeline(stream(), frame_interval=0)
+    received = []
+    with pytest.raises(ConnectionError):
+        for frame in pipeline.frames():
+            received.append(frame)
+
+    assert received == ["partial"]
+
+
+def test_stopping_early_closes_the_response() -> None:
+    class Stream:
+        closed = False
+
+        def __iter__(self):
+            while not self.closed:
+                yield _chunk("x")
+                time.sleep(0.001)
+
+        def close(self):
+            self.closed = True
+
+    stream = Stream()
+    frames = StreamPipeline(stream, frame_interval=0).frames()
+    next(frames)
+    frames.close()
+
+    assert stream.closed
+
+
+def test_renderer_exposes_stream_stats() -> None:
+    renderer = ResponseRenderer(AppConfig(frame_interval=0))
+
+    renderer.process_streamed_chunk([_chunk("a"), _chunk("b")])
+
+    assert renderer.stream_stats.chunks == 2
+    assert renderer.stream_stats.frames >= 1
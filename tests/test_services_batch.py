@@ -0,0 +1,106 @@
+"""Tests for resumable JSONL batch execution."""
+
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from cli_llm.services.batch import BatchInputError, parse_batch_line, run_batch
+
+
+class FlakyAsyncProvider:
+    def __init__(self, failing: set[str]) -> None:
+        self.failing = failing
+        self.prompts: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create_chat_async(self, request):
+        import asyncio
+
+        prompt = request.messages[-1]["content"]
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        if prompt in self.failing:
+            raise RuntimeError(f"boom {prompt}")
+        return SimpleNamespace(
+            model=request.model,
+            usage=SimpleNamespace(prompt_tokens=3, completion_tokens=5),
+            choices=[SimpleNamespace(finish_reason="stop", message=SimpleNamespace(content=prompt.upper()))],
+        )
+
+
+def _write_input(tmp_path, count: int):
+    path = tmp_path / "prompts.jsonl"
+    lines = [json.dumps({"id": f"r{index}", "prompt": f"q{index}"}) for index in range(count)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def _run(provider, input_path, tmp_path, concurrency=3):
+    return run_batch(
+        provider,
+        input_path,
+        output_path=tmp_path / "out.jsonl",
+        checkpoint_path=tmp_path / "out.ckpt",
+        default_model="m",
+        default_role="coder",
+        concurrency=concurrency,
+    )
+
+
+def test_batch_writes_results_and_resumes_only_unfinished(tmp_path) -> None:
+    input_path = _write_input(tmp_path, 10)
+    provider = FlakyAsyncProvider(failing={"q4"})
+
+    stats = _run(provider, input_path, tmp_path)
+
+    assert (stats.done, stats.failed, stats.output_tokens) == (9, 1, 45)
+    assert provider.max_in_flight <= 3
+    results = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text().splitlines()]
+    by_id = {item["id"]: item for item in results}
+    assert by_id["r1"]["content"] == "Q1"
+    assert by_id["r4"]["status"] == "error"
+    assert "r4" not in (tmp_path / "out.ckpt").read_text().split()
+
+    retry = FlakyAsyncProvider(failing=set())
+    stats = _run(retry, input_path, tmp_path)
+
+    assert retry.prompts == ["q4"]
+    assert (stats.done, stats.skipped, stats.failed) == (10, 9, 0)
+
+
+def test_parse_batch_line_accepts_chat_request_records() -> None:
+    record = parse_batch_line(
+        json.dumps({"id": 7, "model": "x", "messages": [{"role": "user", "content": "hi"}]}),
+        1,
+        default_model="m",
+        default_role="coder",
+    )
+
+    assert record.id == "7"
+    assert record.request.model == "x"
+    assert record.request.stream is False
+
+    with pytest.raises(BatchInputError, match="line 2"):
+        parse_batch_line('{"nope": 1}', 2, default_model="m", default_role="coder")
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        {"prompt": "hi", "temperature": 0.1},
+        {"messages": [{"role": "user", "content": "hi"}], "temperature": 0.1},
+    ],
+)
+def test_record_temperature_wins_over_the_cli_default(record) -> None:
+    explicit = parse_batch_line(json.dumps(record), 1, default_model="m", default_role="coder", temperature=0.9)
+    del record["temperature"]
+    fallback = parse_batch_line(json.dumps(record), 2, default_model="m", default_role="coder", temperature=0.9)
+
+    assert (explicit.request.temperature, fallback.request.temperature) == (0.1, 0.9)
@@ -0,0 +1,170 @@
+"""Tests for rolling-summary session compaction."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from click.testing import CliRunner
+
+from cli_llm import cli as cli_module
+from cli_llm.config import ConfigLoader
+from cli_llm.services import conversation as conversation_module
+from cli_llm.services import compaction as compaction_module
+from cli_llm.services.compaction import CompactionPolicy, compact
+from cli_llm.services.conversation import SUMMARY_PREFIX, Conversation, SessionMessage
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+def _fill(conversation: Conversation, turns: int, start: int = 0) -> None:
+    for index in range(start, start + turns):
+        conversation.append(
+            SessionMessage("user", f"question {index}", 10),
+            SessionMessage("assistant", f"answer {index}", 10),
+        )
+
+
+def test_compaction_summarizes_older_turns_and_keeps_recent_verbatim(tmp_path) -> None:
+    conversation = Conversation("long", root=tmp_path)
+    _fill(conversation, 10)
+    prompts = []
+
+    assert compact(conversation, lambda prompt: prompts.append(prompt) or "- asked 6 things", _words, keep_turns=4)
+
+    assert "USER: question 0" in prompts[0] and "question 6" not in prompts[0]
+    window = conversation.window(budget=1000)
+    assert window[0].to_message() == {"role": "system", "content": SUMMARY_PREFIX + "- asked 6 things"}
+    assert [message.content for message in window[1::2]] == [f"question {index}" for index in range(6, 10)]
+    assert conversation.live_tokens() == 4 + 8 * 10
+
+
+def test_second_compaction_rolls_the_previous_summary_forward(tmp_path) -> None:
+    conversation = Conversation("long", root=tmp_path)
+    _fill(conversation, 6)
+    compact(conversation, lambda prompt: "first summary", _words, keep_turns=2)
+    _fill(conversation, 4, start=6)
+    prompts = []
+
+    compact(conversation, lambda prompt: prompts.append(prompt) or "second summary", _words, keep_turns=2)
+
+    assert "Previous summary:\nfirst summary" in prompts[0]
+    assert "question 4" in prompts[0] and "question 3" not in prompts[0]
+    window = conversation.window(budget=1000)
+    assert window[0].content == "second summary"
+    assert [message.content for message in window[1::2]] == ["question 8", "question 9"]
+
+
+def test_turns_appended_during_compaction_stay_verbatim(tmp_path) -> None:
+    conversation = Conversation("busy", root=tmp_path)
+    _fill(conversation, 6)
+
+    def summarize(prompt: str) -> str:
+        _fill(conversation, 1, start=99)  # the user kept chatting meanwhile
+        return "summary"
+
+    compact(conversation, summarize, _words, keep_turns=1)
+
+    contents = [message.content for message in conversation.window(budget=1000)]
+    assert contents == ["summary", "question 5", "answer 5", "question 99", "answer 99"]
+
+
+def test_window_keeps_the_summary_when_newer_turns_fill_the_budget(tmp_path) -> None:
+    conversation = Conversation("full", root=tmp_path)
+    _fill(conversation, 6)
+    compact(conversation, lambda prompt: "summary", _words, keep_turns=2)
+    _fill(conversation, 3, start=6)
+
+    window = conversation.window(budget=50)  # three 14-token messages plus the 5-token summary
+
+    assert [message.content for message in window] == ["summary", "question 8", "answer 8"]
+    assert [message.content for message in conversation.window(budget=4)] == []
+
+
+def test_a_lost_or_stale_index_is_rebuilt_on_the_next_append(tmp_path) -> None:
+    conversation = Conversation("crashed", root=tmp_path)
+    _fill(conversation, 6)
+    compact(conversation, lambda prompt: "summary", _words, keep_turns=2)
+    conversation.index_path.unlink()
+
+    _fill(conversation, 1, start=6)
+
+    assert conversation.latest_summary().content == "summary"
+    assert conversation.window(budget=1000)[0].content == "summary"
+
+
+def test_short_sessions_and_locked_sessions_are_left_alone(tmp_path, monkeypatch) -> None:
+    conversation = Conversation("short", root=tmp_path)
+    _fill(conversation, 3)
+    assert not compact(conversation, lambda prompt: "x", _words, keep_turns=4)
+
+    _fill(conversation, 5, start=3)
+    nested = []
+
+    def summarize(prompt: str) -> str:
+        nested.append(compact(conversation, lambda inner: "inner", _words, keep_turns=1))
+        return "outer"
+
+    assert compact(conversation, summarize, _words, keep_turns=1)
+    assert nested == [False]
+
+
+def test_policy_reads_sessions_table_and_spawns_detached(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "config.toml"
+    path.write_text('[sessions]\ncompact_at = 0.25\nkeep_turns = 2\ncompact_model = "gpt-4o-mini"\n')
+    policy = CompactionPolicy.from_config(ConfigLoader(user_config_path=path).load(environment={}))
+
+    assert (policy.compact_at, policy.keep_turns, policy.model) == (0.25, 2, "gpt-4o-mini")
+    assert policy.due(3000, 10000) and not policy.due(2000, 10000)
+
+    launched = []
+    monkeypatch.setattr(compaction_module.subprocess, "Popen", lambda args, **kwargs: launched.append((args, kwargs)))
+    compaction_module.spawn_compaction("long", "gpt-4o")
+    compaction_module.spawn_compaction("long", "deepseek-chat", "deepseek")
+
+    args, kwargs = launched[0]
+    assert args[-5:] == ["session", "compact", "long", "--for-model", "gpt-4o"]
+    assert kwargs["start_new_session"] is True
+    assert launched[1][0][-7:] == ["session", "compact", "long", "--for-model", "deepseek-chat", "--provider", "deepseek"]
+
+
+def test_session_compact_summarizes_with_the_chats_provider_and_model(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "config.toml"
+    path.write_text('[defaults]\nprovider = "openai"\n\n[providers.deepseek]\napi_key = "k"\n', encoding="utf-8")
+    for key in ConfigLoader.env_key_map:
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setattr(cli_module, "CONFIG_LOADER", ConfigLoader(user_config_path=path))
+    monkeypatch.setattr(conversation_module.Conversation.__init__, "__defaults__", (tmp_path,))
+    _fill(Conversation("chat", root=tmp_path), 6)
+    used = []
+
+    class Router:
+        def __init__(self, config) -> None:
+            used.append((config.provider, config.default_model))
+
+        def resolve(self):
+            message = SimpleNamespace(content="summary")
+            return SimpleNamespace(create_chat=lambda request: SimpleNamespace(choices=[SimpleNamespace(message=message)]))
+
+    monkeypatch.setattr(cli_module, "ProviderRouter", Router)
+
+    result = CliRunner().invoke(
+        cli_module.cli, ["session", "compact", "chat", "--for-model", "deepseek-chat", "--provider", "deepseek"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert used == [("deepseek", "deepseek-chat")]
+
+
+def test_live_tokens_come_from_the_running_total(tmp_path, monkeypatch) -> None:
+    conversation = Conversation("tally", root=tmp_path)
+    _fill(conversation, 6)
+    assert conversation.live_tokens() == 120
+    compact(conversation, lambda prompt: "two words", _words, keep_turns=2)
+    _fill(conversation, 1, start=6)
+    monkeypatch.setattr(Conversation, "live", lambda self: pytest.fail("scanned the log"))
+
+    assert conversation.live_tokens() == 2 + 6 * 10
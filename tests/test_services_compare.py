@@ -0,0 +1,86 @@
+"""Tests for concurrent provider/model comparison."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from cli_llm.config import AppConfig
+from cli_llm.renderers import ResponseRenderer
+from cli_llm.renderers.compare import ComparisonView
+from cli_llm.services import ChatService, TokenTracker
+from cli_llm.services.compare import CompareResult, parse_targets, run_compare
+
+
+class _Stream:
+    def __init__(self, pieces, usage=None, delay=0.0) -> None:
+        self._chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+            for piece in pieces
+        ]
+        if usage is not None:
+            self._chunks.append(SimpleNamespace(choices=[], usage=SimpleNamespace(completion_tokens=usage)))
+        self._delay = delay
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._chunks:
+            raise StopAsyncIteration
+        await asyncio.sleep(self._delay)
+        return self._chunks.pop(0)
+
+
+class StreamingProvider:
+    def __init__(self, stream=None, error: str | None = None) -> None:
+        self.config = AppConfig()
+        self._stream = stream
+        self._error = error
+
+    async def create_chat_async(self, request):
+        if self._error:
+            raise RuntimeError(self._error)
+        return self._stream
+
+
+def _entry(name: str, provider):
+    service = ChatService(provider, ResponseRenderer(AppConfig()), TokenTracker())
+    request = service.build_request("hi", "m", "coder")
+    return CompareResult(provider=name, model="m"), service, request
+
+
+def test_parse_targets_expands_providers_models_and_pins() -> None:
+    assert parse_targets("a,b:x", "m1,m2", "active") == [("a", "m1"), ("a", "m2"), ("b", "x")]
+    assert parse_targets(None, None, "active") == [("active", None)]
+
+
+def test_run_compare_records_timings_usage_and_errors(monkeypatch) -> None:
+    monkeypatch.setattr(ChatService, "count_tokens_in_text", lambda self, text, model: 6)
+    entries = [
+        _entry("fast", StreamingProvider(_Stream(["a", "b"], usage=2))),
+        _entry("slow", StreamingProvider(_Stream(["c", "d", "e"], delay=0.01))),
+        _entry("down", StreamingProvider(error="503")),
+    ]
+
+    fast, slow, down = asyncio.run(run_compare(entries))
+
+    assert fast.content == "ab" and fast.output_tokens == 2 and not fast.tokens_estimated
+    assert slow.output_tokens == 6 and slow.tokens_estimated
+    assert slow.ttft is not None and slow.latency >= slow.ttft
+    assert down.error == "503"
+    assert set(fast.to_dict()) >= {"ttft", "latency", "tokens_per_second", "content"}
+
+    rendered = ComparisonView([fast, slow, down]).renderable()
+    assert len(rendered.columns) == 3
+
+
+def test_output_tokens_fall_back_to_a_size_estimate_offline(monkeypatch) -> None:
+    def offline(self, text, model):
+        raise ConnectionError("cannot fetch encoding")
+
+    monkeypatch.setattr(ChatService, "count_tokens_in_text", offline)
+
+    (result,) = asyncio.run(run_compare([_entry("offline", StreamingProvider(_Stream(["abcd", "efgh"])))]))
+
+    assert (result.output_tokens, result.tokens_estimated, result.error) == (2, True, None)
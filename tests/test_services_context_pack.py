@@ -0,0 +1,73 @@
+"""Tests for the token-budgeted context packer."""
+
+from __future__ import annotations
+
+from cli_llm.models import ModelInfo
+from cli_llm.services.context_pack import ContextPart, default_budget, pack_context, size_bound
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+def test_fitting_context_is_left_alone() -> None:
+    parts = [ContextPart("prompt", "explain this"), ContextPart("stdin", "one\ntwo\n", strategy="log")]
+
+    packed = pack_context(parts, 100, _words)
+
+    assert packed.parts == {"prompt": "explain this", "stdin": "one\ntwo\n"}
+    assert packed.tokens == 4 and not packed.trimmed
+
+
+def test_logs_keep_head_and_tail_around_an_omission_marker() -> None:
+    log = "".join(f"line {index} ok\n" for index in range(100))
+    parts = [ContextPart("prompt", "why did it fail"), ContextPart("stdin", log, strategy="log", priority=1)]
+
+    packed = pack_context(parts, 90, _words)
+
+    kept = packed.parts["stdin"].splitlines()
+    assert kept[0] == "line 0 ok" and kept[-1] == "line 99 ok"
+    assert any("lines omitted" in line for line in kept)
+    assert packed.tokens <= 90
+    assert packed.dropped[0] == "stdin: kept first 6 and last 18 of 100 lines (300 → 77 tokens)"
+
+
+def test_lowest_priority_is_trimmed_first_and_fixed_parts_never() -> None:
+    agents = "# Top\nintro\n## Style\n" + "rule " * 50 + "\n"
+    parts = [
+        ContextPart("system role", "be brief"),
+        ContextPart("prompt", "question " * 10),
+        ContextPart("stdin", "data " * 20, strategy="log", priority=1),
+        ContextPart("AGENTS.md", agents, strategy="markdown", priority=0),
+    ]
+
+    packed = pack_context(parts, 40, _words)
+
+    assert packed.parts["AGENTS.md"] == "# Top\nintro\n"
+    assert packed.parts["stdin"] == "data " * 20
+    assert packed.parts["prompt"] == "question " * 10
+    assert packed.dropped == ["AGENTS.md: dropped 1 of 2 sections (Style) (55 → 3 tokens)"]
+
+
+def test_headings_inside_code_fences_do_not_split_sections() -> None:
+    agents = "# Build\n```sh\n# not a heading\nmake\n```\n## Test\n" + "pytest " * 30
+    parts = [ContextPart("AGENTS.md", agents, strategy="markdown", cap=15)]
+
+    packed = pack_context(parts, 1000, _words)
+
+    assert packed.parts["AGENTS.md"] == "# Build\n```sh\n# not a heading\nmake\n```\n"
+
+
+def test_default_budget_reserves_room_for_the_answer() -> None:
+    assert default_budget(ModelInfo("m", context_window=128000, max_output=16384)) == 128000 - 16384
+    assert default_budget(ModelInfo("m", context_window=8192, max_output=8192)) == 8192 - 2048
+    assert default_budget(ModelInfo("unknown")) == 32768
+
+
+def test_size_bound_proves_fit_from_byte_counts_alone() -> None:
+    parts = [ContextPart("prompt", "héllo"), ContextPart("AGENTS.md", "x" * 50, strategy="markdown", cap=60)]
+
+    assert size_bound(parts, 100) == 56
+    assert size_bound(parts, 55) is None
+    parts[1].cap = 40
+    assert size_bound(parts, 100) is None
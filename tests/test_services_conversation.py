@@ -0,0 +1,108 @@
+"""Tests for append-only session logs and history threading."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from cli_llm.config import AppConfig
+from cli_llm.services import ChatService, TokenTracker
+from cli_llm.services.conversation import Conversation, SessionMessage
+
+
+def _turn(index: int, tokens: int = 10) -> tuple:
+    return (
+        SessionMessage("user", f"question {index}", tokens, "cl100k_base"),
+        SessionMessage("assistant", f"answer {index}", tokens, "cl100k_base"),
+    )
+
+
+def test_window_reads_newest_whole_turns_within_budget(tmp_path) -> None:
+    conversation = Conversation("debug-42", root=tmp_path)
+    for index in range(300):
+        conversation.append(*_turn(index))
+
+    window = conversation.window(budget=60)
+
+    assert [message.content for message in window] == [
+        "question 298",
+        "answer 298",
+        "question 299",
+        "answer 299",
+    ]
+    assert len(conversation.messages()) == 600
+
+
+def test_window_reads_only_the_tail_of_an_uncompacted_log(tmp_path, monkeypatch) -> None:
+    conversation = Conversation("long", root=tmp_path)
+    for index in range(300):
+        conversation.append(*_turn(index))
+    read = []
+    records = Conversation._reverse_records
+    monkeypatch.setattr(Conversation, "_reverse_records", lambda self: (read.append(1) or item for item in records(self)))
+
+    conversation.window(budget=60)
+
+    assert len(read) <= 5  # the four messages that fit and the one that did not
+
+
+def test_window_starts_on_a_user_message(tmp_path) -> None:
+    conversation = Conversation("s", root=tmp_path)
+    conversation.append(*_turn(0, tokens=5))
+    conversation.append(SessionMessage("user", "big question", 50), SessionMessage("assistant", "short", 5))
+
+    window = conversation.window(budget=20)
+
+    assert window == []
+    assert [message.role for message in conversation.window(budget=90)] == ["user", "assistant"] * 2
+
+
+def test_torn_final_line_is_skipped_and_repaired(tmp_path) -> None:
+    conversation = Conversation("s", root=tmp_path)
+    conversation.append(*_turn(0))
+    with conversation.path.open("ab") as handle:
+        handle.write(b'{"role": "user", "content": "half wri')
+
+    assert [message.content for message in conversation.messages()] == ["question 0", "answer 0"]
+
+    conversation.append(*_turn(1))
+
+    assert [message.content for message in conversation.messages()] == [
+        "question 0",
+        "answer 0",
+        "question 1",
+        "answer 1",
+    ]
+
+
+def test_invalid_session_names_are_rejected(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        Conversation("../etc/passwd", root=tmp_path)
+
+
+def test_history_sits_between_system_and_prompt_and_chat_returns_answer() -> None:
+    class Provider:
+        config = AppConfig()
+
+        def create_chat(self, request):
+            self.request = request
+            return SimpleNamespace(model="m", choices=[SimpleNamespace(message=SimpleNamespace(content="42"))])
+
+    class Renderer:
+        decorated = False
+        events = None
+
+        def process_unstreamed_chunk(self, response, *args, **kwargs):
+            return response.choices[0].message.content
+
+    provider = Provider()
+    service = ChatService(provider, Renderer(), TokenTracker())
+    history = [message.to_message() for message in _turn(0)]
+
+    answer = service.chat("and now?", no_stream=True, model="m", role_name="coder", history=history)
+
+    assert answer == "42"
+    roles = [message["role"] for message in provider.request.messages]
+    assert roles == ["system", "user", "assistant", "user"]
+    assert provider.request.messages[1]["content"] == "question 0"
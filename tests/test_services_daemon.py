@@ -0,0 +1,88 @@
+"""Tests for the warm daemon and its thin client provider."""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from cli_llm.config import AppConfig, ConfigLoader
+from cli_llm.providers import ChatRequest, ProviderError, TransportPool
+from cli_llm.services import daemon as daemon_module
+
+
+def _chunk(content):
+    return SimpleNamespace(
+        model="warm-model",
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=None)],
+        usage=None,
+    )
+
+
+class FakeClient:
+    built = 0
+
+    def __init__(self) -> None:
+        FakeClient.built += 1
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def close(self) -> None:
+        pass
+
+    def _create(self, **params):
+        self.requests.append(params)
+        if params["model"] == "broken":
+            raise RuntimeError("upstream exploded")
+        if params.get("stream"):
+            return iter([_chunk("Hello"), _chunk(", "), _chunk("world")])
+        return SimpleNamespace(
+            model="warm-model",
+            usage=None,
+            choices=[SimpleNamespace(finish_reason="stop", message=SimpleNamespace(content="full"))],
+        )
+
+
+@pytest.fixture()
+def running_daemon(tmp_path, monkeypatch):
+    FakeClient.built = 0
+    monkeypatch.setattr(TransportPool, "_build_client", lambda self, *args: FakeClient())
+    socket_path = tmp_path / "d.sock"
+    loader = ConfigLoader(user_config_path=tmp_path / "missing.toml")
+    thread = threading.Thread(target=daemon_module.serve, args=(loader, socket_path), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while daemon_module.ping(socket_path) is None:
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.01)
+    yield socket_path
+    daemon_module.shutdown(socket_path)
+    thread.join(timeout=5)
+
+
+def test_daemon_streams_chunks_and_reuses_pooled_client(running_daemon) -> None:
+    provider = daemon_module.DaemonProvider(AppConfig(), socket_path=running_daemon, environment={})
+    request = ChatRequest(model="m", messages=[{"role": "user", "content": "hi"}], stream=True)
+
+    first = "".join(chunk.choices[0].delta.content for chunk in provider.create_chat(request))
+    second = "".join(chunk.choices[0].delta.content for chunk in provider.create_chat(request))
+
+    assert first == second == "Hello, world"
+    assert FakeClient.built == 1
+
+
+def test_daemon_non_stream_and_error_frames(running_daemon) -> None:
+    provider = daemon_module.DaemonProvider(AppConfig(), socket_path=running_daemon, environment={})
+
+    response = provider.create_chat(ChatRequest(model="m", messages=[]))
+    assert response.choices[0].message.content == "full"
+    assert response.model == "warm-model"
+
+    with pytest.raises(ProviderError, match="upstream exploded"):
+        provider.create_chat(ChatRequest(model="broken", messages=[]))
+
+
+def test_connect_daemon_falls_back_when_not_running(tmp_path) -> None:
+    assert daemon_module.connect_daemon(AppConfig(), socket_path=tmp_path / "none.sock") is None
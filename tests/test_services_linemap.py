@@ -0,0 +1,82 @@
+"""Tests for the stdin line map filter."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from cli_llm.providers import ChatRequest
+from cli_llm.services.linemap import map_lines, render_template
+
+
+class DelayedProvider:
+    """Answers later lines faster so ordering has to be restored."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create_chat_async(self, request):
+        prompt = request.messages[-1]["content"]
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        number = int(prompt.split()[-1])
+        await asyncio.sleep(0.02 / number)
+        self.in_flight -= 1
+        if number == 3:
+            raise RuntimeError("bad line")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer\n{number}"))]
+        )
+
+
+def _build(prompt: str) -> ChatRequest:
+    return ChatRequest(model="m", messages=[{"role": "user", "content": prompt}])
+
+
+def _run(ordered: bool):
+    provider = DelayedProvider()
+    source = io.StringIO("".join(f"item {index}\n" for index in range(1, 9)))
+    sink, errors = io.StringIO(), io.StringIO()
+    stats = map_lines(
+        provider, _build, "Echo {line}", source, sink, errors, concurrency=3, ordered=ordered
+    )
+    return provider, stats, sink.getvalue().splitlines(), errors.getvalue()
+
+
+def test_map_preserves_order_and_keeps_failed_line_slot() -> None:
+    provider, stats, lines, errors = _run(ordered=True)
+
+    assert lines == ["answer 1", "answer 2", "", "answer 4", "answer 5", "answer 6", "answer 7", "answer 8"]
+    assert (stats.lines, stats.failed) == (8, 1)
+    assert provider.max_in_flight <= 3
+    assert "line 3: bad line" in errors
+
+
+def test_map_unordered_emits_every_success() -> None:
+    _, stats, lines, _ = _run(ordered=False)
+
+    assert sorted(lines) == sorted(f"answer {index}" for index in (1, 2, 4, 5, 6, 7, 8))
+    assert stats.failed == 1
+
+
+class _BrokenSource(io.StringIO):
+    def readline(self, *args):
+        line = super().readline(*args)
+        if not line:
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+        return line
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_map_reraises_stdin_read_errors_instead_of_hanging(ordered) -> None:
+    with pytest.raises(UnicodeDecodeError):
+        map_lines(DelayedProvider(), _build, "{line}", _BrokenSource("item 1\n"), io.StringIO(), io.StringIO(), ordered=ordered)
+
+
+def test_render_template_appends_line_without_placeholder() -> None:
+    assert render_template("Summarise:", "row") == "Summarise:\nrow"
+    assert render_template("<{line}>", "row") == "<row>"
@@ -0,0 +1,138 @@
+"""Tests for map-reduce over oversized stdin."""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from cli_llm.providers import ChatRequest, ProviderError, ResponseCache
+from cli_llm.services.mapreduce import NOTHING_RELEVANT, MapReduce, group_partials, split_chunks
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+def _log(lines: int) -> str:
+    return "".join(f"event {index} ok\n" for index in range(lines))
+
+
+class _Provider:
+    """Answers map prompts with the excerpt's first line; tracks concurrency."""
+
+    def __init__(self, fail_on: str = "") -> None:
+        self.config = SimpleNamespace(api_endpoint="http://test")
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def create_chat(self, request):
+        prompt = request.messages[-1]["content"]
+        with self._lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self._lock:
+            self.active -= 1
+        if self.fail_on and self.fail_on in prompt:
+            raise ConnectionError("boom")
+        if "--- Excerpt ---" in prompt:
+            excerpt = prompt.split("--- Excerpt ---\n", 1)[1]
+            answer = excerpt.splitlines()[0] if "event 1 " in excerpt or "event 3" in excerpt else NOTHING_RELEVANT
+        else:
+            answer = "combined"
+        return SimpleNamespace(model="m", choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+
+
+def _runner(provider, cache=None, **kwargs) -> MapReduce:
+    defaults = dict(chunk_tokens=30, overlap_tokens=6, reduce_tokens=500, concurrency=2, cache=cache)
+    defaults.update(kwargs)
+    return MapReduce(
+        provider,
+        lambda prompt: ChatRequest(model="m", messages=[{"role": "user", "content": prompt}]),
+        _words,
+        **defaults,
+    )
+
+
+def test_chunks_overlap_and_keep_boundaries_when_input_grows() -> None:
+    chunks = split_chunks(_log(40), _words, chunk_tokens=30, overlap_tokens=6)
+    grown = split_chunks(_log(60), _words, chunk_tokens=30, overlap_tokens=6)
+
+    assert all(_words(chunk) <= 30 for chunk in chunks)
+    assert chunks[0].splitlines()[-2:] == chunks[1].splitlines()[:2]
+    assert grown[: len(chunks) - 1] == chunks[:-1]
+    assert "".join(chunk.splitlines(keepends=True)[-1] for chunk in grown).endswith("event 59 ok\n")
+
+
+def test_map_runs_bounded_and_reduces_relevant_partials() -> None:
+    provider = _Provider()
+    runner = _runner(provider)
+
+    final = runner.run("which events ran?", _log(40))
+
+    assert provider.peak <= 2
+    assert runner.stats.chunks == len(provider.prompts) > 2  # no intermediate reduce
+    assert "--- Partial answer 1 ---\nevent 0 ok" in final
+    assert NOTHING_RELEVANT not in final
+    assert runner.stats.reduce_rounds == 1
+
+
+def test_rerun_over_grown_input_only_maps_new_chunks(tmp_path) -> None:
+    cache = ResponseCache(root=tmp_path)
+    first = _runner(_Provider(), cache)
+    first.run("q", _log(40))
+
+    provider = _Provider()
+    second = _runner(provider, cache)
+    second.run("q", _log(60))
+
+    mapped = [prompt for prompt in provider.prompts if "--- Excerpt ---" in prompt]
+    assert second.stats.cached == first.stats.chunks - 1
+    assert len(mapped) == second.stats.chunks - second.stats.cached
+
+
+def test_oversized_partials_are_reduced_in_rounds() -> None:
+    provider = _Provider()
+    runner = _runner(provider, reduce_tokens=60)
+    partials = [f"partial {index} " + "detail " * 10 for index in range(8)]
+
+    final = runner.run("q", "".join(f"event 1 {p}\n" for p in partials) * 2)
+
+    assert runner.stats.reduce_rounds >= 2
+    assert "combined" in final
+    assert group_partials(["a b", "c d", "e f"], _words, 1) == [["a b", "c d", "e f"]]
+
+
+def test_all_chunks_failing_raises_provider_error() -> None:
+    runner = _runner(_Provider(fail_on="Excerpt"))
+
+    with pytest.raises(ProviderError):
+        runner.run("q", _log(40))
+    assert runner.stats.failed == runner.stats.chunks
+
+
+def test_reduce_failures_are_retried_then_raised_as_provider_error() -> None:
+    flaky = _Provider()
+    real = flaky.create_chat
+    failures = iter([TimeoutError("slow")])
+
+    def once(request):
+        if "Partial answer" in request.messages[-1]["content"]:
+            error = next(failures, None)
+            if error is not None:
+                raise error
+        return real(request)
+
+    flaky.create_chat = once
+    partials = "".join(f"event 1 partial {index} " + "detail " * 10 + "\n" for index in range(8)) * 2
+
+    assert "combined" in _runner(flaky, reduce_tokens=60).run("q", partials)
+    with pytest.raises(ProviderError, match="reduce round 1 failed after 2 attempts: boom"):
+        _runner(_Provider(fail_on="Partial answer"), reduce_tokens=60).run("q", partials)
@@ -0,0 +1,103 @@
+"""Tests for the capped SQLite prompt history."""
+
+from __future__ import annotations
+
+from prompt_toolkit.completion import CompleteEvent
+from prompt_toolkit.document import Document
+from prompt_toolkit.history import FileHistory
+
+from cli_llm.services import prompt_history as prompt_history_module
+from cli_llm.services.prompt_history import HistorySearchCompleter, PromptHistory
+
+
+def _history(tmp_path, **kwargs) -> PromptHistory:
+    kwargs.setdefault("legacy_path", None)
+    return PromptHistory(tmp_path / "prompts.sqlite3", **kwargs)
+
+
+def test_recent_entries_load_newest_first_and_repeats_move_to_front(tmp_path) -> None:
+    history = _history(tmp_path, recent=3)
+    for text in ["one", "two", "three", "four", "two"]:
+        history.store_string(text)
+
+    assert list(history.load_history_strings()) == ["two", "four", "three"]
+    assert history.search("o", limit=10) == ["two", "four", "one"]
+
+
+def test_history_is_trimmed_to_the_cap(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(prompt_history_module, "COMPACT_EVERY", 5)
+    history = _history(tmp_path, max_entries=3, recent=100)
+    for index in range(10):
+        history.store_string(f"prompt {index}")
+
+    assert list(history.load_history_strings()) == ["prompt 9", "prompt 8", "prompt 7"]
+
+
+def test_concurrent_writers_share_the_table(tmp_path) -> None:
+    first, second = _history(tmp_path), _history(tmp_path)
+    first.store_string("from first")
+    second.store_string("from second")
+
+    assert list(_history(tmp_path).load_history_strings()) == ["from second", "from first"]
+
+
+def test_legacy_file_history_is_imported_once_in_order(tmp_path) -> None:
+    legacy = tmp_path / "chat_history"
+    old = FileHistory(str(legacy))
+    for text in ["oldest", "middle", "newest"]:
+        old.store_string(text)
+
+    history = _history(tmp_path, legacy_path=legacy)
+
+    assert list(history.load_history_strings()) == ["newest", "middle", "oldest"]
+    history.store_string("fresh")
+    assert list(_history(tmp_path, legacy_path=legacy).load_history_strings())[:2] == ["fresh", "newest"]
+
+
+def test_ctrl_r_completer_searches_the_whole_index(tmp_path) -> None:
+    history = _history(tmp_path, recent=1)
+    history.store_string("explain 100%_ coverage")
+    history.store_string("explain\nthe deploy")
+    history.store_string("unrelated")
+
+    completions = list(
+        HistorySearchCompleter(history).get_completions(Document("explain"), CompleteEvent(completion_requested=True))
+    )
+
+    assert [completion.text for completion in completions] == ["explain\nthe deploy", "explain 100%_ coverage"]
+    assert completions[0].start_position == -len("explain")
+    assert history.search("%_") == ["explain 100%_ coverage"]
+
+
+def test_ctrl_r_fills_the_menu_without_giving_tab_a_completer(tmp_path, monkeypatch) -> None:
+    import prompt_toolkit
+    from prompt_toolkit.buffer import Buffer
+    from prompt_toolkit.keys import Keys
+
+    from cli_llm.services import input_handler
+
+    history = _history(tmp_path)
+    history.store_string("explain the deploy")
+    history.store_string("unrelated")
+
+    captured = {}
+
+    class _Session:
+        def __init__(self, **kwargs) -> None:
+            captured.update(kwargs)
+
+        def prompt(self, _text) -> str:
+            return ""
+
+    monkeypatch.setattr(prompt_toolkit, "PromptSession", _Session)
+    monkeypatch.setattr(input_handler, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(prompt_history_module, "PromptHistory", lambda: history)
+    input_handler._read_promptkit("[Ask]:")
+    assert captured.get("completer") is None
+
+    (binding,) = captured["key_bindings"].get_bindings_for_keys((Keys.ControlR,))
+    buffer = Buffer()
+    buffer.insert_text("explain")
+    binding.handler(type("Event", (), {"current_buffer": buffer})())
+
+    assert [completion.text for completion in buffer.complete_state.completions] == ["explain the deploy"]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import threading
 from types import SimpleNamespace
 
 from cli_llm.config import AppConfig
@@ -190,6 +191,20 @@ def test_chat_service_non_stream_uses_usage_counts(monkeypatch) -> None:
     assert "stream" not in provider.last_kwargs
 
 
+def test_chat_service_undecorated_output_keeps_stdout_clean(capsys) -> None:
+    provider = DummyProvider()
+    renderer = DummyRenderer()
+    renderer.decorated = False
+    service = ChatService(provider, renderer, TokenTracker())
+
+    service.chat(prompt="hello", no_stream=False, model="gpt-4o-mini", role_name="coder")
+
+    captured = capsys.readouterr()
+    assert renderer.stream_calls
+    assert captured.out == ""
+    assert "Generating" not in captured.err
+
+
 def test_count_token_helpers_use_tiktoken(monkeypatch) -> None:
     token_map = {
         "sys": 3,
@@ -210,3 +225,61 @@ def test_count_token_helpers_use_tiktoken(monkeypatch) -> None:
     ]
     assert service.count_tokens_in_messages(messages, "gpt-4o-mini") == (3 + 4) + (5 + 4) + 2
     assert service.count_tokens_in_text("final", "gpt-4o-mini") == 7
+
+
+class IteratingRenderer(DummyRenderer):
+    def process_streamed_chunk(self, response, count_tokens: bool = False) -> str:
+        text = "".join(chunk.choices[0].delta.content or "" for chunk in response if chunk.choices)
+        self.stream_calls.append((response, count_tokens))
+        return text
+
+
+def _delta(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)
+
+
+def test_stream_usage_chunk_is_authoritative(monkeypatch) -> None:
+    usage_chunk = SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=21, completion_tokens=9))
+    provider = DummyProvider(response=[_delta("Hel"), _delta("lo"), usage_chunk])
+    tracker = TokenTracker()
+    service = ChatService(provider, IteratingRenderer(), tracker)
+    monkeypatch.setattr(ChatService, "count_tokens_in_messages", lambda self, messages, model: 99)
+
+    service.chat(prompt="hi", no_stream=False, model="gpt-4o-mini", role_name="coder", count_tokens=True)
+
+    assert provider.last_kwargs["stream_options"] == {"include_usage": True}
+    assert (tracker.input_tokens, tracker.output_tokens) == (21, 9)
+    assert (tracker.estimated_input, tracker.estimated_output) == (0, 0)
+
+
+def test_stream_without_usage_counts_deltas_in_background(monkeypatch) -> None:
+    provider = DummyProvider(response=[_delta("one "), _delta("two "), _delta("three")])
+    provider.config.providers = {provider.config.provider: {"stream_usage": False}}
+    tracker = TokenTracker()
+    service = ChatService(provider, IteratingRenderer(), tracker)
+    counted_on = set()
+
+    def fake_count_text(self, text, model):
+        counted_on.add(threading.current_thread().name)
+        return len(text.split())
+
+    monkeypatch.setattr(ChatService, "count_tokens_in_messages", lambda self, messages, model: 7)
+    monkeypatch.setattr(ChatService, "count_tokens_in_text", fake_count_text)
+
+    service.chat(prompt="hi", no_stream=False, model="gpt-4o-mini", role_name="coder", count_tokens=True)
+
+    assert "stream_options" not in provider.last_kwargs
+    assert tracker.output_tokens == tracker.estimated_output == 3
+    assert tracker.input_tokens == tracker.estimated_input == 7
+    assert counted_on == {"cli-llm-token-counter"}
+
+
+def test_token_tracker_display_marks_estimates(capsys) -> None:
+    tracker = TokenTracker()
+    tracker.add_input(10)
+    tracker.add_output(4, estimated=True)
+    tracker.display()
+
+    captured = capsys.readouterr().out
+    assert "Input tokens: 10 (exact)" in captured
+    assert "Output tokens: 4 (estimated)" in captured
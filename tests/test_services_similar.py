@@ -0,0 +1,149 @@
+"""Tests for the MinHash/LSH near-duplicate prompt cache."""
+
+from __future__ import annotations
+
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from cli_llm.config import AppConfig, ConfigLoader
+from cli_llm.services import ChatService, TokenTracker
+from cli_llm.services import similar as similar_module
+from cli_llm.services.similar import SimilarityCache, estimate_jaccard, minhash, normalize_prompt
+
+HELP_PROMPT = """My laptop cannot connect to the office VPN since this morning.
+The client shows error 809 at 09:14 and then disconnects.
+I already restarted the machine and checked the wifi connection."""
+
+
+def _cache(tmp_path, **kwargs) -> SimilarityCache:
+    return SimilarityCache(["helpdesk"], path=tmp_path / "similar.sqlite3", **kwargs)
+
+
+def test_normalisation_ignores_case_timestamps_whitespace_and_line_order() -> None:
+    shuffled = "\n".join(reversed(HELP_PROMPT.upper().replace("09:14", "11:52").splitlines()))
+    assert normalize_prompt(shuffled) == normalize_prompt(HELP_PROMPT + "\n\n   ")
+    assert estimate_jaccard(minhash(shuffled), minhash(HELP_PROMPT)) == 1.0
+    assert normalize_prompt("job 20240101123 failed on 2024-05-01 10:00:01") == normalize_prompt(
+        "job 20240102999 failed on 2024-06-30 23:59:59"
+    )
+
+
+def test_short_numbers_such_as_error_codes_are_kept() -> None:
+    assert normalize_prompt("explain error 404") != normalize_prompt("explain error 500")
+    assert estimate_jaccard(minhash("explain error 404"), minhash("explain error 500")) < 0.5
+    assert estimate_jaccard(minhash(HELP_PROMPT.replace("809", "720")), minhash(HELP_PROMPT)) < 1.0
+
+
+def test_unrelated_prompts_score_low() -> None:
+    other = "Write a haiku about autumn leaves falling on a quiet river."
+    assert estimate_jaccard(minhash(other), minhash(HELP_PROMPT)) < 0.2
+
+
+def test_lookup_returns_near_duplicate_with_score_and_age(tmp_path) -> None:
+    cache = _cache(tmp_path, threshold=0.6)
+    cache.record(HELP_PROMPT, "helpdesk", "model-a", "Reinstall the VPN profile.")
+
+    variant = HELP_PROMPT.replace("this morning", "this  morning, again")
+    hit = cache.lookup(variant, "helpdesk")
+
+    assert hit is not None
+    assert 0.6 <= hit.similarity < 1.0
+    assert hit.answer == "Reinstall the VPN profile."
+    assert hit.describe_age() == "just now"
+    assert cache.lookup("Completely different question about sorting lists", "helpdesk") is None
+
+
+def test_roles_are_opt_in_and_isolated(tmp_path) -> None:
+    cache = _cache(tmp_path)
+    cache.record(HELP_PROMPT, "coder", "model-a", "ignored")
+    cache.record(HELP_PROMPT, "helpdesk", "model-a", "stored")
+
+    assert cache.lookup(HELP_PROMPT, "coder") is None
+    assert cache.lookup(HELP_PROMPT, "helpdesk").answer == "stored"
+
+
+def test_oldest_entries_are_pruned(tmp_path) -> None:
+    cache = _cache(tmp_path, max_entries=1)
+    cache.record(HELP_PROMPT, "helpdesk", "model-a", "first")
+    cache.record("Printer on floor three jams on every duplex job.", "helpdesk", "model-a", "second")
+
+    assert cache.lookup(HELP_PROMPT, "helpdesk") is None
+
+
+class _Provider:
+    def __init__(self) -> None:
+        self.config = AppConfig()
+        self.calls = 0
+
+    def create_chat(self, request):
+        self.calls += 1
+        return SimpleNamespace(
+            model="live-model",
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Live answer"), finish_reason="stop")],
+            usage=None,
+        )
+
+
+class _Renderer:
+    def __init__(self) -> None:
+        self.printed = []
+
+    def print_markdown(self, content: str) -> None:
+        self.printed.append(content)
+
+    def process_unstreamed_chunk(self, response, response_time, count_tokens=False, extra_session_type=None):
+        return response.choices[0].message.content
+
+
+class _Terminal(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def test_chat_reuses_similar_answer_before_calling_provider(tmp_path, monkeypatch, capsys) -> None:
+    monkeypatch.setattr("sys.stdin", _Terminal("\n"))
+    provider, renderer = _Provider(), _Renderer()
+    service = ChatService(provider, renderer, TokenTracker(), similar=_cache(tmp_path))
+
+    service.chat(HELP_PROMPT, no_stream=True, model="m", role_name="helpdesk")
+    service.chat(HELP_PROMPT.replace("09:14", "10:02"), no_stream=True, model="m", role_name="helpdesk")
+
+    assert provider.calls == 1
+    assert renderer.printed == ["Live answer"]
+    assert "similarity 1.00" in capsys.readouterr().out
+
+
+def test_non_interactive_runs_never_reuse_a_similar_answer(tmp_path, monkeypatch, capsys) -> None:
+    monkeypatch.setattr("sys.stdin", io.StringIO(""))
+    provider, renderer = _Provider(), _Renderer()
+    cache = _cache(tmp_path)
+    service = ChatService(provider, renderer, TokenTracker(), similar=cache)
+
+    service.chat(HELP_PROMPT, no_stream=True, model="m", role_name="helpdesk")
+    cache.lookup = lambda prompt, role: pytest.fail("looked up without a terminal")
+    service.chat(HELP_PROMPT, no_stream=True, model="m", role_name="helpdesk")
+
+    assert provider.calls == 2
+    assert "Similar question" not in capsys.readouterr().out
+
+
+def test_oversized_prompts_are_never_hashed(tmp_path, monkeypatch) -> None:
+    cache = _cache(tmp_path)
+    monkeypatch.setattr(similar_module, "minhash", lambda text: pytest.fail("hashed"))
+    huge = "log line\n" * (similar_module.MAX_PROMPT_CHARS // 9 + 1)
+
+    cache.record(huge, "helpdesk", "m", "answer")
+
+    assert cache.lookup(huge, "helpdesk") is None
+
+
+def test_similar_section_is_loaded(tmp_path) -> None:
+    config_path = tmp_path / "config.toml"
+    config_path.write_text('[similar]\nroles = ["helpdesk"]\nthreshold = 0.9\n')
+
+    config = ConfigLoader(user_config_path=config_path).load(environment={"HOME": str(tmp_path)})
+
+    assert config.similar_roles == ["helpdesk"]
+    assert config.similar_threshold == 0.9
@@ -0,0 +1,126 @@
+"""Tests for the SQLite transcript store and its background writer."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from click.testing import CliRunner
+
+from cli_llm import cli as cli_module
+from cli_llm.config import AppConfig
+from cli_llm.services import ChatService, TokenTracker
+from cli_llm.services import transcripts as transcripts_module
+from cli_llm.services.transcripts import TranscriptRecord, TranscriptStore, TranscriptWriter
+
+
+def _record(index: int, **values) -> TranscriptRecord:
+    values.setdefault("model", "gpt-4o")
+    return TranscriptRecord(
+        created=1_700_000_000.0 + index,
+        prompt=f"question {index} about sqlite",
+        answer=f"answer {index}",
+        provider="openai",
+        role="default",
+        elapsed=0.5,
+        input_tokens=10,
+        output_tokens=5,
+        **values,
+    )
+
+
+def test_store_searches_with_filters_and_tolerates_bad_fts_syntax(tmp_path) -> None:
+    store = TranscriptStore(tmp_path / "history.sqlite3")
+    store.write_many([_record(index) for index in range(3)] + [_record(3, model="claude")])
+    store.write_many([TranscriptRecord(created=1.0, prompt="unrelated", answer="rust lifetimes")])
+
+    assert {hit.id for hit in store.search("sqlite")} == {1, 2, 3, 4}
+    assert [hit.id for hit in store.search("sqlite", model="claude")] == [4]
+    assert "[lifetimes]" in store.search("lifetimes")[0].snippet
+    assert [hit.id for hit in store.search('question "2')] == [3]
+    assert store.get(2).answer == "answer 1"
+    assert store.get(99) is None
+    assert store._connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_stats_group_by_provider_and_model(tmp_path) -> None:
+    store = TranscriptStore(tmp_path / "history.sqlite3")
+    store.write_many([_record(0), _record(1), _record(2, model="claude", error="ProviderError: boom")])
+
+    stats = store.stats()
+
+    assert stats["total"]["requests"] == 3 and stats["total"]["errors"] == 1
+    assert stats["total"]["input_tokens"] == 30
+    assert [(row["model"], row["requests"]) for row in stats["models"]] == [("gpt-4o", 2), ("claude", 1)]
+
+
+def test_writer_batches_records_and_flushes_on_close(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(transcripts_module, "WRITE_BATCH", 4)
+    store = TranscriptStore(tmp_path / "history.sqlite3")
+    batches = []
+    write_many = store.write_many
+    store.write_many = lambda records: batches.append(len(records)) or write_many(records)
+
+    writer = TranscriptWriter(store)
+    for index in range(10):
+        writer.record(prompt=f"p{index}", answer="a", model="m")
+    writer.close()
+
+    assert sum(batches) == 10 and max(batches) <= 4
+    assert TranscriptStore(store.path).stats()["total"]["requests"] == 10
+
+
+def test_chat_service_logs_success_and_failure() -> None:
+    class Provider:
+        config = AppConfig(provider="openai")
+
+        def __init__(self) -> None:
+            self.fail = False
+
+        def create_chat(self, request):
+            if self.fail:
+                raise RuntimeError("down")
+            usage = SimpleNamespace(prompt_tokens=12, completion_tokens=3)
+            return SimpleNamespace(model="m", usage=usage, choices=[SimpleNamespace(message=SimpleNamespace(content="42"))])
+
+    class Renderer:
+        decorated = False
+        events = None
+
+        def process_unstreamed_chunk(self, response, *args, **kwargs):
+            return response.choices[0].message.content
+
+    class Writer:
+        def __init__(self) -> None:
+            self.records = []
+
+        def record(self, **values):
+            self.records.append(values)
+
+    provider, writer = Provider(), Writer()
+    service = ChatService(provider, Renderer(), TokenTracker(), transcripts=writer)
+
+    service.chat("what?", no_stream=True, model="m", role_name="coder")
+    provider.fail = True
+    service.chat("again?", no_stream=True, model="m", role_name="coder")
+
+    ok, failed = writer.records
+    assert (ok["provider"], ok["model"], ok["role"], ok["prompt"], ok["answer"]) == ("openai", "m", "coder", "what?", "42")
+    assert (ok["input_tokens"], ok["output_tokens"], ok["error"]) == (12, 3, None)
+    assert failed["error"] == "RuntimeError: down" and failed["answer"] == ""
+
+
+def test_history_commands_read_the_store(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "history.sqlite3"
+    TranscriptStore(path).write_many([_record(0), _record(1)])
+    monkeypatch.setattr(transcripts_module.TranscriptStore.__init__, "__defaults__", (path,))
+    runner = CliRunner()
+
+    search = runner.invoke(cli_module.cli, ["history", "search", "question", "-n", "1"])
+    show = runner.invoke(cli_module.cli, ["history", "show", "2", "--json"])
+    stats = runner.invoke(cli_module.cli, ["history", "stats"])
+    missing = runner.invoke(cli_module.cli, ["history", "show", "9"])
+
+    assert search.exit_code == 0 and search.output.count("#") == 1
+    assert '"answer": "answer 1"' in show.output
+    assert stats.output.startswith("2 requests (0 failed), 20 input / 10 output tokens")
+    assert missing.exit_code != 0 and "No transcript #9" in missing.output
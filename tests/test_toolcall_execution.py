@@ -1,4 +1,4 @@
-"""Tests for single tool-call execution and safe stdout."""
+"""Tests for tool-call execution, the agent loop and safe stdout."""
 
 from __future__ import annotations
 
@@ -7,7 +7,15 @@ from types import SimpleNamespace
 import pytest
 
 from cli_llm.config import AppConfig
-from cli_llm.toolcalls import ToolCallError, ToolcallService, get_tool_definitions, parse_streaming_tool_calls
+from cli_llm.toolcalls import (
+    AgentLimits,
+    ToolCall,
+    ToolCallError,
+    ToolcallService,
+    execute_tools,
+    get_tool_definitions,
+    parse_streaming_tool_calls,
+)
 
 
 class ToolCallProvider:
@@ -121,3 +129,142 @@ def test_parse_streaming_tool_calls_accumulates_arguments_by_index() -> None:
     assert calls[0].id == "call_1"
     assert calls[0].name == "read"
     assert calls[0].arguments == {"path": "README.md"}
+
+
+def _tool_turn(*calls, usage=(100, 10)):
+    raw_calls = [
+        SimpleNamespace(id=f"call_{index}", function=SimpleNamespace(name=name, arguments=arguments))
+        for index, (name, arguments) in enumerate(calls)
+    ]
+    return SimpleNamespace(
+        usage=SimpleNamespace(prompt_tokens=usage[0], completion_tokens=usage[1]),
+        choices=[SimpleNamespace(message=SimpleNamespace(content=None, tool_calls=raw_calls))],
+    )
+
+
+def _answer_turn(text: str):
+    return SimpleNamespace(
+        usage=SimpleNamespace(prompt_tokens=200, completion_tokens=20),
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text, tool_calls=None))],
+    )
+
+
+class ScriptedProvider:
+    def __init__(self, *responses) -> None:
+        self.responses = list(responses)
+        self.requests = []
+
+    def create_chat(self, request):
+        self.requests.append(request)
+        return self.responses.pop(0)
+
+
+def test_agent_feeds_tool_results_back_until_the_model_answers(tmp_path) -> None:
+    (tmp_path / "a.txt").write_text("alpha\n", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("beta\n", encoding="utf-8")
+    provider = ScriptedProvider(
+        _tool_turn(("read", '{"path": "a.txt"}'), ("read", '{"path": "b.txt"}'), ("read", '{"path": "../x"}')),
+        _answer_turn("a has alpha, b has beta"),
+    )
+    seen = []
+
+    outcome = ToolcallService(provider=provider, cwd=tmp_path).run_agent(
+        prompt="What is in a and b?",
+        model="test-model",
+        tools=get_tool_definitions(["read"]),
+        on_result=lambda call, result: seen.append(call.id),
+    )
+
+    assert outcome.answer == "a has alpha, b has beta"
+    assert (outcome.steps, outcome.stopped, outcome.input_tokens, outcome.output_tokens) == (2, "answer", 300, 30)
+    assert seen == ["call_0", "call_1", "call_2"]
+    follow_up = provider.requests[1].messages
+    assert follow_up[2]["role"] == "assistant" and len(follow_up[2]["tool_calls"]) == 3
+    assert [message["content"] for message in follow_up[3:5]] == ["alpha\n", "beta\n"]
+    assert follow_up[5]["tool_call_id"] == "call_2" and "escapes the working directory" in follow_up[5]["content"]
+
+
+def test_agent_stops_at_step_and_token_limits(tmp_path) -> None:
+    looping = [_tool_turn(("ls", "{}")) for _ in range(5)]
+    outcome = ToolcallService(provider=ScriptedProvider(*looping), cwd=tmp_path).run_agent(
+        prompt="loop", model="m", tools=get_tool_definitions(["ls"]), limits=AgentLimits(max_steps=3)
+    )
+    assert (outcome.answer, outcome.steps, outcome.stopped) == (None, 3, "max_steps")
+
+    hungry = [_tool_turn(("ls", "{}"), usage=(600, 0)) for _ in range(5)]
+    outcome = ToolcallService(provider=ScriptedProvider(*hungry), cwd=tmp_path).run_agent(
+        prompt="loop", model="m", tools=get_tool_definitions(["ls"]), limits=AgentLimits(max_tokens=1000)
+    )
+    assert (outcome.steps, outcome.stopped) == (2, "max_tokens")
+
+
+def test_execute_tools_runs_read_only_calls_concurrently_and_bash_serially(tmp_path, monkeypatch) -> None:
+    import threading
+    import time
+
+    from cli_llm.toolcalls import service as service_module
+
+    active = {"read": 0, "bash": 0}
+    peak = {"read": 0, "bash": 0}
+    lock = threading.Lock()
+    real_execute = service_module.execute_tool
+
+    def tracked(tool, arguments, cwd):
+        with lock:
+            active[tool.name] += 1
+            peak[tool.name] = max(peak[tool.name], active[tool.name])
+        time.sleep(0.05)
+        try:
+            return real_execute(tool, arguments, cwd)
+        finally:
+            with lock:
+                active[tool.name] -= 1
+
+    monkeypatch.setattr(service_module, "execute_tool", tracked)
+    (tmp_path / "f.txt").write_text("x\n", encoding="utf-8")
+    calls = [ToolCall(f"r{index}", "read", {"path": "f.txt"}) for index in range(4)]
+    calls += [ToolCall(f"b{index}", "bash", {"command": f"printf {index}"}) for index in range(3)]
+
+    results = execute_tools(calls, get_tool_definitions(["read", "bash"]), tmp_path)
+
+    assert [result.stdout for result in results] == ["x\n"] * 4 + ["0", "1", "2"]
+    assert peak["read"] > 1 and peak["bash"] == 1
+
+
+def test_execute_tools_treats_bash_as_a_barrier_in_call_order(tmp_path, monkeypatch) -> None:
+    import threading
+    import time
+
+    from cli_llm.toolcalls import service as service_module
+
+    events = []
+    lock = threading.Lock()
+    real_execute = service_module.execute_tool
+
+    def tracked(tool, arguments, cwd):
+        name = arguments.get("path") or arguments["command"]
+        with lock:
+            events.append(("start", name))
+        time.sleep(0.02)
+        try:
+            return real_execute(tool, arguments, cwd)
+        finally:
+            with lock:
+                events.append(("end", name))
+
+    monkeypatch.setattr(service_module, "execute_tool", tracked)
+    (tmp_path / "a.txt").write_text("a\n", encoding="utf-8")
+    calls = [
+        ToolCall("r0", "read", {"path": "a.txt"}),
+        ToolCall("r1", "read", {"path": "a.txt"}),
+        ToolCall("b0", "bash", {"command": "printf 'b\\n' > b.txt"}),
+        ToolCall("r2", "read", {"path": "b.txt"}),
+        ToolCall("r3", "read", {"path": "a.txt"}),
+    ]
+
+    results = execute_tools(calls, get_tool_definitions(["read", "bash"]), tmp_path)
+
+    assert [result.stdout for result in results] == ["a\n", "a\n", "", "b\n", "a\n"]
+    bash_start = events.index(("start", "printf 'b\\n' > b.txt"))
+    assert sorted(events[:bash_start]) == sorted([("start", "a.txt"), ("end", "a.txt")] * 2)
+    assert events[bash_start + 1] == ("end", "printf 'b\\n' > b.txt")
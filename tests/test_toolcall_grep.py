@@ -0,0 +1,127 @@
+"""Tests for the pruned, streaming grep engine."""
+
+from __future__ import annotations
+
+import sys
+
+import pytest
+
+from cli_llm.toolcalls import ToolCallError, execute_tool, get_tool_definitions
+from cli_llm.toolcalls import grep as grep_module
+from cli_llm.toolcalls.grep import grep
+
+GREP = get_tool_definitions(["grep"])[0]
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLI_LLM_NO_RG", "1")
+    files = {
+        ".gitignore": "*.log\nbuild/\n!keep.log\n",
+        "src/app.py": "needle = 1\nother\n",
+        "src/nested/.gitignore": "generated.py\n",
+        "src/nested/generated.py": "needle\n",
+        "src/nested/real.py": "x\nneedle\n",
+        "debug.log": "needle\n",
+        "keep.log": "needle\n",
+        "build/out.txt": "needle\n",
+        "node_modules/pkg/index.js": "needle\n",
+        ".git/config": "needle\n",
+        ".hidden/file": "needle\n",
+        ".env": "needle\n",
+        "env/pyvenv.cfg": "home = /usr\n",
+        "env/lib/site.py": "needle\n",
+    }
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    (tmp_path / "image.bin").write_bytes(b"\x89PNG\0\0needle\n")
+    return tmp_path
+
+
+def test_grep_prunes_ignored_hidden_dirs_vendored_and_binary_files(tree) -> None:
+    result = execute_tool(GREP, {"pattern": "needle"}, tree)
+
+    assert result.stdout == ".env:1:needle\nkeep.log:1:needle\nsrc/app.py:1:needle = 1\nsrc/nested/real.py:2:needle\n"
+
+
+def test_grep_respects_path_glob_and_case(tree) -> None:
+    (tree / "src" / "notes.md").write_text("NEEDLE\n", encoding="utf-8")
+
+    result = execute_tool(GREP, {"pattern": "needle", "path": "src", "glob": "*.md", "ignore_case": True}, tree)
+    single = execute_tool(GREP, {"pattern": "needle", "path": "src/nested/generated.py"}, tree)
+
+    assert result.stdout == "src/notes.md:1:NEEDLE\n"
+    assert single.stdout == "src/nested/generated.py:1:needle\n"
+
+
+def test_grep_stops_once_the_output_cap_is_reached(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CLI_LLM_NO_RG", "1")
+    for index in range(200):
+        (tmp_path / f"f{index:03}.txt").write_text("match\n" * 50, encoding="utf-8")
+
+    lines = grep(tmp_path, tmp_path, "match", max_chars=500)
+
+    assert 500 < sum(len(line) + 1 for line in lines) < 600
+    assert lines[0] == "f000.txt:1:match"
+
+
+def test_grep_rejects_invalid_patterns(tree) -> None:
+    with pytest.raises(ToolCallError, match="Invalid grep pattern"):
+        execute_tool(GREP, {"pattern": "("}, tree)
+
+
+def test_grep_delegates_to_rg_and_falls_back_when_it_errors(tree, tmp_path_factory, monkeypatch) -> None:
+    monkeypatch.delenv("CLI_LLM_NO_RG")
+    fake = tmp_path_factory.mktemp("bin") / "rg"
+    log = fake.with_name("args.txt")
+    fake.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        f"open({str(log)!r}, 'w').write('\\n'.join(sys.argv[1:]))\n"
+        "if '(?<=x)' in sys.argv: sys.exit(2)\n"
+        "print('src/app.py:1:from rg')\n",
+        encoding="utf-8",
+    )
+    fake.chmod(0o755)
+    monkeypatch.setattr(grep_module.shutil, "which", lambda name: str(fake))
+
+    assert grep(tree, tree, "needle", glob="*.py", max_chars=1000) == ["src/app.py:1:from rg"]
+    args = log.read_text().splitlines()
+    assert args[args.index("--regexp") + 1] == "needle"
+    assert "*.py" in args and "!node_modules/" in args
+    assert "--hidden" in args and "!.*/" in args
+
+    # rg rejects look-behind (exit 2); Python's engine answers instead.
+    assert grep(tree, tree, "(?<=x)", max_chars=1000) == ["src/nested/real.py:1:x"]
+
+
+def test_grep_glob_matches_basenames_with_and_without_rg(tree, tmp_path_factory, monkeypatch) -> None:
+    (tree / "src" / "nested" / "real_test.py").write_text("needle\n", encoding="utf-8")
+    query = {"pattern": "needle", "glob": "real*"}
+    fallback = grep(tree, tree, max_chars=1000, **query)
+
+    # Like rg, the fake matches a slash-free glob against each file's basename.
+    monkeypatch.delenv("CLI_LLM_NO_RG")
+    fake = tmp_path_factory.mktemp("bin") / "rg"
+    fake.write_text(
+        f"#!{sys.executable}\n"
+        "import fnmatch, os, re, sys\n"
+        "args = sys.argv[1:]\n"
+        "pattern = args[args.index('--regexp') + 1]\n"
+        "glob = [a for a in args[args.index('--glob') + 1::2] if not a.startswith('!')][0]\n"
+        "for top, dirs, files in os.walk('.'):\n"
+        "    dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in ('node_modules', 'build', 'env'))\n"
+        "    for name in sorted(files):\n"
+        "        if not fnmatch.fnmatch(name, glob): continue\n"
+        "        path = os.path.join(top, name)[2:]\n"
+        "        for number, line in enumerate(open(path), start=1):\n"
+        "            if re.search(pattern, line): print(f'{path}:{number}:{line.rstrip()}')\n",
+        encoding="utf-8",
+    )
+    fake.chmod(0o755)
+    monkeypatch.setattr(grep_module.shutil, "which", lambda name: str(fake))
+
+    assert fallback == ["src/nested/real.py:2:needle", "src/nested/real_test.py:1:needle"]
+    assert grep(tree, tree, max_chars=1000, **query) == fallback
@@ -0,0 +1,82 @@
+"""Tests for the pruned scandir walker behind find and ls."""
+
+from __future__ import annotations
+
+from cli_llm.toolcalls import execute_tool, get_tool_definitions
+from cli_llm.toolcalls import walk as walk_module
+from cli_llm.toolcalls.walk import iter_tree, parse_ignore
+
+FIND, LS = get_tool_definitions(["find", "ls"])
+
+
+def _write(root, *names) -> None:
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x\n", encoding="utf-8")
+
+
+def test_find_prunes_and_keeps_sorted_path_order(tmp_path) -> None:
+    _write(tmp_path, ".gitignore", "b/z.py", "a.py", "a/y.py", "dist/x.py", "node_modules/m.py", ".venv/v.py")
+    _write(tmp_path, ".venv/pyvenv.cfg", ".git/hooks/h.py")
+    (tmp_path / ".gitignore").write_text("/dist\n", encoding="utf-8")
+
+    result = execute_tool(FIND, {"pattern": "*.py"}, tmp_path)
+    nested = execute_tool(FIND, {"pattern": "b*"}, tmp_path)
+
+    assert result.stdout == "a/y.py\na.py\nb/z.py\n"
+    assert nested.stdout == "b/\nb/z.py\n"  # the pattern also matches the relative path
+
+
+def test_find_lists_hidden_directories_but_the_default_walk_does_not(tmp_path) -> None:
+    _write(tmp_path, ".env", "app/.config.toml", ".cache/blob.toml", "app/.tox/x.toml")
+
+    assert execute_tool(FIND, {"pattern": ".*"}, tmp_path).stdout == (
+        ".cache/\n.cache/blob.toml\n.env\napp/.config.toml\napp/.tox/\n"
+    )
+    assert execute_tool(FIND, {"pattern": "*.toml"}, tmp_path).stdout == (
+        ".cache/blob.toml\napp/.config.toml\napp/.tox/x.toml\n"
+    )
+    assert [entry.rel for entry in iter_tree(tmp_path, tmp_path)] == [".env", "app/.config.toml"]
+
+
+def test_find_stops_walking_once_the_limit_is_reached(tmp_path, monkeypatch) -> None:
+    for index in range(50):
+        _write(tmp_path, f"d{index:02}/hit.txt")
+    scanned = []
+    real_scandir = walk_module.os.scandir
+    monkeypatch.setattr(walk_module.os, "scandir", lambda path: scanned.append(path) or real_scandir(path))
+
+    result = execute_tool(FIND, {"pattern": "hit.txt", "limit": 2}, tmp_path)
+
+    assert result.stdout == "d00/hit.txt\nd01/hit.txt\n"
+    assert len(scanned) == 3  # the root and the two directories that matched
+
+
+def test_ls_marks_directories_and_applies_limit_in_name_order(tmp_path) -> None:
+    _write(tmp_path, "c.txt", "a/inner.txt", ".env")
+
+    assert execute_tool(LS, {}, tmp_path).stdout == ".env\na/\nc.txt\n"
+    assert execute_tool(LS, {"limit": 2}, tmp_path).stdout == ".env\na/\n"
+
+
+def test_ignore_rules_support_anchoring_negation_and_double_star() -> None:
+    rules = walk_module.IgnoreRules(
+        tuple(parse_ignore("/top.txt\n**/cache/**\n*.tmp\n!keep.tmp\ndocs/*.md\n"))
+        + tuple(parse_ignore("local.cfg\n", base="sub/"))
+    )
+
+    assert rules.ignored("top.txt", False) and not rules.ignored("sub/top.txt", False)
+    assert rules.ignored("a/b/cache/file", False)
+    assert rules.ignored("x/y.tmp", False) and not rules.ignored("x/keep.tmp", False)
+    assert rules.ignored("docs/readme.md", False) and not rules.ignored("docs/deep/readme.md", False)
+    assert rules.ignored("sub/deeper/local.cfg", False) and not rules.ignored("local.cfg", False)
+
+
+def test_walk_from_a_subdirectory_applies_parent_ignores(tmp_path) -> None:
+    _write(tmp_path, "pkg/mod.py", "pkg/mod.pyc", "pkg/gen/out.py")
+    (tmp_path / ".gitignore").write_text("*.pyc\ngen/\n", encoding="utf-8")
+
+    entries = [entry.rel for entry in iter_tree(tmp_path / "pkg", tmp_path)]
+
+    assert entries == ["pkg/mod.py"]